@@ -0,0 +1,84 @@
+"""
+Headline classification throughput: the old chained any() scans (single label), a
+per-keyword multi-label scan, and the compiled one-pass classifier.
+Run from the repo root:  python -m benchmarks.bench_classifier [n_headlines ...]
+"""
+import random, re, sys, time
+from services.news_classifier import (classify_headline, CATEGORY_KEYWORDS, CURRENCY_KEYWORDS, INSTRUMENT_KEYWORDS,
+                                      CURRENCY_INSTRUMENTS, INSTRUMENTS)
+from utils.constants import NEWS_CATEGORIES, CURRENCY_PAIRS
+
+TEMPLATES = [
+    "{a} slips as {b} data surprises", "{a} steadies ahead of {b} decision", "Traders eye {a} after {b} comments",
+    "{a} rallies while {b} weighs on sentiment", "Analysts see {a} outlook clouded by {b}", "{a} and {b} in focus this week",
+]
+WORDS = ["dollar", "euro", "yen", "sterling", "Fed", "ECB", "BoE", "Bank of Japan", "CPI", "payrolls", "gold", "oil",
+         "bitcoin", "Nasdaq", "Ukraine", "tariffs", "election", "GDP", "EUR/USD", "USDJPY", "stocks", "bonds",
+         "company earnings", "weather", "shipping costs", "rate cut", "Lagarde", "Powell", "OPEC+", "loonie"]
+
+def synthetic_headlines(n: int, seed: int = 5):
+    rnd = random.Random(seed)
+    return [rnd.choice(TEMPLATES).format(a=rnd.choice(WORDS), b=rnd.choice(WORDS)) for _ in range(n)]
+
+# Reference: the original single-label categorizer
+def legacy_categorize(title: str) -> str:
+    t = title.lower()
+    if any(k in t for k in ["fed", "ecb", "boe", "central bank", "interest rate", "hike", "cut"]):
+        return "Central Bank News (Fed, ECB)"
+    if any(k in t for k in ["inflation", "cpi", "ppi", "jobs", "employment", "unemployment", "gdp"]):
+        return "Inflation & Economic Data"
+    if any(k in t for k in ["ukraine", "middle east", "geopolitics", "sanction", "election", "war", "conflict", "geopolitical"]):
+        return "Geopolitical Events"
+    return "Inflation & Economic Data"
+
+def _naive_tables():
+    tables = []
+    for kind, groups in (("category", CATEGORY_KEYWORDS), ("currency", CURRENCY_KEYWORDS), ("instrument", INSTRUMENT_KEYWORDS)):
+        for label, kws in groups.items():
+            for k in kws:
+                tables.append((re.compile(r"(?<![\w/])%s(?![\w/])" % re.escape(k), re.IGNORECASE), kind, label))
+    for inst in CURRENCY_PAIRS:
+        for k in (inst, inst.replace("/", "")):
+            tables.append((re.compile(r"(?<![\w/])%s(?![\w/])" % re.escape(k), re.IGNORECASE), "instrument", inst))
+    return tables
+
+NAIVE = _naive_tables()
+
+# Same labels as classify_headline, but one regex search per keyword
+def naive_classify(title: str):
+    cats, ccys, insts = set(), set(), set()
+    for rx, kind, label in NAIVE:
+        if rx.search(title):
+            (cats if kind == "category" else ccys if kind == "currency" else insts).add(label)
+    for ccy in ccys:
+        insts.update(CURRENCY_INSTRUMENTS.get(ccy, ()))
+    return {"categories": [c for c in NEWS_CATEGORIES if c in cats], "currencies": sorted(ccys),
+            "instruments": [i for i in INSTRUMENTS if i in insts]}
+
+def bench(fn, titles, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for t in titles:
+            fn(t)
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+def run(sizes=(1_000, 10_000)):
+    results = []
+    for n in sizes:
+        titles = synthetic_headlines(n)
+        assert all(naive_classify(t) == classify_headline(t) for t in titles), "label mismatch"
+        legacy, naive, compiled = bench(legacy_categorize, titles), bench(naive_classify, titles), bench(classify_headline, titles)
+        tagged = sum(1 for t in titles if classify_headline(t)["instruments"])
+        results.append({
+            "n": n, "legacy_single_label_s": round(legacy, 4), "per_keyword_multi_s": round(naive, 4),
+            "compiled_multi_s": round(compiled, 4), "compiled_headlines_per_sec": int(n / compiled),
+            "speedup_vs_per_keyword": round(naive / compiled, 1), "instrument_tagged": tagged,
+        })
+    return results
+
+if __name__ == "__main__":
+    sizes = tuple(int(x) for x in sys.argv[1:]) or (1_000, 10_000)
+    for r in run(sizes):
+        print(r)
@@ -0,0 +1,147 @@
+"""
+Pooled WAL connections (services.db) vs the old connect-per-call + global lock approach
+for get_user, toggle_alert and upsert_user, sequential and with concurrent readers;
+plus the news/alert hot-path queries on a populated users table.
+Run from the repo root:  python -m benchmarks.bench_db [n_ops] [n_users]
+"""
+import os, sqlite3, sys, tempfile, threading, time
+
+os.environ.setdefault("BOT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="botdb_bench_"), "bench.db"))
+from services import db  # noqa: E402  (must import after BOT_DB_PATH is set)
+
+# Reference: the original connect-per-call implementation
+class LegacyDB:
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    def get_user(self, user_id):
+        with self.lock:
+            conn = self._connect()
+            row = conn.execute("SELECT * FROM users WHERE user_id=?", (user_id,)).fetchone(); conn.close()
+            return row
+
+    def upsert_user(self, user_id, username, full_name):
+        with self.lock:
+            conn = self._connect()
+            conn.execute("""
+            INSERT INTO users(user_id, username, full_name, registered_at)
+            VALUES (?, ?, ?, datetime('now'))
+            ON CONFLICT(user_id) DO UPDATE SET username=excluded.username, full_name=excluded.full_name
+            """, (user_id, username, full_name))
+            conn.commit(); conn.close()
+
+    def toggle_alert(self, user_id, instrument):
+        with self.lock:
+            conn = self._connect()
+            row = conn.execute("SELECT enabled FROM alerts WHERE user_id=? AND instrument=?", (user_id, instrument)).fetchone()
+            if row:
+                new_val = 0 if row["enabled"] else 1
+                conn.execute("UPDATE alerts SET enabled=? WHERE user_id=? AND instrument=?", (new_val, user_id, instrument))
+            else:
+                new_val = 1
+                conn.execute("INSERT INTO alerts(user_id, instrument, enabled) VALUES (?, ?, 1)", (user_id, instrument))
+            conn.commit(); conn.close()
+            return bool(new_val)
+
+class PooledDB:
+    """services.db, but get_user reads through the pooled reader connection without the
+    in-process user cache, so both rows measure the connection layer, not cache hits
+    (the cache has its own rows in run_hot_paths)."""
+    @staticmethod
+    def get_user(user_id):
+        return db._reader().execute("SELECT * FROM users WHERE user_id=?", (user_id,)).fetchone()
+
+    upsert_user = staticmethod(db.upsert_user)
+    toggle_alert = staticmethod(db.toggle_alert)
+
+def _timed(fn, n: int) -> float:
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(i)
+    return time.perf_counter() - t0
+
+def _concurrent(impl, n: int, readers: int = 4) -> float:
+    """readers threads doing get_user while one thread does upsert_user; wall time."""
+    def read():
+        for i in range(n):
+            impl.get_user(i % 1000)
+    def write():
+        for i in range(n // 4):
+            impl.upsert_user(i % 1000, f"u{i}", "Bench User")
+    threads = [threading.Thread(target=read) for _ in range(readers)] + [threading.Thread(target=write)]
+    t0 = time.perf_counter()
+    for t in threads: t.start()
+    for t in threads: t.join()
+    return time.perf_counter() - t0
+
+def run(n: int = 2000):
+    db.init_db()
+    for i in range(1000):
+        db.upsert_user(i, f"user{i}", "Bench User")
+    legacy = LegacyDB(db.DB_PATH)
+    results = []
+    for name, impl in (("connect_per_call", legacy), ("pooled_wal", PooledDB)):
+        results.append({
+            "impl": name,
+            "get_user_us": round(_timed(lambda i: impl.get_user(i % 1000), n) / n * 1e6, 1),
+            "toggle_alert_us": round(_timed(lambda i: impl.toggle_alert(i % 1000, "EUR/USD"), n) / n * 1e6, 1),
+            "upsert_user_us": round(_timed(lambda i: impl.upsert_user(i % 1000, f"u{i}", "Bench User"), n) / n * 1e6, 1),
+            "concurrent_4r1w_s": round(_concurrent(impl, n), 3),
+        })
+    db.close_all()
+    return results
+
+def seed_population(n_users: int, seed: int = 13):
+    """n_users users, ~20% subscribed to news, ~10% with alerts on one or two instruments."""
+    import random
+    rnd = random.Random(seed)
+    users, alerts = [], []
+    for uid in range(1, n_users + 1):
+        sub = rnd.random() < 0.2
+        users.append((uid, f"user{uid}", "Bench User", int(sub and rnd.random() < 0.5),
+                      int(sub and rnd.random() < 0.6), int(sub and rnd.random() < 0.5)))
+        if rnd.random() < 0.1:
+            for inst in rnd.sample(["EUR/USD", "GBP/USD", "USD/JPY", "XAU/USD", "BTC/USD"], rnd.randint(1, 2)):
+                alerts.append((uid, inst))
+    with db._write() as conn:
+        conn.execute("DELETE FROM users"); conn.execute("DELETE FROM alerts"); conn.execute("DELETE FROM news_watermarks")
+        conn.executemany("""
+        INSERT INTO users(user_id, username, full_name, registered_at, news_geo, news_cb, news_cpi)
+        VALUES (?, ?, ?, datetime('now'), ?, ?, ?)
+        """, users)
+        conn.executemany("INSERT INTO alerts(user_id, instrument, enabled) VALUES (?, ?, 1)", alerts)
+    db.invalidate_user_cache()
+
+def _once(fn, *args) -> float:
+    t0 = time.perf_counter(); fn(*args)
+    return time.perf_counter() - t0
+
+def run_hot_paths(n_users: int = 100_000):
+    db.init_db()
+    seed_population(n_users)
+    subs = db.list_news_subscribers("Central Bank News (Fed, ECB)")
+    marks = {uid: 1.0 for uid in subs}
+    headlines = [(f"h{i:040d}", f"Headline {i}", f"https://example.com/{i}") for i in range(50)]
+    rows = [
+        ("list_users", lambda: db.list_users()),
+        ("list_news_subscribers", lambda: [db.list_news_subscribers(c) for c in db.NEWS_CATEGORY_COLUMNS]),
+        ("list_alert_subscribers", lambda: db.list_alert_subscribers("EUR/USD")),
+        ("set_news_watermarks", lambda: db.set_news_watermarks(marks)),
+        ("get_news_watermarks", lambda: db.get_news_watermarks(subs)),
+        ("record_headlines_50", lambda: db.record_headlines(headlines, time.time())),
+        ("get_user_uncached_1k", lambda: [db.invalidate_user_cache(i) or db.get_user(i) for i in range(1, 1001)]),
+        ("get_user_cached_1k", lambda: [db.get_user(i) for i in range(1, 1001)]),
+    ]
+    return [{"fn": name, "n_users": n_users, "time_s": round(min(_once(fn) for _ in range(3)), 5)} for name, fn in rows]
+
+if __name__ == "__main__":
+    for r in run(int(sys.argv[1]) if len(sys.argv) > 1 else 2000):
+        print(r)
+    for r in run_hot_paths(int(sys.argv[2]) if len(sys.argv) > 2 else 100_000):
+        print(r)
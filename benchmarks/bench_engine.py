@@ -0,0 +1,79 @@
+"""
+Pure-Python vs NumPy TradingEngine analysis core on long candle histories.
+Run from the repo root:  python -m benchmarks.bench_engine [n_candles ...]
+"""
+import random, sys, time
+from services.candle_arrays import CandleArrays, pin_bar_tags, breakout_range, trend, swing_levels, nearest_level
+
+def synthetic_candles(n: int, seed: int = 7, start: float = 1.1):
+    rnd = random.Random(seed)
+    out, price = [], start
+    for i in range(n):
+        o = price
+        c = o + rnd.gauss(0, 0.0015)
+        h = max(o, c) + abs(rnd.gauss(0, 0.001))
+        l = min(o, c) - abs(rnd.gauss(0, 0.001))
+        out.append({"time": i * 900, "open": o, "high": h, "low": l, "close": c})
+        price = c
+    return out
+
+# Reference: the original list-of-dicts implementation
+def legacy_pin_bar(candle):
+    """Scalar M15 pin bar check: 'buy' (inverted pin) / 'sell' (standard) or None."""
+    o, h, l, c = candle['open'], candle['high'], candle['low'], candle['close']
+    body = abs(c - o)
+    rng = h - l if (h - l) != 0 else 1e-9
+    upper_wick = h - max(c, o)
+    lower_wick = min(c, o) - l
+    # Pin bar heuristic: small body, long wick (> 2x body)
+    if body / rng < 0.3:
+        if lower_wick > 2 * body and (max(c, o) - l) / rng > 0.6:
+            return "buy"   # inverted pin, long lower wick
+        if upper_wick > 2 * body and (h - min(c, o)) / rng > 0.6:
+            return "sell"  # standard pin, long upper wick
+    return None
+
+def legacy_core(h4, d1, m15):
+    trend_up = d1[-1]['close'] > d1[-50]['close'] if len(d1) > 50 else False
+    hh = max(c['high'] for c in h4); ll = min(c['low'] for c in h4)
+    price = h4[-1]['close']
+    levels = sorted(list({round(c['high'], 3) for c in d1} | {round(c['low'], 3) for c in d1}))
+    nearby = min(levels, key=lambda x: abs(x - price)) if levels else None
+    tags = [legacy_pin_bar(c) for c in m15]
+    return trend_up, hh, ll, nearby, tags
+
+def vector_core(h4a, d1a, m15a):
+    trend_up, _ = trend(d1a.close, 50)
+    hh, ll = breakout_range(h4a, len(h4a))
+    nearby = nearest_level(swing_levels(d1a, len(d1a)), float(h4a.close[-1]))
+    return trend_up, hh, ll, nearby, pin_bar_tags(m15a)
+
+def as_tags(codes):
+    return [("buy" if t > 0 else "sell") if t else None for t in codes.tolist()]
+
+def bench(fn, *args, repeat: int = 5) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(*args); best = min(best, time.perf_counter() - t0)
+    return best
+
+def run(sizes=(1_000, 10_000, 100_000)):
+    results = []
+    for n in sizes:
+        candles = synthetic_candles(n)
+        arr = CandleArrays.from_candles(candles)
+        *head, codes = vector_core(arr, arr, arr)
+        assert legacy_core(candles, candles, candles) == (*head, as_tags(codes)), "signal mismatch"
+        py = bench(legacy_core, candles, candles, candles)
+        vec = bench(vector_core, arr, arr, arr)
+        conv = bench(CandleArrays.from_candles, candles)
+        results.append({
+            "n": n, "python_s": round(py, 5), "numpy_s": round(vec, 5), "to_arrays_s": round(conv, 5),
+            "speedup": round(py / vec, 1),
+        })
+    return results
+
+if __name__ == "__main__":
+    sizes = tuple(int(x) for x in sys.argv[1:]) or (1_000, 10_000, 100_000)
+    for r in run(sizes):
+        print(r)
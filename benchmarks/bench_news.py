@@ -0,0 +1,66 @@
+"""
+News delivery planning at scale: full users scan (old build_user_delivery) vs the
+category subscription index. Run from the repo root:  python -m benchmarks.bench_news [n_users]
+"""
+import os, random, sys, tempfile, time
+
+os.environ.setdefault("BOT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="botnews_bench_"), "bench.db"))
+from services import db  # noqa: E402  (must import after BOT_DB_PATH is set)
+from services.news_router import build_user_delivery  # noqa: E402
+from utils.constants import NEWS_CATEGORIES  # noqa: E402
+
+# Reference: the original O(users x headlines) implementation
+def legacy_delivery(headlines):
+    out = {}
+    for u in db.list_users():
+        prefs = []
+        if u["news_geo"]: prefs.append("Geopolitical Events")
+        if u["news_cb"]: prefs.append("Central Bank News (Fed, ECB)")
+        if u["news_cpi"]: prefs.append("Inflation & Economic Data")
+        if not prefs:
+            continue
+        user_items = [h for h in headlines if h["categories"][0] in prefs]
+        if user_items:
+            out[u["user_id"]] = user_items
+    return out
+
+def seed_users(n: int, subscribed_share: float = 0.2, seed: int = 11):
+    rnd = random.Random(seed)
+    rows = []
+    for uid in range(1, n + 1):
+        sub = rnd.random() < subscribed_share
+        rows.append((uid, f"user{uid}", "Bench User", int(sub and rnd.random() < 0.5),
+                     int(sub and rnd.random() < 0.6), int(sub and rnd.random() < 0.5)))
+    with db._write() as conn:
+        conn.execute("DELETE FROM users")
+        conn.executemany("""
+        INSERT INTO users(user_id, username, full_name, registered_at, news_geo, news_cb, news_cpi)
+        VALUES (?, ?, ?, datetime('now'), ?, ?, ?)
+        """, rows)
+
+def synthetic_headlines(n: int = 20, seed: int = 3):
+    rnd = random.Random(seed)
+    return [{"title": f"Headline {i}", "url": f"https://example.com/{i}", "categories": [rnd.choice(NEWS_CATEGORIES)],
+             "instruments": []} for i in range(n)]
+
+def _best(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(*args); best = min(best, time.perf_counter() - t0)
+    return best
+
+def run(n_users: int = 100_000):
+    db.init_db()
+    seed_users(n_users)
+    headlines = synthetic_headlines()
+    old, new = legacy_delivery(headlines), build_user_delivery(headlines)
+    assert old == new, "delivery mismatch"
+    return [{
+        "users": n_users, "headlines": len(headlines), "matched_users": len(new),
+        "full_scan_s": round(_best(legacy_delivery, headlines), 4),
+        "subscription_index_s": round(_best(build_user_delivery, headlines), 4),
+    }]
+
+if __name__ == "__main__":
+    for r in run(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000):
+        print(r)
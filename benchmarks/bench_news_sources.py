@@ -0,0 +1,68 @@
+"""
+News aggregation on the recorded fixtures (no network): per-source parse time, and
+clustering of the merged items into stories, also at scale with synthetic re-titles.
+Correctness on the same inputs is covered by tests/test_news_sources.py.
+Run from the repo root:  python -m benchmarks.bench_news_sources [n_items ...]
+"""
+import os, random, sys, time
+from services.news_sources import ReutersSource, ForexFactorySource, RSSSource, aggregate, cluster_items, normalize_item
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "fixtures")
+FIXTURE_NOW = 1792540800.0  # 2026-10-21 00:00 UTC, inside the recorded calendar week
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+def fixture_sources():
+    return [
+        (ReutersSource(), fixture("reuters_currencies.html")),
+        (ForexFactorySource(clock=lambda: FIXTURE_NOW), fixture("forexfactory_calendar.html")),
+        (RSSSource("fxnews", "https://fxnews.example.com/rss"), fixture("fxnews_rss.xml")),
+        (RSSSource("wire", "https://marketswire.example.com/atom"), fixture("markets_atom.xml")),
+    ]
+
+def synthetic_items(n: int, seed: int = 9):
+    """n items where roughly every third one re-titles or re-links an earlier story."""
+    rnd = random.Random(seed)
+    subjects = ["Dollar", "Euro", "Yen", "Sterling", "Gold", "Oil", "Bitcoin", "Aussie", "Loonie", "Franc"]
+    verbs = ["slips", "rises", "steadies", "jumps", "falls", "edges up", "extends gains", "retreats"]
+    vocab = [f"w{k}" for k in range(2_000)]  # stand-in for the long tail of headline words
+    items = []
+    for i in range(n):
+        if items and rnd.random() < 0.33:
+            base = rnd.choice(items)
+            title = base["title"].rstrip(".") + (" - sources" if rnd.random() < 0.5 else "")
+            items.append({"title": title, "url": base["url"] + "?utm_source=feed", "source": "syndicated"})
+        else:
+            title = f"{rnd.choice(subjects)} {rnd.choice(verbs)} as {' '.join(rnd.sample(vocab, 5))}"
+            items.append({"title": title, "url": f"https://news.example.com/story/{i}", "source": "wire"})
+    return items
+
+def _best(fn, *args, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(*args); best = min(best, time.perf_counter() - t0)
+    return best
+
+def run(sizes=(1_000, 5_000)):
+    results = []
+    batches = {}
+    for source, text in fixture_sources():
+        batches[source.name] = source.parse(text)
+        results.append({"case": f"parse:{source.name}", "items": len(batches[source.name]),
+                        "time_s": round(_best(source.parse, text), 5)})
+    stories = aggregate(batches)
+    results.append({"case": "aggregate:fixtures", "items": sum(len(b) for b in batches.values()),
+                    "stories": len(stories), "time_s": round(_best(aggregate, batches), 5)})
+    for n in sizes:
+        items = [normalize_item(it, it["source"]) for it in synthetic_items(n)]
+        clustered = cluster_items(items)
+        results.append({"case": "cluster:synthetic", "items": n, "stories": len(clustered),
+                        "time_s": round(_best(cluster_items, items), 4)})
+    return results
+
+if __name__ == "__main__":
+    sizes = tuple(int(x) for x in sys.argv[1:]) or (1_000, 5_000)
+    for r in run(sizes):
+        print(r)
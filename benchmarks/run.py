@@ -0,0 +1,152 @@
+"""
+Offline benchmark suite for the signal, news and DB hot paths. No network: MetaApi is a
+fake connection serving synthetic candles, scrapers parse the recorded pages in
+benchmarks/fixtures and the DB is a throwaway SQLite file.
+
+Run from the repo root:
+    python -m benchmarks.run                      # full suite, JSON to stdout
+    python -m benchmarks.run --quick --out a.json # smaller sizes, JSON to a file
+    python -m benchmarks.run --only engine,db
+    python -m benchmarks.run --compare a.json     # flag timings >20% slower than a.json
+"""
+import argparse, asyncio, json, os, platform, subprocess, sys, tempfile, time, zlib
+
+os.environ.setdefault("BOT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bot_bench_"), "bench.db"))
+from benchmarks import bench_classifier, bench_db, bench_engine, bench_news, bench_news_sources  # noqa: E402
+from services.trading_engine import TradingEngine  # noqa: E402
+from utils.bars import timeframe_seconds  # noqa: E402
+from utils.markdown import mdv2, with_footer  # noqa: E402
+
+class FakeConnection:
+    """Stands in for a MetaApi RPC connection: get_candles() serves synthetic bars ending now."""
+    def __init__(self, seed: int = 7, now: float = None):
+        self.seed = seed
+        self.now = time.time() if now is None else now
+        self.calls = 0
+        self._series = {}
+
+    def _bars(self, symbol: str, timeframe: str, n: int):
+        key = (symbol, timeframe)
+        if key not in self._series or len(self._series[key]) < n:
+            step = timeframe_seconds(timeframe)
+            start = 150.0 if "JPY" in symbol else 1.1
+            bars = bench_engine.synthetic_candles(n, seed=zlib.crc32(f"{symbol}|{timeframe}".encode()) + self.seed, start=start)
+            last_open = self.now - self.now % step
+            for i, b in enumerate(bars):
+                b["time"] = last_open - (n - 1 - i) * step
+            self._series[key] = bars
+        return self._series[key][-n:]
+
+    async def get_candles(self, symbol: str, timeframe: str, count: int = 500):
+        self.calls += 1
+        return self._bars(symbol, timeframe, count)
+
+SYMBOLS = ["EUR/USD", "GBP/USD", "USD/JPY", "AUD/USD", "USD/CAD", "NZD/USD", "EUR/JPY", "GBP/JPY"]
+
+def bench_analyze(rounds: int = 20):
+    """TradingEngine.analyze_and_signal per symbol: cold (empty candle cache) and warm (within the bar)."""
+    async def go():
+        conn = FakeConnection()
+        engine = TradingEngine()
+        cold = warm = 0.0
+        signals = 0
+        for _ in range(rounds):
+            engine.candles.invalidate()
+            t0 = time.perf_counter()
+            for s in SYMBOLS:
+                signals += bool(await engine.analyze_and_signal(conn, s))
+            cold += time.perf_counter() - t0
+            t0 = time.perf_counter()
+            for s in SYMBOLS:
+                await engine.analyze_and_signal(conn, s)
+            warm += time.perf_counter() - t0
+        n = rounds * len(SYMBOLS)
+        return [{"case": "analyze_and_signal", "calls": n, "cold_us": round(cold / n * 1e6, 1),
+                 "warm_us": round(warm / n * 1e6, 1), "signals": signals, "candle_fetches": conn.calls}]
+    return asyncio.run(go())
+
+SIGNAL_TEXT = ("🔥 NEW SIGNAL: EUR/USD\nDirection: BUY\nEntry: 1.08452\nTP1: 1.08752 (30 pips)\n"
+               "TP2: 1.09052 (60 pips)\nTP3: 1.09352 (90 pips)\nSL: 1.08052 (40 pips)")
+
+def bench_markdown(n: int = 20_000):
+    broadcast = (SIGNAL_TEXT + "\n[Risk] (1-2%) per trade; read the #rules! ") * 20
+    rows = []
+    for name, fn, text in (("mdv2_signal", mdv2, SIGNAL_TEXT), ("with_footer_signal", lambda t: with_footer(mdv2(t)), SIGNAL_TEXT),
+                           ("mdv2_broadcast_4k", mdv2, broadcast)):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn(text)
+        rows.append({"case": name, "chars": len(text), "calls": n, "us_per_call": round((time.perf_counter() - t0) / n * 1e6, 2)})
+    return rows
+
+def suites(quick: bool):
+    return {
+        "engine": lambda: bench_analyze(5 if quick else 20) + bench_engine.run((1_000, 10_000) if quick else (1_000, 10_000, 100_000)),
+        "scrapers": lambda: bench_news_sources.run((500,) if quick else (1_000, 5_000)),
+        "classifier": lambda: bench_classifier.run((1_000,) if quick else (1_000, 10_000)),
+        "news": lambda: bench_news.run(10_000 if quick else 100_000),
+        "markdown": lambda: bench_markdown(2_000 if quick else 20_000),
+        "db": lambda: bench_db.run(500 if quick else 2_000) + bench_db.run_hot_paths(10_000 if quick else 100_000),
+    }
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5).stdout.strip()
+    except Exception:
+        return ""
+
+def _is_timing(key: str) -> bool:
+    return key.endswith(("_s", "_us")) or key == "us_per_call"
+
+def compare(old: dict, new: dict, threshold: float = 0.2, min_delta_s: float = 0.0005):
+    """
+    Timing fields that got more than threshold slower, matched by suite and row position.
+    Wall-time (_s) differences under min_delta_s are timer noise on tiny cases and are
+    ignored; per-call (us) figures are already averaged over many calls.
+    """
+    out = []
+    for suite, rows in new["results"].items():
+        for i, row in enumerate(rows):
+            prev = old.get("results", {}).get(suite, [])
+            if i >= len(prev):
+                continue
+            for k, v in row.items():
+                p = prev[i].get(k)
+                if not (_is_timing(k) and isinstance(v, (int, float)) and isinstance(p, (int, float)) and p > 0):
+                    continue
+                if k.endswith("_s") and v - p < min_delta_s:
+                    continue
+                if v > p * (1 + threshold):
+                    out.append({"suite": suite, "row": i, "field": k, "before": p, "after": v, "ratio": round(v / p, 2)})
+    return out
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--quick", action="store_true", help="smaller sizes (CI smoke run)")
+    ap.add_argument("--only", default="", help="comma-separated suites: " + ",".join(suites(True)))
+    ap.add_argument("--out", help="write the JSON report here instead of stdout")
+    ap.add_argument("--compare", help="previous JSON report to check for regressions")
+    args = ap.parse_args(argv)
+
+    selected = [s for s in args.only.split(",") if s] or list(suites(args.quick))
+    table = suites(args.quick)
+    report = {"meta": {"commit": _git_commit(), "python": platform.python_version(), "platform": platform.platform(),
+                       "quick": args.quick, "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+              "results": {}}
+    for name in selected:
+        t0 = time.perf_counter()
+        report["results"][name] = table[name]()
+        print(f"[bench] {name}: {time.perf_counter() - t0:.1f}s", file=sys.stderr)
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            report["regressions"] = compare(json.load(f), report)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return 1 if report.get("regressions") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -18,9 +18,103 @@ MASTER_MT5_PASSWORD = os.getenv("MASTER_MT5_PASSWORD")
 METAAPI_TOKEN = os.getenv("METAAPI_TOKEN")
 JUSTMARKETS_REF_LINK = os.getenv("JUSTMARKETS_REF_LINK")
 
+# Master MetaApi connection health check / reconnect tuning (seconds)
+METAAPI_HEALTH_INTERVAL = float(os.getenv("METAAPI_HEALTH_INTERVAL", "30"))
+METAAPI_RECONNECT_MAX_BACKOFF = float(os.getenv("METAAPI_RECONNECT_MAX_BACKOFF", "60"))
+
+# Background market scanner (precomputed signal board)
+SCANNER_ENABLED = os.getenv("SCANNER_ENABLED", "1") == "1"
+SCANNER_CONCURRENCY = int(os.getenv("SCANNER_CONCURRENCY", "4"))
+
 DATA_DIR = os.path.join(os.getcwd(), "data")
 SCREENSHOT_DIR = os.path.join(DATA_DIR, "screenshots")
 
+# Async HTTP for the scrapers (URLs overridable, e.g. to point at a local stand-in)
+REUTERS_FX_URL = os.getenv("REUTERS_FX_URL", "https://www.reuters.com/markets/currencies/")
+FOREXFACTORY_CALENDAR_URL = os.getenv("FOREXFACTORY_CALENDAR_URL", "https://www.forexfactory.com/calendar")
+FOREXFACTORY_TZ = os.getenv("FOREXFACTORY_TZ", "America/New_York")  # timezone the calendar page is rendered in
+HTTP_CACHE_TTL = float(os.getenv("HTTP_CACHE_TTL", "60"))
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "15"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", "20"))
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))  # extra tries after a timeout / connection error / 5xx
+
+# High-impact news lockdown window around each event, per instrument currency
+LOCKDOWN_BEFORE_MIN = int(os.getenv("LOCKDOWN_BEFORE_MIN", "30"))
+LOCKDOWN_AFTER_MIN = int(os.getenv("LOCKDOWN_AFTER_MIN", "30"))
+
+# News sources: enabled plugins, extra RSS/Atom feeds as "name=url,name=url", per-source timeout (s)
+NEWS_SOURCES = [x.strip() for x in os.getenv("NEWS_SOURCES", "reuters,forexfactory,rss").split(",") if x.strip()]
+NEWS_RSS_FEEDS = [tuple(x.strip().split("=", 1)) for x in os.getenv("NEWS_RSS_FEEDS", "").split(",") if "=" in x]
+NEWS_SOURCE_TIMEOUT = float(os.getenv("NEWS_SOURCE_TIMEOUT", "10"))
+NEWS_SIMHASH_DISTANCE = int(os.getenv("NEWS_SIMHASH_DISTANCE", "3"))  # max differing bits for "same story"
+NEWS_TITLE_CONTAINMENT = float(os.getenv("NEWS_TITLE_CONTAINMENT", "0.8"))  # share of the shorter title's words
+
+# Async DB access: reader threads and max queued writes applied per transaction
+DB_READ_THREADS = int(os.getenv("DB_READ_THREADS", "4"))
+DB_WRITE_BATCH = int(os.getenv("DB_WRITE_BATCH", "64"))
+
+# How updates arrive: "polling" (default) or "webhook" (local aiohttp server behind a TLS proxy)
+BOT_MODE = os.getenv("BOT_MODE", "polling").lower()
+WEBHOOK_HOST = os.getenv("WEBHOOK_HOST", "0.0.0.0")
+WEBHOOK_PORT = int(os.getenv("WEBHOOK_PORT", "8443"))
+WEBHOOK_PATH = os.getenv("WEBHOOK_PATH", "/telegram")
+WEBHOOK_SECRET = os.getenv("WEBHOOK_SECRET", "")  # echoed by Telegram in X-Telegram-Bot-Api-Secret-Token
+WEBHOOK_PUBLIC_URL = os.getenv("WEBHOOK_PUBLIC_URL", "")  # if set, setWebhook is called on startup
+WEBHOOK_MAX_QUEUE = int(os.getenv("WEBHOOK_MAX_QUEUE", "1000"))
+
+# Shared state for running several worker processes: "memory" (single process) or "sqlite"
+# (file shared by all workers on the host), scheduler leader lease TTL (s), and whether
+# workers share the webhook port via SO_REUSEPORT
+STATE_BACKEND = os.getenv("STATE_BACKEND", "memory").lower()
+STATE_DB_PATH = os.getenv("STATE_DB_PATH", os.path.join(DATA_DIR, "state.db"))
+LEADER_LEASE_TTL = float(os.getenv("LEADER_LEASE_TTL", "30"))
+WEBHOOK_REUSE_PORT = os.getenv("WEBHOOK_REUSE_PORT", "0") == "1"
+CONVERSATION_TTL = float(os.getenv("CONVERSATION_TTL", "3600"))  # pending "send me X" steps expire after (s)
+
+# Scheduler: calendar scrape (cron, UTC), news push interval (s), follower calendar reload
+# interval (s) and the max random delay added to each run (s)
+CALENDAR_REFRESH_CRON = os.getenv("CALENDAR_REFRESH_CRON", "*/15 * * * *")
+NEWS_PUSH_INTERVAL = float(os.getenv("NEWS_PUSH_INTERVAL", "900"))
+CALENDAR_RELOAD_INTERVAL = float(os.getenv("CALENDAR_RELOAD_INTERVAL", "300"))
+SCHEDULER_JITTER = float(os.getenv("SCHEDULER_JITTER", "20"))
+
+# Update handling: updates processed in parallel (same-user updates stay ordered)
+UPDATE_CONCURRENCY = int(os.getenv("UPDATE_CONCURRENCY", "64"))
+
+# Signal analysis queue: worker pool, hard queue cap, queue depth at which free requests
+# are turned away, and how long (s) each tier waits for a result
+ANALYSIS_WORKERS = int(os.getenv("ANALYSIS_WORKERS", "4"))
+ANALYSIS_QUEUE_MAX = int(os.getenv("ANALYSIS_QUEUE_MAX", "200"))
+ANALYSIS_FREE_SHED_AT = int(os.getenv("ANALYSIS_FREE_SHED_AT", "20"))
+ANALYSIS_DEADLINE_PREMIUM = float(os.getenv("ANALYSIS_DEADLINE_PREMIUM", "120"))
+ANALYSIS_DEADLINE_FREE = float(os.getenv("ANALYSIS_DEADLINE_FREE", "60"))
+
+# Broadcasts: global send rate (Telegram allows ~30 msg/s per bot) and parallel sends
+BROADCAST_RATE = float(os.getenv("BROADCAST_RATE", "25"))
+BROADCAST_CONCURRENCY = int(os.getenv("BROADCAST_CONCURRENCY", "20"))
+
+# News pushes: how long a headline counts as "seen", digest size and parallel sends
+NEWS_SEEN_TTL_HOURS = float(os.getenv("NEWS_SEEN_TTL_HOURS", "72"))
+NEWS_DIGEST_MAX_ITEMS = int(os.getenv("NEWS_DIGEST_MAX_ITEMS", "5"))
+NEWS_SEND_CONCURRENCY = int(os.getenv("NEWS_SEND_CONCURRENCY", "10"))
+
+# Pooled TradingView browser ({symbol}/{interval} are filled per capture)
+TV_CHART_URL = os.getenv("TV_CHART_URL", "https://www.tradingview.com/chart/?symbol=FX_IDC:{symbol}&interval={interval}")
+TV_LOGIN_URL = os.getenv("TV_LOGIN_URL", "https://www.tradingview.com/#signin")
+TV_CHART_SELECTOR = os.getenv("TV_CHART_SELECTOR", ".chart-container")
+TV_STATE_PATH = os.getenv("TV_STATE_PATH", os.path.join(DATA_DIR, "tv_state.json"))
+TV_POOL_SIZE = int(os.getenv("TV_POOL_SIZE", "2"))
+TV_MAX_QUEUE = int(os.getenv("TV_MAX_QUEUE", "8"))
+TV_CAPTURE_TIMEOUT = float(os.getenv("TV_CAPTURE_TIMEOUT", "15"))
+
+# Chart snapshot source: "tradingview" (browser screenshot) or "render" (local, from cached candles)
+CHART_SOURCE = os.getenv("CHART_SOURCE", "tradingview").lower()
+
+# Chart media pipeline: re-encode format/quality and LRU size cap for SCREENSHOT_DIR
+MEDIA_FORMAT = os.getenv("MEDIA_FORMAT", "JPEG").upper()
+MEDIA_QUALITY = int(os.getenv("MEDIA_QUALITY", "80"))
+SCREENSHOT_DIR_MAX_MB = float(os.getenv("SCREENSHOT_DIR_MAX_MB", "50"))
+
 # Safety checks (no crashes; logged by services.logger)
 def sanity_check():
     missing = []
@@ -9,7 +9,12 @@ from telegram.ext import (
     Application, ApplicationBuilder, CommandHandler, ContextTypes, CallbackQueryHandler, MessageHandler, filters, ChatMemberHandler
 )
 
-from config import BOT_TOKEN, ADMIN_IDS, APP_TZ, JUSTMARKETS_REF_LINK, SCREENSHOT_DIR, sanity_check
+from config import (
+    BOT_TOKEN, ADMIN_IDS, APP_TZ, JUSTMARKETS_REF_LINK, SCREENSHOT_DIR, SCANNER_ENABLED, SCANNER_CONCURRENCY, CHART_SOURCE, NEWS_SEND_CONCURRENCY, UPDATE_CONCURRENCY, sanity_check,
+    ANALYSIS_WORKERS, ANALYSIS_QUEUE_MAX, ANALYSIS_FREE_SHED_AT, ANALYSIS_DEADLINE_PREMIUM, ANALYSIS_DEADLINE_FREE,
+    BOT_MODE, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET, WEBHOOK_PUBLIC_URL, WEBHOOK_MAX_QUEUE, WEBHOOK_REUSE_PORT,
+    CONVERSATION_TTL, CALENDAR_REFRESH_CRON, NEWS_PUSH_INTERVAL, CALENDAR_RELOAD_INTERVAL, SCHEDULER_JITTER
+)
 from utils.markdown import mdv2, with_footer
 from utils.constants import (
     TERMS_AND_CONDITIONS, GENERAL_RISK, HIGH_IMPACT_CAUTION, POST_NEWS_WAITING,
@@ -18,17 +23,49 @@ from utils.constants import (
 )
 from utils.timezone import now_tz
 from services.logger import get_logger
-from services.db import init_db, upsert_user, get_user, set_user_tier, list_users, set_user_news_prefs, toggle_alert, alert_enabled, mark_feedback_ts
-from services.forexfactory_scraper import upcoming_high_impact_within
-from services.reuters_scraper import fetch_reuters_fx_headlines
-from services.news_router import build_user_delivery
-from services.tradingview_client import screenshot_chart
+from services.db import init_db, user_cache_stats, set_news_watermarks
+from services.db_async import (
+    upsert_user, get_user, set_user_tier, list_users, set_user_news_prefs, toggle_alert, alert_enabled,
+    mark_feedback_ts, set_metaapi_token, add_payment, run_read, run_write, flush as flush_db_writes, stats as db_write_stats
+)
+from services.state import state, leader
+from services.economic_calendar import timeline as calendar, load_calendar, refresh_calendar
+from services.lockdown import LockdownScheduler
+from services.news_sources import news_hub
+from services.http_client import fetcher
+from services.news_router import stamp_headlines, plan_digests, format_digest
+from services.tradingview_client import chart_browser
 from services.signal_handler import SignalHandler
+from services.trading_engine import AnalysisError
+from services.metaapi_client import master
+from services.market_scanner import SignalBoard, MarketScanner, BOARD_TIMEFRAME
+from services.single_flight import SingleFlight
+from services.media_pipeline import prepare_chart_image, chart_file_ids
+from services.broadcaster import BroadcastEngine, send_many
+from services.update_processor import OrderedUpdateProcessor
+from services.analysis_queue import AnalysisQueue, QueueBusy, DeadlineExceeded
+from services.webhook_server import WebhookServer, run_webhook
+from services.scheduler import Scheduler, Interval, BarAligned, Cron
+from utils.bars import bar_open, next_bar_close
 
 logger = get_logger("bot")
 signal_handler = SignalHandler()
-
-LOCKDOWN = False
+# Every worker reads the board; only the scheduler leader scans and publishes it
+signal_board = SignalBoard(state)
+scanner = MarketScanner(signal_handler, signal_board, concurrency=SCANNER_CONCURRENCY)
+# Concurrent "Market Signal" presses for the same (instrument, M15 bar) share one analysis + screenshot
+signal_flight = SingleFlight()
+# Users are served in parallel, each user's own updates in order
+update_processor = OrderedUpdateProcessor(UPDATE_CONCURRENCY)
+# Live analyses run on a bounded worker pool, premium first; free requests are shed when saturated
+analysis_queue = AnalysisQueue(ANALYSIS_WORKERS, ANALYSIS_QUEUE_MAX, ANALYSIS_FREE_SHED_AT,
+                               {"premium": ANALYSIS_DEADLINE_PREMIUM, "free": ANALYSIS_DEADLINE_FREE})
+
+lockdown = LockdownScheduler(calendar)
+# Background jobs (scrapes, pushes, scans), each on its own cadence; see schedule_jobs()
+scheduler = Scheduler()
+broadcaster = None  # BroadcastEngine, created once the bot exists
+webhook_server = None  # WebhookServer when BOT_MODE=webhook
 
 def main_menu_kb(is_admin: bool=False):
     rows = [
@@ -106,7 +143,7 @@ def admin_menu_kb():
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         u = update.effective_user
-        upsert_user(u.id, u.username or "", f"{u.first_name or ''} {u.last_name or ''}".strip())
+        await upsert_user(u.id, u.username or "", f"{u.first_name or ''} {u.last_name or ''}".strip())
         kb = InlineKeyboardMarkup([[InlineKeyboardButton("✍️ Register", callback_data="register")]])
         text = with_footer(mdv2("Welcome! Press the button below to register."))
         await update.effective_message.reply_text(text, reply_markup=kb, parse_mode=ParseMode.MARKDOWN_V2, protect_content=True, disable_web_page_preview=True)
@@ -117,7 +154,7 @@ async def register_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         q = update.callback_query; await q.answer()
         u = q.from_user
-        upsert_user(u.id, u.username or "", f"{u.first_name or ''} {u.last_name or ''}".strip())
+        await upsert_user(u.id, u.username or "", f"{u.first_name or ''} {u.last_name or ''}".strip())
         # Post-registration menu
         kb = InlineKeyboardMarkup([
             [InlineKeyboardButton("🔔 Subscribe to General Updates", callback_data="sub_updates")],
@@ -138,7 +175,7 @@ async def to_main(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         q = update.callback_query; await q.answer()
         u = q.from_user
-        row = get_user(u.id)
+        row = await get_user(u.id)
         kb = main_menu_kb(is_admin=(u.id in ADMIN_IDS))
         text = with_footer(mdv2("Main Menu"))
         await q.edit_message_text(
@@ -165,6 +202,51 @@ async def post_registration_buttons(update: Update, context: ContextTypes.DEFAUL
     except Exception as e:
         logger.exception("post_registration_buttons error: %s", e)
 
+async def _analyze_with_snapshot(instrument: str, bar: float):
+    # Precomputed board first; live analysis only when it is stale. A failed analysis raises
+    # AnalysisError and is never published, so the next request retries it.
+    fresh, sig = await signal_board.lookup_shared(instrument)
+    if not fresh:
+        sig = await signal_handler.prepare_signal(instrument)
+        await signal_board.publish_shared(instrument, sig)
+    if not sig:
+        return None, ""
+    shot = await signal_handler.chart_snapshot(instrument, sig)
+    # Crop + compress once per bar; every user of this bar gets the same file (and file_id)
+    stem = f"{instrument.replace('/', '_').replace(' ', '')}_15_{int(bar)}"
+    shot = await prepare_chart_image(shot, stem)
+    return sig, shot
+
+def _complete(result) -> bool:
+    # A signal whose chart capture failed is served to the callers already waiting but not
+    # cached for the bar, so the next press retries the capture; "no setup" is final
+    sig, shot = result
+    return sig is None or bool(shot)
+
+async def signal_for(instrument: str, tier: str = "premium", on_queued=None):
+    """
+    (signal, chart path, chart key) for the current M15 bar of instrument. A result
+    already computed for this bar is returned at once; otherwise the analysis goes
+    through the priority queue (QueueBusy / DeadlineExceeded / AnalysisError propagate) and
+    on_queued(ticket) is awaited so the caller can show the queue position.
+    """
+    now = time.time()
+    bar = bar_open(now, BOARD_TIMEFRAME)
+    key = (instrument, bar)
+    cached, result = signal_flight.peek(key)
+    if not cached:
+        expires_at = next_bar_close(now, BOARD_TIMEFRAME)
+        analyze = lambda: signal_flight.do(key, lambda: _analyze_with_snapshot(instrument, bar), expires_at, _complete)
+        ticket = analysis_queue.submit(key, analyze, tier)
+        if on_queued:
+            await on_queued(ticket)
+        result = await ticket.result()
+    sig, shot = result
+    return sig, shot, (instrument, "15", bar)
+
+def _analyzing_text(position: int) -> str:
+    return "Analyzing..." if position <= 1 else f"Analyzing... (position {position} in queue)"
+
 # Main Menu routing
 async def main_menu_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
@@ -185,37 +267,64 @@ async def main_menu_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
             await q.edit_message_text(with_footer(mdv2(f"{cat}")), reply_markup=instruments_kb(cat), parse_mode=ParseMode.MARKDOWN_V2)
         elif data.startswith("inst::"):
             instrument = data.split("::",1)[1]
-            alerts_on = alert_enabled(u.id, instrument)
+            alerts_on = await alert_enabled(u.id, instrument)
             await q.edit_message_text(with_footer(mdv2(f"{instrument}")), reply_markup=instrument_actions_kb(instrument, alerts_on), parse_mode=ParseMode.MARKDOWN_V2)
         elif data.startswith("act::"):
             _, action, instrument = data.split("::", 2)
             if action == "toggle":
-                new_state = toggle_alert(u.id, instrument)
+                new_state = await toggle_alert(u.id, instrument)
                 await q.edit_message_reply_markup(reply_markup=instrument_actions_kb(instrument, new_state))
             elif action == "signal":
-                # High-impact news lockdown
-                global LOCKDOWN
-                if LOCKDOWN or upcoming_high_impact_within(30):
-                    LOCKDOWN = True
+                # High-impact news lockdown: only pairs holding an affected currency are blocked
+                if lockdown.is_locked(instrument):
                     await q.message.reply_text(with_footer(mdv2(HIGH_IMPACT_CAUTION)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
                     await q.message.reply_text(with_footer(mdv2(POST_NEWS_WAITING)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
                     return
                 # Free tier: 1 free signal / day
-                urow = get_user(u.id)
+                urow = await get_user(u.id)
                 if urow and urow["tier"] == "free":
                     if not await signal_handler.free_signal_available(u.id):
                         await q.message.reply_text(with_footer(mdv2("Free signal limit reached for today.")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
                         return
-                msg = await q.message.reply_text(with_footer(mdv2("Analyzing...")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
-                sig = await signal_handler.prepare_signal(instrument)
+                tier = urow["tier"] if urow else "free"
+                msg = None
+
+                async def show_queue(ticket):
+                    nonlocal msg
+                    msg = await q.message.reply_text(with_footer(mdv2(_analyzing_text(ticket.position))), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+                    shown = [ticket.position]
+
+                    async def moved(position):
+                        if position != shown[0] and (position > 1 or shown[0] > 1):
+                            shown[0] = position
+                            await msg.edit_text(with_footer(mdv2(_analyzing_text(position))), parse_mode=ParseMode.MARKDOWN_V2)
+                    ticket.on_position(moved)
+
+                async def answer(text):
+                    if msg:
+                        await msg.edit_text(with_footer(mdv2(text)), parse_mode=ParseMode.MARKDOWN_V2)
+                    else:
+                        await q.message.reply_text(with_footer(mdv2(text)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+
+                try:
+                    sig, shot, chart_key = await signal_for(instrument, tier, show_queue)
+                except QueueBusy:
+                    await answer("The analysis desk is busy right now. Please try again in a minute.")
+                    return
+                except DeadlineExceeded:
+                    await answer("Analysis is taking longer than usual. Please try again shortly.")
+                    return
+                except AnalysisError as e:
+                    logger.warning("Signal analysis failed for %s: %s", instrument, e)
+                    await answer("Market data is unavailable right now. Please try again shortly.")
+                    return
                 if not sig:
-                    await msg.edit_text(with_footer(mdv2("No high-probability setup right now. Check back later.")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+                    await answer("No high-probability setup right now. Check back later.")
                     return
                 # Screenshot first
-                shot = await screenshot_chart(instrument.replace(" ", "").replace("_","/"), timeframe="15")
                 try:
-                    if shot and os.path.exists(shot):
-                        await q.message.reply_photo(photo=open(shot, "rb"), caption=with_footer(mdv2("Chart Snapshot")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+                    if shot:
+                        await chart_file_ids.reply_photo(q.message, chart_key, shot, caption=with_footer(mdv2("Chart Snapshot")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
                 except Exception as e:
                     logger.exception("screenshot send failed: %s", e)
                 # Signal message
@@ -245,9 +354,9 @@ async def account_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 "Please paste your MetaApi Token here."
             )
             await q.message.reply_text(with_footer(mdv2(text)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
-            context.user_data["awaiting_metaapi_token"] = True
+            await state.set(f"conv:{q.from_user.id}", "awaiting_metaapi_token", CONVERSATION_TTL)
         elif data == "acc_status":
-            urow = get_user(q.from_user.id)
+            urow = await get_user(q.from_user.id)
             tier = urow["tier"] if urow else "free"
             await q.message.reply_text(with_footer(mdv2(f"Your status: {tier}")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
         elif data == "menu_premium":
@@ -274,7 +383,7 @@ async def news_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         q = update.callback_query; await q.answer()
         data = q.data
-        urow = get_user(q.from_user.id)
+        urow = await get_user(q.from_user.id)
         if data == "menu_news":
             await q.edit_message_text(with_footer(mdv2("Market News Preferences")), reply_markup=news_menu_kb(urow), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
         elif data in ["news_geo","news_cb","news_cpi","news_all"]:
@@ -285,8 +394,8 @@ async def news_router(update: Update, context: ContextTypes.DEFAULT_TYPE):
             if data == "news_all":
                 val = 0 if (geo and cb and cpi) else 1
                 geo, cb, cpi = val, val, val
-            set_user_news_prefs(q.from_user.id, geo, cb, cpi)
-            urow = get_user(q.from_user.id)
+            await set_user_news_prefs(q.from_user.id, geo, cb, cpi)
+            urow = await get_user(q.from_user.id)
             await q.edit_message_reply_markup(reply_markup=news_menu_kb(urow))
     except Exception as e:
         logger.exception("news_router error: %s", e)
@@ -295,14 +404,12 @@ async def on_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
         u = update.effective_user
         text = (update.message.text or "").strip()
-        if context.user_data.get("awaiting_metaapi_token"):
+        # Pending conversation step lives in shared state: the reply may reach another worker
+        step = await state.get(f"conv:{u.id}")
+        if step == "awaiting_metaapi_token":
             # Store securely
-            from services.db import _connect, _lock
-            with _lock:
-                conn = _connect()
-                conn.execute("UPDATE users SET metaapi_token=?, tier=?, premium_approved=? WHERE user_id=?", (text, "premium", 1, u.id))
-                conn.commit(); conn.close()
-            context.user_data["awaiting_metaapi_token"] = False
+            await set_metaapi_token(u.id, text)
+            await state.delete(f"conv:{u.id}")
             msg = "✅ Success! Your account token has been received and is now securely encrypted. Your account is linked. The bot will now begin monitoring for migosconcept$ opportunities to manage your account as per the agreed Terms & Conditions."
             await update.message.reply_text(with_footer(mdv2(msg)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
             return
@@ -310,29 +417,22 @@ async def on_message(update: Update, context: ContextTypes.DEFAULT_TYPE):
         # Upload payment screenshot (premium one-time fee)
         if update.message.photo:
             file_id = update.message.photo[-1].file_id
-            from services.db import _connect, _lock
-            with _lock:
-                conn = _connect()
-                conn.execute("INSERT INTO payments(user_id, method, screenshot_file_id, created_at) VALUES (?, ?, ?, datetime('now'))", (u.id, "upload", file_id))
-                conn.commit(); conn.close()
+            await add_payment(u.id, "upload", file_id)
             await update.message.reply_text(with_footer(mdv2("Payment screenshot received. Await admin approval.")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
             return
 
         # Feedback (rate limited 60 sec)
-        if "feedback_mode" in context.user_data and context.user_data["feedback_mode"]:
-            now = int(time.time())
-            urow = get_user(u.id)
-            last = urow["feedback_last_ts"] if urow else 0
-            if now - last < 60:
+        if step == "feedback_mode":
+            if not await state.allow(f"feedback:{u.id}", 1, 60):
                 warn = f"Dear {u.first_name}, You are sending feedback requests too quickly. To prevent spam, please wait a moment before trying again. This is an automated message to ensure fair usage for all users."
                 await update.message.reply_text(with_footer(mdv2(warn)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
                 return
-            mark_feedback_ts(u.id, now)
+            await mark_feedback_ts(u.id, int(time.time()))
             # Forward to owner (first admin)
             await context.bot.send_message(chat_id=ADMIN_IDS[0], text=with_footer(mdv2(f"Feedback from {u.id} @{u.username or ''}: {text}")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
             confirm = f"Thank you, {u.first_name}. Your message has been successfully delivered to the owner. We appreciate you taking the time to help us improve."
             await update.message.reply_text(with_footer(mdv2(confirm)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
-            context.user_data["feedback_mode"] = False
+            await state.delete(f"conv:{u.id}")
             return
 
     except Exception as e:
@@ -343,7 +443,7 @@ async def menu_feedback(update: Update, context: ContextTypes.DEFAULT_TYPE):
         q = update.callback_query; await q.answer()
         prompt = f"Dear {q.from_user.first_name}, Your feedback is vital for improving the 𝕸𝕴𝕲𝕺𝕾 𝕭.™ experience. Please type and send your message now. Whether it's a suggestion, a compliment, or a concern, I will forward it directly to the owner for review. Please send your entire feedback in a single message."
         await q.message.reply_text(with_footer(mdv2(prompt)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
-        context.user_data["feedback_mode"] = True
+        await state.set(f"conv:{q.from_user.id}", "feedback_mode", CONVERSATION_TTL)
     except Exception as e:
         logger.exception("menu_feedback error: %s", e)
 
@@ -353,7 +453,7 @@ async def cmd_users(update: Update, context: ContextTypes.DEFAULT_TYPE):
         await update.message.reply_text(with_footer(mdv2(UNAUTHORIZED_ADMIN)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
         return
     try:
-        rows = list_users()
+        rows = await list_users()
         lines = [f"{r['user_id']} @{r['username'] or ''} {r['full_name']} | {r['tier']} | approved={r['premium_approved']}" for r in rows]
         text = "Registered Users:\n" + "\n".join(lines) if lines else "No users."
         await update.message.reply_text(with_footer(mdv2(text)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
@@ -368,7 +468,7 @@ async def cmd_approve(update: Update, context: ContextTypes.DEFAULT_TYPE):
         if not context.args:
             await update.message.reply_text(with_footer(mdv2("Usage: /approve_payment <user_id>")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True); return
         user_id = int(context.args[0])
-        set_user_tier(user_id, "premium", 1)
+        await set_user_tier(user_id, "premium", 1)
         await update.message.reply_text(with_footer(mdv2(f"User {user_id} upgraded to Premium.")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
     except Exception as e:
         logger.exception("/approve_payment error: %s", e)
@@ -381,15 +481,46 @@ async def cmd_broadcast(update: Update, context: ContextTypes.DEFAULT_TYPE):
         msg = " ".join(context.args) if context.args else ""
         if not msg:
             await update.message.reply_text(with_footer(mdv2("Usage: /broadcast <message>")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True); return
-        for r in list_users():
-            try:
-                await context.bot.send_message(r["user_id"], with_footer(mdv2(msg)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
-            except Exception as e:
-                logger.exception("Broadcast to %s failed: %s", r["user_id"], e)
-        await update.message.reply_text(with_footer(mdv2("Broadcast completed.")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+        # Runs in the background; this message is edited with live progress
+        status = await update.message.reply_text(with_footer(mdv2("Broadcast queued.")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+        global broadcaster
+        if broadcaster is None:
+            broadcaster = BroadcastEngine(context.bot, state=state, owner=leader.owner)
+        job_id = await broadcaster.start(msg, update.effective_user.id, status.chat_id, status.message_id)
+        logger.info("Broadcast #%s started by %s", job_id, update.effective_user.id)
     except Exception as e:
         logger.exception("/broadcast error: %s", e)
 
+async def cmd_stats(update: Update, context: ContextTypes.DEFAULT_TYPE):
+    if update.effective_user.id not in ADMIN_IDS:
+        await update.message.reply_text(with_footer(mdv2(UNAUTHORIZED_ADMIN)), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+        return
+    try:
+        lines = [
+            f"Updates: {update_processor.stats(context.application.update_queue)}",
+            f"Analysis queue: {analysis_queue.stats()}",
+            f"Webhook: {webhook_server.stats() if webhook_server else 'polling'}",
+            f"Leader: {leader.stats()}",
+            f"Scheduler: {scheduler.stats()}",
+            f"State: {state.stats()}",
+            f"MetaApi: {master.stats()}",
+            f"Candle cache: {signal_handler.engine.candles.stats()}",
+            f"Signal board: {signal_board.stats()}",
+            f"Signal coalescing: {signal_flight.stats()}",
+            f"Chart browser: {chart_browser.stats()}",
+            f"Chart file_ids: {chart_file_ids.stats()}",
+            f"DB writes: {db_write_stats()}",
+            f"User cache: {user_cache_stats()}",
+            f"HTTP: {fetcher.stats()}",
+            f"News sources: {news_hub.stats()}",
+            f"Calendar: {calendar.stats()}",
+            f"Lockdown: {lockdown.stats()}",
+            f"Broadcasts: {broadcaster.stats() if broadcaster else {}}",
+        ]
+        await update.message.reply_text(with_footer(mdv2("\n".join(lines))), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+    except Exception as e:
+        logger.exception("/stats error: %s", e)
+
 # Group welcome
 async def on_member(update: Update, context: ContextTypes.DEFAULT_TYPE):
     try:
@@ -412,44 +543,83 @@ async def cmd_weekly_report(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception as e:
         logger.exception("/weekly_report error: %s", e)
 
-# Periodic tasks: lockdown toggle & news pushing
-async def scheduler_tick(app: Application):
-    global LOCKDOWN
-    try:
-        LOCKDOWN = upcoming_high_impact_within(30)
-        if LOCKDOWN:
-            logger.info("High-impact lockdown active.")
-        # Push personalized Reuters news
-        headlines = fetch_reuters_fx_headlines()
-        delivery = build_user_delivery(headlines)
-        for uid, items in delivery.items():
-            for h in items[:5]:
-                try:
-                    await app.bot.send_message(uid, with_footer(mdv2(f"{h['title']}\n{h['url']}")), parse_mode=ParseMode.MARKDOWN_V2, protect_content=True, disable_web_page_preview=False)
-                except Exception as e:
-                    logger.exception("News push to %s failed: %s", uid, e)
-    except Exception as e:
-        logger.exception("scheduler_tick error: %s", e)
-
-async def run_scheduler(app: Application):
-    while True:
-        await scheduler_tick(app)
-        await asyncio.sleep(900)  # every 15 minutes
+# Periodic jobs. Exceptions and timeouts are handled (and counted) by the scheduler.
+async def refresh_lockdown():
+    # Lockdown windows are timer-driven; this job only refreshes the calendar they come from
+    if await refresh_calendar():
+        lockdown.rebuild()
+
+async def reload_lockdown():
+    # Non-leaders don't scrape; they re-read the calendar the leader stored to keep their own lockdown timers current
+    await run_read(load_calendar)
+    lockdown.rebuild()
+
+async def push_news(app: Application):
+    # Push personalized news: one digest per user, one item per story, only stories they haven't had
+    headlines = await news_hub.collect()
+    stamped = await run_write(stamp_headlines, headlines)
+    plan = await run_read(plan_digests, stamped)
+    messages = {uid: with_footer(mdv2(format_digest(items))) for uid, (items, _) in plan.items()}
+    delivered = await send_many(app.bot, messages, NEWS_SEND_CONCURRENCY, protect_content=True, disable_web_page_preview=False)
+    await run_write(set_news_watermarks, {uid: plan[uid][1] for uid in delivered})
+    logger.info("News push: %d headlines, %d digests delivered", len(stamped), len(delivered))
+
+async def resume_broadcasts():
+    # After a failover, or once a dead worker's job lease lapses: pick up running broadcasts nobody is sending
+    if broadcaster is not None:
+        await broadcaster.resume_unfinished()
+
+def schedule_jobs(app: Application):
+    is_leader = lambda: leader.is_leader
+    is_follower = lambda: not leader.is_leader
+    scheduler.add("calendar", refresh_lockdown, Cron(CALENDAR_REFRESH_CRON), timeout=120,
+                  jitter=SCHEDULER_JITTER, run_at_start=True, guard=is_leader)
+    scheduler.add("calendar_reload", reload_lockdown, Interval(CALENDAR_RELOAD_INTERVAL), timeout=60, guard=is_follower)
+    scheduler.add("news", lambda: push_news(app), Interval(NEWS_PUSH_INTERVAL), timeout=600,
+                  jitter=SCHEDULER_JITTER, run_at_start=True, guard=is_leader)
+    scheduler.add("state_purge", state.purge, Interval(3600), timeout=60, guard=is_leader)
+    scheduler.add("broadcast_resume", resume_broadcasts, Interval(60), timeout=60, guard=is_leader)
+    if SCANNER_ENABLED:
+        # Just after each M15 close so the closed bar is available
+        scheduler.add("scan", scanner.scan_once, BarAligned(BOARD_TIMEFRAME, scanner.settle_delay),
+                      timeout=600, run_at_start=True, guard=is_leader)
 
 async def on_error(update: object, context: ContextTypes.DEFAULT_TYPE):
     logger.exception("Unhandled error: %s", context.error)
 
 async def on_ready(app: Application):
     logger.info("Bot started. Sanity missing keys: %s", sanity_check())
+    # Settle this worker's role before any singleton job (scrapes, pushes, scans) starts
+    await leader.start()
+    logger.info("Scheduler leader: %s", leader.stats())
+    # Arm lockdown timers from the calendar stored by previous runs
+    lockdown.rebuild()
+    # Warm the shared master MetaApi connection before the first signal request
+    await master.start()
+    logger.info("Master MetaApi connection: %s", master.stats())
+    if CHART_SOURCE == "tradingview":
+        await chart_browser.start()
+
+async def post_init(app: Application):
+    # Bot is initialized here; the leader picks up broadcasts interrupted by a restart
+    # (and keeps doing so from the broadcast_resume job, e.g. after a failover)
+    global broadcaster
+    if broadcaster is None:
+        broadcaster = BroadcastEngine(app.bot, state=state, owner=leader.owner)
+    if leader.is_leader:
+        await broadcaster.resume_unfinished()
 
 def build_app() -> Application:
     init_db()
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
+    load_calendar()
+    application = (ApplicationBuilder().token(BOT_TOKEN).concurrent_updates(update_processor)
+                   .post_init(post_init).build())
     application.add_handler(CommandHandler("start", start))
     application.add_handler(CommandHandler("weekly_report", cmd_weekly_report))
     application.add_handler(CommandHandler("users", cmd_users))
     application.add_handler(CommandHandler("approve_payment", cmd_approve))
     application.add_handler(CommandHandler("broadcast", cmd_broadcast))
+    application.add_handler(CommandHandler("stats", cmd_stats))
     application.add_handler(CallbackQueryHandler(register_cb, pattern="^register$"))
     application.add_handler(CallbackQueryHandler(post_registration_buttons, pattern="^(terms|disclaimer|sub_updates|to_main)$"))
     application.add_handler(CallbackQueryHandler(main_menu_router, pattern="^(menu_signals|sig_.*|inst::.*|act::.*)$"))
@@ -462,10 +632,27 @@ def build_app() -> Application:
     return application
 
 async def main():
+    global webhook_server
     app = build_app()
-    asyncio.create_task(run_scheduler(app))
     await on_ready(app)
-    await app.run_polling()
+    schedule_jobs(app)
+    scheduler.start()
+    try:
+        if BOT_MODE == "webhook":
+            webhook_server = WebhookServer(app.bot, app.update_queue, WEBHOOK_HOST, WEBHOOK_PORT, WEBHOOK_PATH,
+                                           WEBHOOK_SECRET, WEBHOOK_MAX_QUEUE)
+            await run_webhook(app, webhook_server, WEBHOOK_PUBLIC_URL, reuse_port=WEBHOOK_REUSE_PORT)
+        else:
+            await app.run_polling()
+    finally:
+        await scheduler.stop()
+        await leader.stop()
+        await analysis_queue.stop()
+        await flush_db_writes()
+        await chart_browser.close()
+        await fetcher.close()
+        await master.close()
+        await state.close()
 
 if __name__ == "__main__":
     import asyncio
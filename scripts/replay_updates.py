@@ -0,0 +1,34 @@
+"""
+POST recorded Telegram updates to a locally running webhook server (BOT_MODE=webhook),
+then print its /healthz. No Telegram involved on the way in.
+Usage:  python scripts/replay_updates.py [updates.json] [--url http://127.0.0.1:8443/telegram]
+"""
+import argparse, asyncio, json, os, sys
+from urllib.parse import urlsplit
+import aiohttp
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from config import WEBHOOK_PORT, WEBHOOK_PATH, WEBHOOK_SECRET  # noqa: E402
+from services.webhook_server import SECRET_HEADER  # noqa: E402
+
+DEFAULT_FIXTURE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures", "telegram_updates.json")
+
+async def replay(path: str, url: str, secret: str):
+    with open(path, encoding="utf-8") as f:
+        updates = json.load(f)
+    parts = urlsplit(url)
+    base = f"{parts.scheme}://{parts.netloc}"
+    async with aiohttp.ClientSession() as session:
+        for upd in updates:
+            async with session.post(url, json=upd, headers={SECRET_HEADER: secret}) as resp:
+                print(upd["update_id"], resp.status)
+        async with session.get(base + "/healthz") as resp:
+            print("healthz", resp.status, await resp.text())
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser()
+    ap.add_argument("fixture", nargs="?", default=DEFAULT_FIXTURE)
+    ap.add_argument("--url", default=f"http://127.0.0.1:{WEBHOOK_PORT}{WEBHOOK_PATH}")
+    ap.add_argument("--secret", default=WEBHOOK_SECRET)
+    args = ap.parse_args()
+    asyncio.run(replay(args.fixture, args.url, args.secret))
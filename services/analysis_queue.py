@@ -0,0 +1,211 @@
+import asyncio, heapq, itertools, time
+from collections import deque
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Set
+from services.logger import get_logger
+from services.trading_engine import AnalysisError
+
+logger = get_logger("analysis_queue")
+
+# Lower runs first; tiers not listed are treated as free
+PRIORITIES = {"premium": 0, "free": 1}
+
+class QueueBusy(Exception):
+    """The queue is saturated for this priority; the caller should ask the user to retry."""
+
+class DeadlineExceeded(Exception):
+    """The job did not finish before the requester's deadline."""
+
+class _Job:
+    __slots__ = ("key", "fn", "priority", "seq", "deadline", "future", "tickets", "enqueued_at", "started", "position")
+
+    def __init__(self, key, fn, priority, seq, deadline, future, now):
+        self.key, self.fn, self.priority, self.seq, self.deadline = key, fn, priority, seq, deadline
+        self.future, self.tickets, self.enqueued_at = future, [], now
+        self.started = False
+        self.position = None
+
+class Ticket:
+    """One requester's handle on a (possibly shared) job."""
+    def __init__(self, queue: "AnalysisQueue", job: _Job, deadline: float):
+        self._queue = queue
+        self.job = job
+        self.deadline = deadline
+        self._callbacks: List[Callable[[int], Awaitable[None]]] = []
+
+    @property
+    def position(self) -> int:
+        """1-based place in the queue, 0 once the job is running or done."""
+        return self.job.position or 0
+
+    def on_position(self, callback: Callable[[int], Awaitable[None]]):
+        """callback(position) is scheduled whenever the job moves (0 = started)."""
+        self._callbacks.append(callback)
+
+    def _notify(self, position: int):
+        for cb in self._callbacks:
+            self._queue._track(asyncio.get_running_loop().create_task(self._queue._safe_callback(cb, position)))
+
+    async def result(self) -> Any:
+        remaining = self.deadline - self._queue.clock()
+        try:
+            # shield: one requester giving up must not cancel work others still wait for
+            return await asyncio.wait_for(asyncio.shield(self.job.future), max(0.0, remaining))
+        except asyncio.TimeoutError:
+            self._queue.timeouts += 1
+            raise DeadlineExceeded(f"analysis {self.job.key} exceeded its deadline") from None
+
+class AnalysisQueue:
+    """
+    Priority job queue for expensive signal analysis with a fixed worker pool.
+    Premium jobs run before free ones (FIFO within a class), requests for a key that
+    is already queued share the job (and lift its priority), every requester has a
+    deadline, and free requests are shed with QueueBusy once `free_shed_at` jobs are
+    waiting so they get an immediate answer instead of a timeout.
+    """
+    def __init__(self, workers: int = 4, max_queue: int = 200, free_shed_at: int = 20,
+                 deadlines: Dict[str, float] = None, clock: Callable[[], float] = time.monotonic):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.free_shed_at = free_shed_at
+        self.deadlines = deadlines or {"premium": 120.0, "free": 60.0}
+        self.clock = clock
+        self._heap: List = []
+        self._queued: Dict[Hashable, _Job] = {}
+        self._running: Dict[Hashable, _Job] = {}
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: List[asyncio.Task] = []
+        self._callback_tasks: Set[asyncio.Task] = set()  # the loop only holds weak references
+        self._waits = deque(maxlen=500)
+        self.submitted = 0
+        self.coalesced = 0
+        self.shed = 0
+        self.expired = 0
+        self.timeouts = 0
+        self.completed = 0
+        self.failed = 0
+
+    def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+        self._tasks = [asyncio.get_running_loop().create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        tasks = self._tasks + list(self._callback_tasks)
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks = []
+
+    def _track(self, task: asyncio.Task):
+        self._callback_tasks.add(task)
+        task.add_done_callback(self._callback_tasks.discard)
+
+    def submit(self, key: Hashable, fn: Callable[[], Awaitable[Any]], tier: str = "free",
+               deadline_s: float = None) -> Ticket:
+        """Queue fn under key for a requester of the given tier; raises QueueBusy when shed."""
+        self.start()
+        priority = PRIORITIES.get(tier, PRIORITIES["free"])
+        now = self.clock()
+        deadline = now + (deadline_s if deadline_s is not None else self.deadlines.get(tier, self.deadlines["free"]))
+        job = self._queued.get(key) or self._running.get(key)
+        if job is not None:
+            self.coalesced += 1
+            job.deadline = max(job.deadline, deadline)
+            if not job.started and priority < job.priority:
+                job.priority = priority
+                heapq.heappush(self._heap, (priority, job.seq, job))  # the old entry is skipped when popped
+                self._reposition()
+        else:
+            depth = len(self._queued)
+            if depth >= self.max_queue or (priority > 0 and depth >= self.free_shed_at):
+                self.shed += 1
+                raise QueueBusy(f"{depth} analyses waiting")
+            job = _Job(key, fn, priority, next(self._seq), deadline, asyncio.get_running_loop().create_future(), now)
+            self._queued[key] = job
+            heapq.heappush(self._heap, (priority, job.seq, job))
+            self.submitted += 1
+            self._reposition()
+            self._wakeup.set()
+        ticket = Ticket(self, job, deadline)
+        job.tickets.append(ticket)
+        return ticket
+
+    def _pop(self) -> Optional[_Job]:
+        while self._heap:
+            priority, _, job = heapq.heappop(self._heap)
+            if job.started or priority != job.priority or self._queued.get(job.key) is not job:
+                continue  # stale entry from a priority lift
+            del self._queued[job.key]
+            return job
+        return None
+
+    def _reposition(self):
+        """Recompute queue positions; tell requesters when theirs changed (coarsely past 3)."""
+        order = sorted(self._queued.values(), key=lambda j: (j.priority, j.seq))
+        for pos, job in enumerate(order, 1):
+            if job.position != pos:
+                job.position = pos
+                if pos <= 3 or pos % 5 == 0:
+                    for t in job.tickets:
+                        t._notify(pos)
+
+    async def _safe_callback(self, cb, position: int):
+        try:
+            await cb(position)
+        except Exception as e:
+            logger.warning("Queue position callback failed: %s", e)
+
+    async def _worker(self, n: int):
+        while True:
+            job = self._pop()
+            if job is None:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = self.clock()
+            if now >= job.deadline:
+                # Every requester has already given up; don't spend a worker on it
+                self.expired += 1
+                job.future.set_exception(DeadlineExceeded(f"analysis {job.key} expired in queue"))
+                job.future.exception()
+                self._reposition()
+                continue
+            job.started = True
+            job.position = 0
+            self._running[job.key] = job
+            self._waits.append(now - job.enqueued_at)
+            self._reposition()
+            for t in job.tickets:
+                t._notify(0)
+            try:
+                job.future.set_result(await job.fn())
+                self.completed += 1
+            except asyncio.CancelledError:
+                job.future.cancel()
+                raise
+            except Exception as e:
+                self.failed += 1
+                if isinstance(e, AnalysisError):
+                    logger.warning("Analysis job %s failed: %s", job.key, e)
+                else:
+                    logger.exception("Analysis job %s failed: %s", job.key, e)
+                job.future.set_exception(e)
+                job.future.exception()
+            finally:
+                self._running.pop(job.key, None)
+
+    def stats(self) -> Dict:
+        waits = sorted(self._waits)
+        by_priority: Dict[str, int] = {}
+        names = {v: k for k, v in PRIORITIES.items()}
+        for job in self._queued.values():
+            by_priority[names[job.priority]] = by_priority.get(names[job.priority], 0) + 1
+        return {
+            "queued": len(self._queued), "by_tier": by_priority, "running": len(self._running), "workers": self.workers,
+            "submitted": self.submitted, "coalesced": self.coalesced, "shed": self.shed, "expired": self.expired,
+            "timeouts": self.timeouts, "completed": self.completed, "failed": self.failed,
+            "queue_wait_ms": {"avg": round(sum(waits) / len(waits) * 1000, 1) if waits else 0.0,
+                              "max": round(waits[-1] * 1000, 1) if waits else 0.0},
+        }
@@ -0,0 +1,205 @@
+import asyncio, time
+from typing import Dict, List
+from telegram.constants import ParseMode
+from telegram.error import RetryAfter, Forbidden, BadRequest, TimedOut, NetworkError
+from services import db
+from services.db_async import run_read, create_broadcast, mark_broadcast_recipient, finish_broadcast
+from services.logger import get_logger
+from services.rate_limit import TokenBucket, PerChatLimiter
+from utils.markdown import mdv2, with_footer
+from config import BROADCAST_RATE, BROADCAST_CONCURRENCY
+
+logger = get_logger("broadcast")
+
+# One bucket for all bulk traffic (broadcasts + news pushes) so together they stay under Telegram's limit
+telegram_bucket = TokenBucket(BROADCAST_RATE)
+
+def retry_after_seconds(e: RetryAfter) -> float:
+    ra = e.retry_after
+    return ra.total_seconds() if hasattr(ra, "total_seconds") else float(ra)
+
+async def send_many(bot, messages: Dict[int, str], concurrency: int, bucket: TokenBucket = telegram_bucket,
+                    **send_kwargs) -> List[int]:
+    """
+    Send one prepared MarkdownV2 text per chat with bounded concurrency under the shared
+    rate limit (one retry after flood control). Returns the chat ids that were delivered.
+    """
+    sem = asyncio.Semaphore(concurrency)
+    delivered: List[int] = []
+
+    async def one(chat_id: int, text: str):
+        async with sem:
+            for _ in range(2):
+                await bucket.acquire()
+                try:
+                    await bot.send_message(chat_id, text, parse_mode=ParseMode.MARKDOWN_V2, **send_kwargs)
+                    bucket.reward()
+                    delivered.append(chat_id)
+                    return
+                except RetryAfter as e:
+                    bucket.pause(retry_after_seconds(e))
+                    bucket.penalize()
+                except Exception as e:
+                    logger.warning("Send to %s failed: %s", chat_id, e)
+                    return
+
+    await asyncio.gather(*(one(cid, text) for cid, text in messages.items()))
+    return delivered
+
+class BroadcastEngine:
+    """
+    Concurrent, rate-limited broadcasts persisted in SQLite. Every recipient row moves
+    pending -> sent/blocked/failed as soon as its send finishes, so a job interrupted by
+    a restart resumes with only the still-pending users. Flood control (RetryAfter)
+    pauses the shared bucket and halves its rate; successes slowly restore it.
+    With a shared state backend, the worker sending a job holds the lease
+    "broadcast:<id>" and renews it while sending; resume_unfinished() only picks up
+    jobs whose lease has lapsed, so a live sender is never duplicated.
+    """
+    def __init__(self, bot, rate: float = BROADCAST_RATE, concurrency: int = BROADCAST_CONCURRENCY,
+                 max_attempts: int = 3, progress_every: float = 5.0, state=None, owner: str = "local",
+                 lease_ttl: float = 30.0):
+        self.bot = bot
+        self.state = state
+        self.owner = owner
+        self.lease_ttl = lease_ttl
+        self.bucket = telegram_bucket if rate == BROADCAST_RATE else TokenBucket(rate)
+        self.per_chat = PerChatLimiter(1.0)
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.progress_every = progress_every
+        self._tasks: Dict[int, asyncio.Task] = {}
+
+    async def start(self, text: str, created_by: int, progress_chat_id: int, progress_message_id: int) -> int:
+        job_id = await create_broadcast(text, created_by, progress_chat_id, progress_message_id)
+        await self._claim(job_id)
+        self._spawn(job_id)
+        return job_id
+
+    async def resume_unfinished(self) -> int:
+        """Take over running jobs nobody is sending (interrupted by a restart or a dead worker)."""
+        resumed = 0
+        for job in await run_read(db.list_running_broadcasts):
+            if self._active(job["id"]) or not await self._claim(job["id"]):
+                continue
+            logger.info("Resuming broadcast #%s", job["id"])
+            self._spawn(job["id"])
+            resumed += 1
+        return resumed
+
+    def _active(self, job_id: int) -> bool:
+        return job_id in self._tasks and not self._tasks[job_id].done()
+
+    async def _claim(self, job_id: int) -> bool:
+        if self.state is None:
+            return True
+        return await self.state.acquire_lease(f"broadcast:{job_id}", self.owner, self.lease_ttl)
+
+    async def _hold_lease(self, job_id: int, task: asyncio.Task):
+        # Stop sending as soon as the lease can't be renewed: another worker may take the job over
+        while True:
+            await asyncio.sleep(self.lease_ttl / 3)
+            try:
+                held = await self._claim(job_id)
+            except Exception as e:
+                logger.exception("Broadcast #%s lease renewal failed: %s", job_id, e)
+                held = False
+            if not held:
+                logger.warning("Broadcast #%s: lease lost, stopping here", job_id)
+                task.cancel()
+                return
+
+    def _spawn(self, job_id: int):
+        if not self._active(job_id):
+            self._tasks[job_id] = task = asyncio.create_task(self._run(job_id))
+            if self.state is not None:
+                keeper = asyncio.create_task(self._hold_lease(job_id, task))
+                task.add_done_callback(lambda _: keeper.cancel())
+
+    async def _send(self, job_id: int, user_id: int, text: str) -> str:
+        # Flood control says nothing about this recipient: RetryAfter waits (via the bucket
+        # pause) and retries without using up one of max_attempts
+        attempt = 0
+        while attempt < self.max_attempts:
+            await self.per_chat.wait(user_id)
+            await self.bucket.acquire()
+            try:
+                await self.bot.send_message(user_id, text, parse_mode=ParseMode.MARKDOWN_V2, protect_content=True)
+                self.bucket.reward()
+                await mark_broadcast_recipient(job_id, user_id, "sent")
+                return "sent"
+            except RetryAfter as e:
+                wait = retry_after_seconds(e)
+                logger.warning("Flood control during broadcast #%s: retry after %ss", job_id, wait)
+                self.bucket.pause(wait)
+                self.bucket.penalize()
+            except Forbidden as e:
+                await mark_broadcast_recipient(job_id, user_id, "blocked", str(e))
+                return "blocked"
+            except BadRequest as e:
+                await mark_broadcast_recipient(job_id, user_id, "failed", str(e))
+                return "failed"
+            except (TimedOut, NetworkError) as e:
+                attempt += 1
+                logger.warning("Broadcast #%s to %s: %s (attempt %d)", job_id, user_id, e, attempt)
+                if attempt < self.max_attempts:
+                    await asyncio.sleep(min(30, 2 ** attempt))
+        await mark_broadcast_recipient(job_id, user_id, "failed", "retries exhausted")
+        return "failed"
+
+    async def _report(self, job, started: float, done: bool = False):
+        counts = await run_read(db.broadcast_counts, job["id"])
+        sent, pending = counts.get("sent", 0), counts.get("pending", 0)
+        failed = counts.get("failed", 0) + counts.get("blocked", 0)
+        elapsed = max(1e-6, time.monotonic() - started)
+        state = "completed" if done else "in progress"
+        text = (f"Broadcast #{job['id']} {state}: sent {sent}/{job['total']}, failed {failed}, "
+                f"pending {pending}, {sent / elapsed:.1f} msg/s")
+        try:
+            await self.bot.edit_message_text(with_footer(mdv2(text)), chat_id=job["progress_chat_id"],
+                                             message_id=job["progress_message_id"], parse_mode=ParseMode.MARKDOWN_V2)
+        except BadRequest:
+            pass  # "message is not modified"
+        except Exception as e:
+            logger.warning("Broadcast progress update failed: %s", e)
+
+    async def _progress_loop(self, job, started: float):
+        while True:
+            await asyncio.sleep(self.progress_every)
+            await self._report(job, started)
+
+    async def _run(self, job_id: int):
+        job = await run_read(db.get_broadcast, job_id)
+        if not job:
+            return
+        text = with_footer(mdv2(job["text"]))
+        started = time.monotonic()
+        progress = asyncio.create_task(self._progress_loop(job, started))
+        sem = asyncio.Semaphore(self.concurrency)
+
+        async def one(uid: int):
+            async with sem:
+                try:
+                    await self._send(job_id, uid, text)
+                except Exception as e:
+                    logger.exception("Broadcast #%s to %s failed: %s", job_id, uid, e)
+                    await mark_broadcast_recipient(job_id, uid, "failed", str(e))
+        try:
+            while True:
+                batch = await run_read(db.pending_broadcast_recipients, job_id, 500)
+                if not batch:
+                    break
+                await asyncio.gather(*(one(uid) for uid in batch))
+            await finish_broadcast(job_id)
+            logger.info("Broadcast #%s finished in %.1fs", job_id, time.monotonic() - started)
+        finally:
+            progress.cancel()
+        await self._report(job, started, done=True)
+        if self.state is not None:
+            await self.state.release_lease(f"broadcast:{job_id}", self.owner)
+
+    def stats(self) -> Dict:
+        return {
+            "active_jobs": sum(1 for t in self._tasks.values() if not t.done()),
+            "rate": round(self.bucket.rate, 2),
+        }
@@ -0,0 +1,73 @@
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Array-backed candle history + vectorized versions of the TradingEngine heuristics.
+# Every function mirrors the scalar logic it replaces so signals stay identical.
+
+class CandleArrays:
+    """Contiguous float64 OHLC arrays built once from a list of MetaApi candle dicts."""
+    __slots__ = ("open", "high", "low", "close")
+
+    def __init__(self, open_: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray):
+        self.open, self.high, self.low, self.close = open_, high, low, close
+
+    @classmethod
+    def from_candles(cls, candles: List[Dict]) -> "CandleArrays":
+        n = len(candles)
+        cols = [np.fromiter((c[k] for c in candles), dtype=np.float64, count=n) for k in ("open", "high", "low", "close")]
+        return cls(*cols)
+
+    def __len__(self) -> int:
+        return self.close.shape[0]
+
+    def __getitem__(self, s: slice) -> "CandleArrays":
+        return CandleArrays(self.open[s], self.high[s], self.low[s], self.close[s])
+
+def pin_bar_tags(c: CandleArrays) -> np.ndarray:
+    """Per-candle pin bar tag: +1 buy (long lower wick), -1 sell (long upper wick), 0 none."""
+    body = np.abs(c.close - c.open)
+    rng = c.high - c.low
+    rng = np.where(rng != 0, rng, 1e-9)
+    top = np.maximum(c.close, c.open)
+    bottom = np.minimum(c.close, c.open)
+    small = body / rng < 0.3
+    buy = small & (bottom - c.low > 2 * body) & ((top - c.low) / rng > 0.6)
+    sell = small & ~buy & (c.high - top > 2 * body) & ((c.high - bottom) / rng > 0.6)
+    return buy.astype(np.int8) - sell.astype(np.int8)
+
+def last_pin_bar(c: CandleArrays) -> Tuple[Optional[str], int]:
+    """Most recent pin bar in c as ('buy'|'sell'|None, index)."""
+    tags = pin_bar_tags(c)
+    nz = np.flatnonzero(tags)
+    if nz.size == 0:
+        return None, -1
+    i = int(nz[-1])
+    return ("buy" if tags[i] > 0 else "sell"), i
+
+def breakout_range(c: CandleArrays, lookback: int = 40) -> Tuple[float, float]:
+    """Highest high and lowest low over the last `lookback` candles."""
+    return float(c.high[-lookback:].max()), float(c.low[-lookback:].min())
+
+def trend(close: np.ndarray, lookback: int = 50) -> Tuple[bool, bool]:
+    """(trend_up, trend_down): last close vs the close `lookback` bars back."""
+    if close.shape[0] <= lookback:
+        return False, False
+    last, ref = close[-1], close[-lookback]
+    return bool(last > ref), bool(last < ref)
+
+def swing_levels(c: CandleArrays, lookback: int = 150, decimals: int = 3) -> np.ndarray:
+    """Sorted unique rounded highs/lows of the last `lookback` candles."""
+    return np.unique(np.round(np.concatenate((c.high[-lookback:], c.low[-lookback:])), decimals))
+
+def nearest_level(levels: np.ndarray, price: float) -> Optional[float]:
+    """Closest level to price via searchsorted (ties go to the lower level, like min())."""
+    n = levels.shape[0]
+    if n == 0:
+        return None
+    i = int(np.searchsorted(levels, price))
+    if i == 0:
+        return float(levels[0])
+    if i == n:
+        return float(levels[-1])
+    lo, hi = levels[i - 1], levels[i]
+    return float(lo if abs(lo - price) <= abs(hi - price) else hi)
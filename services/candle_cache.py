@@ -0,0 +1,97 @@
+import asyncio, time
+from collections import deque
+from typing import Dict, List, Tuple, Callable
+from services.logger import get_logger
+from utils.bars import bar_open, next_bar_close, timeframe_seconds, candle_ts
+
+logger = get_logger("candles")
+
+class _Entry:
+    __slots__ = ("bars", "expires_at")
+
+    def __init__(self, maxlen: int):
+        self.bars = deque(maxlen=maxlen)
+        self.expires_at = 0.0
+
+class CandleCache:
+    """
+    Per-(symbol, timeframe) ring buffer of candles in front of MetaApiClient.get_candles.
+    Entries expire at the next bar close for their timeframe, or at the next refresh_tf
+    close if that comes first, so the forming H4/D1 bar tracks the market at M15
+    resolution; a refresh only fetches the bars that appeared since the last cached one
+    (just the forming bar when none did).
+    """
+    def __init__(self, client, max_bars: int = 500, clock: Callable[[], float] = time.time,
+                 refresh_tf: str = "15m"):
+        self.client = client
+        self.refresh_tf = refresh_tf
+        self.max_bars = max_bars
+        self.clock = clock
+        self._entries: Dict[Tuple[str, str], _Entry] = {}
+        self._locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.incremental_fetches = 0
+        self.full_fetches = 0
+        self.bars_fetched = 0
+
+    def _fresh(self, entry: _Entry, count: int, now: float) -> bool:
+        return entry is not None and now < entry.expires_at and len(entry.bars) >= count
+
+    async def get(self, connection, symbol: str, timeframe: str, count: int) -> List[Dict]:
+        key = (symbol, timeframe)
+        entry = self._entries.get(key)
+        if self._fresh(entry, count, self.clock()):
+            self.hits += 1
+            return list(entry.bars)[-count:]
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            now = self.clock()
+            entry = self._entries.get(key)
+            if self._fresh(entry, count, now):
+                self.hits += 1
+                return list(entry.bars)[-count:]
+            self.misses += 1
+            maxlen = max(self.max_bars, count)
+            if entry is None or entry.bars.maxlen < count:
+                entry = self._entries[key] = _Entry(maxlen)
+
+            fetch_n = count
+            if len(entry.bars) >= count:
+                # Bars opened since the last cached one (+1 to refresh that bar, which may have been forming)
+                elapsed = bar_open(now, timeframe) - candle_ts(entry.bars[-1])
+                fetch_n = min(maxlen, max(1, int(elapsed // timeframe_seconds(timeframe)) + 1))
+            candles = await self.client.get_candles(connection, symbol, timeframe, fetch_n)
+            if not candles:
+                return []
+            self.bars_fetched += len(candles)
+            if fetch_n < count:
+                self.incremental_fetches += 1
+                first_new = candle_ts(candles[0])
+                while entry.bars and candle_ts(entry.bars[-1]) >= first_new:
+                    entry.bars.pop()
+            else:
+                self.full_fetches += 1
+                entry.bars.clear()
+            entry.bars.extend(candles)
+            entry.expires_at = min(next_bar_close(now, timeframe), next_bar_close(now, self.refresh_tf))
+            return list(entry.bars)[-count:]
+
+    def peek(self, symbol: str, timeframe: str) -> List[Dict]:
+        """Cached bars without touching the network (may be stale or empty)."""
+        entry = self._entries.get((symbol, timeframe))
+        return list(entry.bars) if entry else []
+
+    def invalidate(self, symbol: str = None):
+        for key in list(self._entries):
+            if symbol is None or key[0] == symbol:
+                del self._entries[key]
+
+    def stats(self) -> Dict:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits, "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "incremental_fetches": self.incremental_fetches, "full_fetches": self.full_fetches,
+            "bars_fetched": self.bars_fetched, "entries": len(self._entries),
+        }
@@ -0,0 +1,85 @@
+import os, asyncio, time
+from typing import Dict, List, Optional
+from PIL import Image, ImageDraw, ImageFont
+from services.logger import get_logger
+from utils.bars import candle_ts
+from config import SCREENSHOT_DIR
+
+logger = get_logger("renderer")
+
+# Palette (TradingView-like dark theme)
+BG = (19, 23, 34)
+GRID = (42, 46, 57)
+TEXT = (178, 181, 190)
+UP = (38, 166, 154)
+DOWN = (239, 83, 80)
+PIN = (255, 193, 7)
+ENTRY = (41, 98, 255)
+LEVEL_COLORS = {"entry": ENTRY, "sl": DOWN, "tp1": UP, "tp2": UP, "tp3": UP}
+
+def render_chart(symbol: str, candles: List[Dict], signal: Optional[Dict], out_path: str,
+                 width: int = 800, height: int = 450, bars: int = 80) -> str:
+    """
+    Draw the last `bars` candles with entry/SL/TP1-3 lines from the signal dict and the
+    triggering pin bar (signal['trigger_time']) highlighted. Writes a palette PNG.
+    """
+    data = candles[-bars:]
+    if not data:
+        raise ValueError("no candles to render")
+    levels = {k: signal[k] for k in LEVEL_COLORS if signal and signal.get(k) is not None}
+    hi = max([c["high"] for c in data] + list(levels.values()))
+    lo = min([c["low"] for c in data] + list(levels.values()))
+    pad = (hi - lo) * 0.05 or 1e-6
+    hi, lo = hi + pad, lo - pad
+
+    right, top, bottom = 100, 24, 10
+    plot_w, plot_h = width - right, height - top - bottom
+    def y(price: float) -> float:
+        return top + (hi - price) / (hi - lo) * plot_h
+
+    img = Image.new("RGB", (width, height), BG)
+    d = ImageDraw.Draw(img)
+    font = ImageFont.load_default()
+    for i in range(1, 5):
+        gy = top + plot_h * i / 5
+        d.line([(0, gy), (plot_w, gy)], fill=GRID)
+    d.text((6, 6), f"{symbol}  M15", fill=TEXT, font=font)
+
+    step = plot_w / len(data)
+    body_w = max(1.0, step * 0.35)
+    trigger = signal.get("trigger_time") if signal else None
+    for i, c in enumerate(data):
+        x = i * step + step / 2
+        color = UP if c["close"] >= c["open"] else DOWN
+        if trigger is not None and candle_ts(c) == trigger:
+            d.rectangle([x - step / 2, top, x + step / 2, top + plot_h], fill=(48, 44, 30))
+            color = PIN
+        d.line([(x, y(c["high"])), (x, y(c["low"]))], fill=color)
+        y0, y1 = sorted((y(c["open"]), y(c["close"])))
+        d.rectangle([x - body_w, y0, x + body_w, max(y1, y0 + 1)], fill=color)
+
+    for name, price in levels.items():
+        ly = y(price)
+        color = LEVEL_COLORS[name]
+        for x0 in range(0, plot_w, 8):
+            d.line([(x0, ly), (min(x0 + 4, plot_w), ly)], fill=color)
+        d.text((plot_w + 4, ly - 6), f"{name.upper()} {price}", fill=color, font=font)
+
+    img = img.convert("P", palette=Image.ADAPTIVE, colors=32)
+    img.save(out_path, format="PNG", optimize=True)
+    return out_path
+
+async def render_signal_chart(symbol: str, candles: List[Dict], signal: Optional[Dict], timeframe: str = "15") -> str:
+    """
+    Returns the local file path to the rendered chart, or '' on failure.
+    """
+    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+    out_path = os.path.join(SCREENSHOT_DIR, f"{symbol.replace('/','_')}_{timeframe}_render.png")
+    try:
+        t0 = time.perf_counter()
+        path = await asyncio.to_thread(render_chart, symbol, candles, signal, out_path)
+        logger.info("Rendered chart %s in %.3fs", path, time.perf_counter() - t0)
+        return path
+    except Exception as e:
+        logger.exception("Chart render error for %s: %s", symbol, e)
+        return ""
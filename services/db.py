@@ -1,25 +1,164 @@
-import os, sqlite3, threading
+import os, sqlite3, threading, time
+from collections import OrderedDict
+from contextlib import contextmanager
 from typing import Optional, List, Tuple, Dict
 from services.logger import get_logger
 
 logger = get_logger("db")
 
-DB_PATH = os.path.join(os.getcwd(), "data", "bot.db")
+DB_PATH = os.getenv("BOT_DB_PATH", os.path.join(os.getcwd(), "data", "bot.db"))
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-_lock = threading.Lock()
+# Connection layer: one persistent writer connection (writes serialized by _lock) and one
+# persistent reader connection per thread. WAL lets readers run concurrently with the writer,
+# and long-lived connections keep sqlite3's prepared-statement cache warm.
+_lock = threading.RLock()
+_local = threading.local()
+_writer_conn: Optional[sqlite3.Connection] = None
+_write_depth = 0
+_generation = 0  # bumped by close_all() so threads drop their closed reader connections
+_all_conns: List[sqlite3.Connection] = []
+_conns_lock = threading.Lock()  # guards _all_conns only, so opening a reader never waits on a write
+
+_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA cache_size=-8000",
+    "PRAGMA mmap_size=134217728",
+    "PRAGMA busy_timeout=5000",
+)
 
 def _connect():
-    conn = sqlite3.connect(DB_PATH, check_same_thread=False)
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=256)
     conn.row_factory = sqlite3.Row
+    for pragma in _PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+def _reader() -> sqlite3.Connection:
+    conn = getattr(_local, "conn", None)
+    if conn is None or _local.generation != _generation:
+        conn = _local.conn = _connect()
+        _local.generation = _generation
+        with _conns_lock:
+            _all_conns.append(conn)
     return conn
 
+@contextmanager
+def _write():
+    """Serialized write transaction on the shared writer connection (re-entrant: nested
+    calls join the outermost transaction, which commits or rolls back as a whole)."""
+    global _writer_conn, _write_depth
+    with _lock:
+        if _writer_conn is None:
+            _writer_conn = _connect()
+            _writer_conn.execute("PRAGMA journal_mode=WAL")
+            with _conns_lock:
+                _all_conns.append(_writer_conn)
+        _write_depth += 1
+        try:
+            yield _writer_conn
+            if _write_depth == 1:
+                _writer_conn.commit()
+                _apply_cache_updates()
+        except BaseException:
+            if _write_depth == 1:
+                _writer_conn.rollback()
+                del _pending_cache[:]
+            raise
+        finally:
+            _write_depth -= 1
+
+# Write-through LRU cache of users rows (as dicts). Every mutating function below queues an
+# update of the cached copy, applied only once its transaction commits; a reader only
+# inserts a row if no users write committed while it read.
+# Writes made by other worker processes are invisible to this cache, so USER_CACHE_TTL (s)
+# bounds how long a copy may be served: a few seconds by default once workers share state
+# (STATE_BACKEND=sqlite), no expiry (0) for a single process.
+USER_CACHE_SIZE = int(os.getenv("USER_CACHE_SIZE", "10000"))
+_SHARED = os.getenv("STATE_BACKEND", "memory").lower() == "sqlite"
+USER_CACHE_TTL = float(os.getenv("USER_CACHE_TTL", "5" if _SHARED else "0"))
+_profiles: "OrderedDict[int, Dict]" = OrderedDict()
+_profile_loaded: Dict[int, float] = {}
+_profiles_lock = threading.Lock()
+_profiles_epoch = 0
+_profile_hits = 0
+_profile_misses = 0
+_pending_cache: List[Tuple[int, Dict]] = []  # (user_id, fields) of the open transaction, guarded by _lock
+
+def cached_user(user_id: int) -> Optional[Dict]:
+    """Cached profile copy, or None on a miss (no DB access)."""
+    global _profile_hits
+    with _profiles_lock:
+        row = _profiles.get(user_id)
+        if row is None:
+            return None
+        if USER_CACHE_TTL and time.monotonic() - _profile_loaded[user_id] > USER_CACHE_TTL:
+            del _profiles[user_id], _profile_loaded[user_id]
+            return None
+        _profiles.move_to_end(user_id)
+        _profile_hits += 1
+        return dict(row)
+
+def _cache_update(user_id: int, **fields):
+    """Queue a write-through update; callers are inside _write()."""
+    _pending_cache.append((user_id, fields))
+
+def _apply_cache_updates():
+    global _profiles_epoch
+    if not _pending_cache:
+        return
+    with _profiles_lock:
+        _profiles_epoch += 1
+        for user_id, fields in _pending_cache:
+            row = _profiles.get(user_id)
+            if row is not None:
+                row.update(fields)
+    del _pending_cache[:]
+
+def _cache_mark() -> int:
+    return len(_pending_cache)
+
+def _cache_rollback(mark: int):
+    """Forget updates queued since mark (the savepoint they belong to was rolled back)."""
+    del _pending_cache[mark:]
+
+def invalidate_user_cache(user_id: int = None):
+    global _profiles_epoch
+    with _profiles_lock:
+        _profiles_epoch += 1
+        if user_id is None:
+            _profiles.clear()
+            _profile_loaded.clear()
+        else:
+            _profiles.pop(user_id, None)
+            _profile_loaded.pop(user_id, None)
+
+def user_cache_stats() -> Dict:
+    with _profiles_lock:
+        total = _profile_hits + _profile_misses
+        return {
+            "size": len(_profiles), "hits": _profile_hits, "misses": _profile_misses,
+            "hit_rate": round(_profile_hits / total, 3) if total else 0.0,
+        }
+
+def close_all():
+    """Close every pooled connection (e.g. before switching DB_PATH or at shutdown)."""
+    global _writer_conn, _generation
+    with _lock, _conns_lock:
+        for conn in _all_conns:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        _all_conns.clear()
+        _writer_conn = None
+        _generation += 1
+
 # Initialize schema
 def init_db():
-    with _lock:
-        conn = _connect()
-        cur = conn.cursor()
-        cur.executescript("""
+    with _write() as conn:
+        conn.executescript("""
         CREATE TABLE IF NOT EXISTS users (
             user_id INTEGER PRIMARY KEY,
             username TEXT,
@@ -67,97 +206,264 @@ def init_db():
             profit REAL,
             result TEXT
         );
+        CREATE TABLE IF NOT EXISTS broadcast_jobs (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            text TEXT,
+            created_by INTEGER,
+            progress_chat_id INTEGER,
+            progress_message_id INTEGER,
+            status TEXT DEFAULT 'running',
+            total INTEGER DEFAULT 0,
+            created_at TEXT,
+            finished_at TEXT
+        );
+        CREATE TABLE IF NOT EXISTS broadcast_recipients (
+            job_id INTEGER,
+            user_id INTEGER,
+            status TEXT DEFAULT 'pending',
+            attempts INTEGER DEFAULT 0,
+            error TEXT,
+            PRIMARY KEY(job_id, user_id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_broadcast_recipients_status ON broadcast_recipients(job_id, status);
+        CREATE INDEX IF NOT EXISTS idx_users_news_geo ON users(user_id) WHERE news_geo=1;
+        CREATE INDEX IF NOT EXISTS idx_users_news_cb ON users(user_id) WHERE news_cb=1;
+        CREATE INDEX IF NOT EXISTS idx_users_news_cpi ON users(user_id) WHERE news_cpi=1;
+        CREATE INDEX IF NOT EXISTS idx_alerts_instrument ON alerts(instrument, user_id) WHERE enabled=1;
+        CREATE TABLE IF NOT EXISTS seen_headlines (
+            hash TEXT PRIMARY KEY,
+            title TEXT,
+            url TEXT,
+            first_seen REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_seen_headlines_first_seen ON seen_headlines(first_seen);
+        CREATE TABLE IF NOT EXISTS news_watermarks (
+            user_id INTEGER PRIMARY KEY,
+            last_ts REAL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS calendar_events (
+            event_utc REAL,
+            currency TEXT,
+            title TEXT,
+            impact TEXT,
+            PRIMARY KEY (event_utc, currency, title)
+        );
         """)
-        conn.commit()
-        conn.close()
-        logger.info("Database initialized at %s", DB_PATH)
+    logger.info("Database initialized at %s", DB_PATH)
 
 def upsert_user(user_id: int, username: str, full_name: str):
-    with _lock:
-        conn = _connect()
-        cur = conn.cursor()
-        cur.execute("""
+    with _write() as conn:
+        conn.execute("""
         INSERT INTO users(user_id, username, full_name, registered_at)
         VALUES (?, ?, ?, datetime('now'))
         ON CONFLICT(user_id) DO UPDATE SET username=excluded.username, full_name=excluded.full_name
         """, (user_id, username, full_name))
-        conn.commit()
-        conn.close()
+        _cache_update(user_id, username=username, full_name=full_name)
 
 def set_user_tier(user_id: int, tier: str, approved: int = 0):
-    with _lock:
-        conn = _connect()
+    with _write() as conn:
         conn.execute("UPDATE users SET tier=?, premium_approved=? WHERE user_id=?", (tier, approved, user_id))
-        conn.commit(); conn.close()
+        _cache_update(user_id, tier=tier, premium_approved=approved)
 
 def set_user_news_prefs(user_id: int, geo: int=None, cb: int=None, cpi: int=None):
-    with _lock:
-        conn = _connect()
+    with _write() as conn:
+        fields = {}
         if geo is not None:
-            conn.execute("UPDATE users SET news_geo=? WHERE user_id=?", (geo, user_id))
+            conn.execute("UPDATE users SET news_geo=? WHERE user_id=?", (geo, user_id)); fields["news_geo"] = geo
         if cb is not None:
-            conn.execute("UPDATE users SET news_cb=? WHERE user_id=?", (cb, user_id))
+            conn.execute("UPDATE users SET news_cb=? WHERE user_id=?", (cb, user_id)); fields["news_cb"] = cb
         if cpi is not None:
-            conn.execute("UPDATE users SET news_cpi=? WHERE user_id=?", (cpi, user_id))
-        conn.commit(); conn.close()
+            conn.execute("UPDATE users SET news_cpi=? WHERE user_id=?", (cpi, user_id)); fields["news_cpi"] = cpi
+        _cache_update(user_id, **fields)
 
-def get_user(user_id: int) -> Optional[sqlite3.Row]:
-    with _lock:
-        conn = _connect()
-        cur = conn.execute("SELECT * FROM users WHERE user_id=?", (user_id,))
-        row = cur.fetchone(); conn.close()
+def get_user(user_id: int) -> Optional[Dict]:
+    global _profile_misses
+    row = cached_user(user_id)
+    if row is not None:
         return row
+    with _profiles_lock:
+        _profile_misses += 1
+        epoch = _profiles_epoch
+    db_row = _reader().execute("SELECT * FROM users WHERE user_id=?", (user_id,)).fetchone()
+    if db_row is None:
+        return None
+    row = dict(db_row)
+    with _profiles_lock:
+        if epoch == _profiles_epoch:
+            _profiles[user_id] = row
+            _profile_loaded[user_id] = time.monotonic()
+            while len(_profiles) > USER_CACHE_SIZE:
+                _profile_loaded.pop(_profiles.popitem(last=False)[0], None)
+    return dict(row)
 
 def list_users() -> List[sqlite3.Row]:
-    with _lock:
-        conn = _connect()
-        rows = conn.execute("SELECT * FROM users ORDER BY registered_at DESC").fetchall()
-        conn.close(); return rows
+    return _reader().execute("SELECT * FROM users ORDER BY registered_at DESC").fetchall()
+
+# Subscription index: news category -> users column (each backed by a partial index)
+NEWS_CATEGORY_COLUMNS = {
+    "Geopolitical Events": "news_geo",
+    "Central Bank News (Fed, ECB)": "news_cb",
+    "Inflation & Economic Data": "news_cpi",
+}
+
+def list_news_subscribers(category: str) -> List[int]:
+    col = NEWS_CATEGORY_COLUMNS.get(category)
+    if col is None:
+        return []
+    return [r[0] for r in _reader().execute(f"SELECT user_id FROM users WHERE {col}=1")]
+
+def list_alert_subscribers(instrument: str) -> List[int]:
+    rows = _reader().execute("SELECT user_id FROM alerts WHERE instrument=? AND enabled=1", (instrument,))
+    return [r[0] for r in rows]
 
 def toggle_alert(user_id: int, instrument: str) -> bool:
-    with _lock:
-        conn = _connect()
-        cur = conn.execute("SELECT enabled FROM alerts WHERE user_id=? AND instrument=?", (user_id, instrument))
-        row = cur.fetchone()
+    with _write() as conn:
+        row = conn.execute("SELECT enabled FROM alerts WHERE user_id=? AND instrument=?", (user_id, instrument)).fetchone()
         if row:
             new_val = 0 if row["enabled"] else 1
             conn.execute("UPDATE alerts SET enabled=? WHERE user_id=? AND instrument=?", (new_val, user_id, instrument))
         else:
             new_val = 1
             conn.execute("INSERT INTO alerts(user_id, instrument, enabled) VALUES (?, ?, 1)", (user_id, instrument))
-        conn.commit(); conn.close()
         return bool(new_val)
 
 def alert_enabled(user_id: int, instrument: str) -> bool:
-    with _lock:
-        conn = _connect()
-        row = conn.execute("SELECT enabled FROM alerts WHERE user_id=? AND instrument=?", (user_id, instrument)).fetchone()
-        conn.close()
-        return bool(row["enabled"]) if row else False
+    row = _reader().execute("SELECT enabled FROM alerts WHERE user_id=? AND instrument=?", (user_id, instrument)).fetchone()
+    return bool(row["enabled"]) if row else False
 
 def mark_feedback_ts(user_id: int, ts: int):
-    with _lock:
-        conn = _connect()
+    with _write() as conn:
         conn.execute("UPDATE users SET feedback_last_ts=? WHERE user_id=?", (ts, user_id))
-        conn.commit(); conn.close()
+        _cache_update(user_id, feedback_last_ts=ts)
 
 def set_free_signal_date(user_id: int, day_str: str):
-    with _lock:
-        conn = _connect()
+    with _write() as conn:
         conn.execute("UPDATE users SET free_signal_date=? WHERE user_id=?", (day_str, user_id))
-        conn.commit(); conn.close()
+        _cache_update(user_id, free_signal_date=day_str)
 
 def set_cooldown(user_id: int, until_iso: str):
-    with _lock:
-        conn = _connect()
+    with _write() as conn:
         conn.execute("UPDATE users SET cooldown_until=?, daily_loss_count=0 WHERE user_id=?", (until_iso, user_id))
-        conn.commit(); conn.close()
+        _cache_update(user_id, cooldown_until=until_iso, daily_loss_count=0)
 
 def inc_daily_loss(user_id: int) -> int:
-    with _lock:
-        conn = _connect()
+    with _write() as conn:
         row = conn.execute("SELECT daily_loss_count FROM users WHERE user_id=?", (user_id,)).fetchone()
         count = (row["daily_loss_count"] if row else 0) + 1
         conn.execute("UPDATE users SET daily_loss_count=? WHERE user_id=?", (count, user_id))
-        conn.commit(); conn.close()
+        _cache_update(user_id, daily_loss_count=count)
         return count
+
+def set_metaapi_token(user_id: int, token: str):
+    """Link a user's MetaApi token; linking an account grants premium."""
+    with _write() as conn:
+        conn.execute("UPDATE users SET metaapi_token=?, tier=?, premium_approved=? WHERE user_id=?", (token, "premium", 1, user_id))
+        _cache_update(user_id, metaapi_token=token, tier="premium", premium_approved=1)
+
+def add_payment(user_id: int, method: str, screenshot_file_id: str):
+    with _write() as conn:
+        conn.execute("INSERT INTO payments(user_id, method, screenshot_file_id, created_at) VALUES (?, ?, ?, datetime('now'))", (user_id, method, screenshot_file_id))
+
+# Broadcast jobs (per-recipient status makes jobs resumable without double-sending)
+def create_broadcast(text: str, created_by: int, progress_chat_id: int, progress_message_id: int) -> int:
+    with _write() as conn:
+        cur = conn.execute("""
+        INSERT INTO broadcast_jobs(text, created_by, progress_chat_id, progress_message_id, status, created_at)
+        VALUES (?, ?, ?, ?, 'running', datetime('now'))
+        """, (text, created_by, progress_chat_id, progress_message_id))
+        job_id = cur.lastrowid
+        conn.execute("INSERT INTO broadcast_recipients(job_id, user_id) SELECT ?, user_id FROM users", (job_id,))
+        total = conn.execute("SELECT COUNT(*) FROM broadcast_recipients WHERE job_id=?", (job_id,)).fetchone()[0]
+        conn.execute("UPDATE broadcast_jobs SET total=? WHERE id=?", (total, job_id))
+        return job_id
+
+def get_broadcast(job_id: int) -> Optional[sqlite3.Row]:
+    return _reader().execute("SELECT * FROM broadcast_jobs WHERE id=?", (job_id,)).fetchone()
+
+def list_running_broadcasts() -> List[sqlite3.Row]:
+    return _reader().execute("SELECT * FROM broadcast_jobs WHERE status='running' ORDER BY id").fetchall()
+
+def pending_broadcast_recipients(job_id: int, limit: int = 500) -> List[int]:
+    rows = _reader().execute(
+        "SELECT user_id FROM broadcast_recipients WHERE job_id=? AND status='pending' LIMIT ?", (job_id, limit)
+    ).fetchall()
+    return [r["user_id"] for r in rows]
+
+def mark_broadcast_recipient(job_id: int, user_id: int, status: str, error: str = None):
+    with _write() as conn:
+        conn.execute(
+            "UPDATE broadcast_recipients SET status=?, attempts=attempts+1, error=? WHERE job_id=? AND user_id=?",
+            (status, error, job_id, user_id),
+        )
+
+def broadcast_counts(job_id: int) -> Dict[str, int]:
+    rows = _reader().execute(
+        "SELECT status, COUNT(*) AS n FROM broadcast_recipients WHERE job_id=? GROUP BY status", (job_id,)
+    ).fetchall()
+    return {r["status"]: r["n"] for r in rows}
+
+def finish_broadcast(job_id: int, status: str = "done"):
+    with _write() as conn:
+        conn.execute("UPDATE broadcast_jobs SET status=?, finished_at=datetime('now') WHERE id=?", (status, job_id))
+
+# News dedupe: first time each headline hash was seen, and per-user delivery watermarks
+def record_headlines(items: List[Tuple[str, str, str]], now: float) -> Dict[str, float]:
+    """
+    items: (hash, title, url). Inserts unseen hashes; returns hash -> first_seen for all.
+    New hashes get strictly increasing first_seen values in batch order (now + i * 0.1 ms),
+    so a delivery watermark can stop between two headlines of the same batch.
+    """
+    with _write() as conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO seen_headlines(hash, title, url, first_seen) VALUES (?, ?, ?, ?)",
+            [(h, t, u, now + i * 1e-4) for i, (h, t, u) in enumerate(items)],
+        )
+        out = {}
+        hashes = [h for h, _, _ in items]
+        for i in range(0, len(hashes), 500):
+            chunk = hashes[i:i + 500]
+            q = "SELECT hash, first_seen FROM seen_headlines WHERE hash IN (%s)" % ",".join("?" * len(chunk))
+            out.update({r["hash"]: r["first_seen"] for r in conn.execute(q, chunk)})
+        return out
+
+def purge_seen_headlines(older_than: float) -> int:
+    with _write() as conn:
+        return conn.execute("DELETE FROM seen_headlines WHERE first_seen < ?", (older_than,)).rowcount
+
+def get_news_watermarks(user_ids: List[int]) -> Dict[int, float]:
+    out = {}
+    conn = _reader()
+    for i in range(0, len(user_ids), 500):
+        chunk = user_ids[i:i + 500]
+        q = "SELECT user_id, last_ts FROM news_watermarks WHERE user_id IN (%s)" % ",".join("?" * len(chunk))
+        out.update({r["user_id"]: r["last_ts"] for r in conn.execute(q, chunk)})
+    return out
+
+def set_news_watermarks(marks: Dict[int, float]):
+    with _write() as conn:
+        conn.executemany("""
+        INSERT INTO news_watermarks(user_id, last_ts) VALUES (?, ?)
+        ON CONFLICT(user_id) DO UPDATE SET last_ts=MAX(last_ts, excluded.last_ts)
+        """, list(marks.items()))
+
+# Economic calendar: timed events parsed from ForexFactory
+def upsert_calendar_events(events: List[Dict]) -> int:
+    rows = [(e["event_utc"], e["currency"], e["title"], e["impact"]) for e in events if e.get("event_utc") is not None]
+    with _write() as conn:
+        conn.executemany("""
+        INSERT INTO calendar_events(event_utc, currency, title, impact) VALUES (?, ?, ?, ?)
+        ON CONFLICT(event_utc, currency, title) DO UPDATE SET impact=excluded.impact
+        """, rows)
+    return len(rows)
+
+def purge_calendar_events(older_than: float) -> int:
+    with _write() as conn:
+        return conn.execute("DELETE FROM calendar_events WHERE event_utc < ?", (older_than,)).rowcount
+
+def list_calendar_events(since: float, impact: str = None) -> List[Dict]:
+    q = "SELECT event_utc, currency, title, impact FROM calendar_events WHERE event_utc >= ?"
+    args = [since]
+    if impact:
+        q += " AND impact=?"
+        args.append(impact)
+    return [dict(r) for r in _reader().execute(q + " ORDER BY event_utc", args)]
@@ -0,0 +1,159 @@
+import asyncio, time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from services import db
+from services.logger import get_logger
+from config import DB_READ_THREADS, DB_WRITE_BATCH
+
+logger = get_logger("db_async")
+
+# Async data-access API for code running on the event loop. Reads go to a small thread
+# pool (each thread has its own pooled reader connection); writes are queued and applied
+# by a single writer thread, many queued writes per transaction.
+_read_executor = ThreadPoolExecutor(max_workers=DB_READ_THREADS, thread_name_prefix="db-read")
+_write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="db-write")
+
+def _apply_batch(ops: List[Tuple[Callable, tuple]]) -> List[Tuple[bool, Any]]:
+    """Run queued writes in one transaction; each op gets a savepoint so one failure
+    doesn't undo the others."""
+    results = []
+    with db._write() as conn:
+        if not conn.in_transaction:
+            conn.execute("BEGIN")
+        for fn, args in ops:
+            conn.execute("SAVEPOINT op")
+            mark = db._cache_mark()
+            try:
+                val = fn(*args)
+                conn.execute("RELEASE op")
+                results.append((True, val))
+            except Exception as e:
+                conn.execute("ROLLBACK TO op")
+                db._cache_rollback(mark)
+                conn.execute("RELEASE op")
+                results.append((False, e))
+    return results
+
+class _WriteBatcher:
+    def __init__(self, max_batch: int):
+        self.max_batch = max_batch
+        self._queue: Optional[asyncio.Queue] = None
+        self._task: Optional[asyncio.Task] = None
+        self.batches = 0
+        self.ops = 0
+        self.last_batch_ms: Optional[float] = None
+
+    def _ensure_running(self):
+        if self._task is None or self._task.done():
+            self._queue = asyncio.Queue()
+            self._task = asyncio.create_task(self._run())
+
+    async def submit(self, fn: Callable, *args) -> Any:
+        self._ensure_running()
+        fut = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((fn, args, fut))
+        return await fut
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            t0 = time.perf_counter()
+            try:
+                results = await loop.run_in_executor(_write_executor, _apply_batch, [(fn, args) for fn, args, _ in batch])
+            except Exception as e:
+                logger.exception("Write batch of %d failed: %s", len(batch), e)
+                results = [(False, e)] * len(batch)
+            self.batches += 1
+            self.ops += len(batch)
+            self.last_batch_ms = round((time.perf_counter() - t0) * 1000, 2)
+            for (_, _, fut), (ok, val) in zip(batch, results):
+                if fut.done():
+                    continue
+                if ok:
+                    fut.set_result(val)
+                else:
+                    fut.set_exception(val)
+            for _ in batch:
+                self._queue.task_done()
+
+    async def flush(self):
+        if self._queue is not None and self._task is not None and not self._task.done():
+            await self._queue.join()
+
+    def stats(self) -> Dict:
+        return {
+            "batches": self.batches, "ops": self.ops,
+            "avg_batch": round(self.ops / self.batches, 2) if self.batches else 0.0,
+            "pending": self._queue.qsize() if self._queue else 0, "last_batch_ms": self.last_batch_ms,
+        }
+
+_writer = _WriteBatcher(DB_WRITE_BATCH)
+
+async def run_read(fn: Callable, *args) -> Any:
+    """Run any blocking read-only DB function off the event loop."""
+    return await asyncio.get_running_loop().run_in_executor(_read_executor, fn, *args)
+
+async def run_write(fn: Callable, *args) -> Any:
+    """Queue a DB write function; it is applied in the next batch transaction."""
+    return await _writer.submit(fn, *args)
+
+async def flush():
+    await _writer.flush()
+
+def stats() -> Dict:
+    return _writer.stats()
+
+# Reads
+async def get_user(user_id: int):
+    # Hot profiles are answered from the write-through cache without a thread hop
+    row = db.cached_user(user_id)
+    return row if row is not None else await run_read(db.get_user, user_id)
+
+async def list_users():
+    return await run_read(db.list_users)
+
+async def alert_enabled(user_id: int, instrument: str) -> bool:
+    return await run_read(db.alert_enabled, user_id, instrument)
+
+# Writes
+async def upsert_user(user_id: int, username: str, full_name: str):
+    return await run_write(db.upsert_user, user_id, username, full_name)
+
+async def set_user_tier(user_id: int, tier: str, approved: int = 0):
+    return await run_write(db.set_user_tier, user_id, tier, approved)
+
+async def set_user_news_prefs(user_id: int, geo: int=None, cb: int=None, cpi: int=None):
+    return await run_write(db.set_user_news_prefs, user_id, geo, cb, cpi)
+
+async def toggle_alert(user_id: int, instrument: str) -> bool:
+    return await run_write(db.toggle_alert, user_id, instrument)
+
+async def mark_feedback_ts(user_id: int, ts: int):
+    return await run_write(db.mark_feedback_ts, user_id, ts)
+
+async def set_free_signal_date(user_id: int, day_str: str):
+    return await run_write(db.set_free_signal_date, user_id, day_str)
+
+async def set_cooldown(user_id: int, until_iso: str):
+    return await run_write(db.set_cooldown, user_id, until_iso)
+
+async def inc_daily_loss(user_id: int) -> int:
+    return await run_write(db.inc_daily_loss, user_id)
+
+async def set_metaapi_token(user_id: int, token: str):
+    return await run_write(db.set_metaapi_token, user_id, token)
+
+async def add_payment(user_id: int, method: str, screenshot_file_id: str):
+    return await run_write(db.add_payment, user_id, method, screenshot_file_id)
+
+async def create_broadcast(text: str, created_by: int, progress_chat_id: int, progress_message_id: int) -> int:
+    return await run_write(db.create_broadcast, text, created_by, progress_chat_id, progress_message_id)
+
+async def mark_broadcast_recipient(job_id: int, user_id: int, status: str, error: str = None):
+    return await run_write(db.mark_broadcast_recipient, job_id, user_id, status, error)
+
+async def finish_broadcast(job_id: int, status: str = "done"):
+    return await run_write(db.finish_broadcast, job_id, status)
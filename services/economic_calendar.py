@@ -0,0 +1,65 @@
+import bisect, time
+from typing import Dict, List, Optional, Set
+from services.logger import get_logger
+from services.db import list_calendar_events, upsert_calendar_events, purge_calendar_events
+from services.db_async import run_read, run_write
+from services.forexfactory_scraper import fetch_calendar_events
+from utils.constants import INSTRUMENT_CURRENCIES
+
+logger = get_logger("calendar")
+
+KEEP_PAST_S = 2 * 86400  # events older than this are purged on refresh
+
+def instrument_currencies(instrument: str) -> Set[str]:
+    """Calendar currencies that affect an instrument ("EUR/USD" -> {"EUR", "USD"})."""
+    if instrument in INSTRUMENT_CURRENCIES:
+        return set(INSTRUMENT_CURRENCIES[instrument])
+    return {p.strip().upper() for p in instrument.split("/") if p.strip()}
+
+class CalendarTimeline:
+    """
+    Sorted in-memory timeline of timed high-impact events. A range query is a bisect,
+    so it costs O(log n) and never does I/O; the lockdown windows themselves are
+    computed from it by services.lockdown.
+    """
+    def __init__(self):
+        self._times: List[float] = []
+        self._events: List[Dict] = []
+        self.loaded_at: Optional[float] = None
+
+    def load(self, events: List[Dict], now: float = None):
+        events = sorted((e for e in events if e.get("event_utc") is not None and e.get("impact") == "High"),
+                        key=lambda e: e["event_utc"])
+        # Swap both lists in one go so concurrent readers never see a half-built timeline
+        self._times, self._events = [e["event_utc"] for e in events], events
+        self.loaded_at = time.time() if now is None else now
+
+    def events_between(self, start: float, end: float, currencies: Set[str] = None) -> List[Dict]:
+        times, events = self._times, self._events
+        lo, hi = bisect.bisect_left(times, start), bisect.bisect_right(times, end)
+        return [e for e in events[lo:hi] if currencies is None or e["currency"] in currencies]
+
+    def stats(self) -> Dict:
+        return {"events": len(self._events), "loaded_at": self.loaded_at}
+
+timeline = CalendarTimeline()
+
+def load_calendar(now: float = None):
+    """Fill the timeline from SQLite (startup: no network needed)."""
+    now = time.time() if now is None else now
+    timeline.load(list_calendar_events(now - KEEP_PAST_S, impact="High"), now)
+
+async def refresh_calendar() -> int:
+    """
+    Ingestion job: scrape the calendar, persist the timed events and reload the
+    timeline. On a failed scrape the previous timeline is kept.
+    """
+    events = await fetch_calendar_events()
+    if not events:
+        return 0
+    now = time.time()
+    stored = await run_write(upsert_calendar_events, events)
+    await run_write(purge_calendar_events, now - KEEP_PAST_S)
+    timeline.load(await run_read(list_calendar_events, now - KEEP_PAST_S, "High"), now)
+    logger.info("Calendar refreshed: %d timed events, %d high-impact in timeline", stored, timeline.stats()["events"])
+    return stored
@@ -1,40 +1,92 @@
-import requests, datetime as dt
+import asyncio, re, datetime as dt
+from typing import Dict, List, Optional
+import pytz
 from bs4 import BeautifulSoup
 from services.logger import get_logger
+from services.http_client import fetcher
+from config import FOREXFACTORY_CALENDAR_URL, FOREXFACTORY_TZ
 
 logger = get_logger("ffactory")
 
-def upcoming_high_impact_within(minutes: int = 30) -> bool:
+_MONTHS = {m: i for i, m in enumerate(["Jan","Feb","Mar","Apr","May","Jun","Jul","Aug","Sep","Oct","Nov","Dec"], 1)}
+_DATE_RE = re.compile(r"([A-Z][a-z]{2})\s*(\d{1,2})\b")
+_TIME_RE = re.compile(r"^(\d{1,2}):(\d{2})\s*(am|pm)$", re.I)
+_IMPACTS = {"red": "High", "ora": "Medium", "yel": "Low", "gra": "Holiday"}
+
+def _impact(cell) -> str:
+    if cell is None:
+        return ""
+    span = cell.find("span")
+    if span is not None:
+        for cls in span.get("class", []):
+            if cls.startswith("icon--ff-impact-"):
+                return _IMPACTS.get(cls.rsplit("-", 1)[-1][:3], "")
+        title = (span.get("title") or "").split(" ")[0]
+        if title in ("High", "Medium", "Low"):
+            return title
+    return ""
+
+def _infer_year(month: int, now: dt.datetime) -> int:
+    # The calendar shows no year; handle the week that straddles New Year
+    if month == 1 and now.month == 12:
+        return now.year + 1
+    if month == 12 and now.month == 1:
+        return now.year - 1
+    return now.year
+
+def parse_calendar_events(html: str, now: Optional[dt.datetime] = None, tz_name: str = FOREXFACTORY_TZ) -> List[Dict]:
+    """
+    Structured events from a ForexFactory calendar page:
+    {'currency', 'impact' ('High'|'Medium'|'Low'|'Holiday'), 'title', 'event_utc' (epoch seconds or None)}.
+    Date cells only appear on a day's first row and time cells only when the time
+    changes, so both carry over to following rows. All-day/tentative events get None.
+    """
+    tz = pytz.timezone(tz_name)
+    now = now or dt.datetime.now(tz)
+    soup = BeautifulSoup(html, "lxml")
+    events = []
+    day: Optional[dt.date] = None
+    clock: Optional[dt.time] = None
+    for row in soup.select("tr.calendar__row"):
+        date_cell = row.find("td", class_="calendar__date")
+        if date_cell is not None:
+            m = _DATE_RE.search(date_cell.get_text(" ", strip=True))
+            if m and m.group(1) in _MONTHS:
+                month = _MONTHS[m.group(1)]
+                day = dt.date(_infer_year(month, now), month, int(m.group(2)))
+                clock = None
+        time_cell = row.find("td", class_="calendar__time")
+        if time_cell is not None:
+            t = time_cell.get_text(strip=True)
+            if t:
+                tm = _TIME_RE.match(t)
+                if tm:
+                    hour = int(tm.group(1)) % 12 + (12 if tm.group(3).lower() == "pm" else 0)
+                    clock = dt.time(hour, int(tm.group(2)))
+                else:
+                    clock = None  # 'All Day', 'Tentative', 'Day 2', ...
+        currency_cell = row.find("td", class_="calendar__currency")
+        title_cell = row.find("td", class_="calendar__event")
+        if currency_cell is None or title_cell is None or day is None:
+            continue
+        currency = currency_cell.get_text(strip=True).upper()
+        title = title_cell.get_text(" ", strip=True)
+        if not currency or not title:
+            continue
+        event_utc = None
+        if clock is not None:
+            event_utc = tz.localize(dt.datetime.combine(day, clock)).timestamp()
+        events.append({"currency": currency, "impact": _impact(row.find("td", class_="calendar__impact")),
+                       "title": title, "event_utc": event_utc})
+    return events
+
+async def fetch_calendar_events() -> List[Dict]:
     """
-    Scrapes ForexFactory calendar for upcoming 'High' impact events within +/- minutes.
-    Returns True if lockdown should be active.
+    Download and parse this week's ForexFactory calendar ([] on failure).
     """
     try:
-        url = "https://www.forexfactory.com/calendar"
-        r = requests.get(url, timeout=15)
-        soup = BeautifulSoup(r.text, "lxml")
-        now = dt.datetime.utcnow()
-        # Simple heuristic (structure may change; guarded)
-        rows = soup.select("tr.calendar__row")
-        for row in rows[:200]:
-            impact = row.get_text(" ").lower()
-            if "high" in impact or "red" in impact:
-                time_txt = row.find("td", {"class": "calendar__time"})
-                if time_txt:
-                    t = time_txt.get_text(strip=True)
-                    # ForexFactory times are in the user's locale; treat as UTC heuristic fallback
-                    # If parsing fails, we fallback to 'True' within the session to be safe
-                    # (capital protection > permissiveness)
-                    try:
-                        # Expect e.g. '3:30pm' or 'All Day'—skip non-times
-                        if ":" in t or "am" in t or "pm" in t:
-                            # Very rough parse: convert to today's time UTC (assumption)
-                            # This is intentionally conservative & logged.
-                            return True
-                    except Exception as _:
-                        return True
-        return False
+        html = await fetcher.get_text(FOREXFACTORY_CALENDAR_URL)
+        return await asyncio.to_thread(parse_calendar_events, html)
     except Exception as e:
         logger.exception("ForexFactory scraping failed: %s", e)
-        # Fail-safe: do not block if scrape fails
-        return False
+        return []
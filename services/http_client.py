@@ -0,0 +1,98 @@
+import asyncio, time
+from typing import Dict, Optional
+import aiohttp
+from services.logger import get_logger
+from config import HTTP_CACHE_TTL, HTTP_TIMEOUT, HTTP_POOL_SIZE, HTTP_RETRIES
+
+logger = get_logger("http")
+
+DEFAULT_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Encoding": "gzip, deflate"}
+# Worth another try: rate limiting and server-side trouble (other 4xx won't change on retry)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+class _CachedResponse:
+    __slots__ = ("body", "etag", "last_modified", "fetched_at")
+
+    def __init__(self, body: str, etag: Optional[str], last_modified: Optional[str], fetched_at: float):
+        self.body, self.etag, self.last_modified, self.fetched_at = body, etag, last_modified, fetched_at
+
+class HttpFetcher:
+    """
+    Shared aiohttp session (pooled keep-alive connections, gzip) with a short-TTL response
+    cache. Once an entry is older than its TTL it is revalidated with a conditional GET
+    (If-None-Match / If-Modified-Since); a 304 reuses the cached body. Timeouts, connection
+    errors and RETRY_STATUSES are retried with exponential backoff.
+    """
+    def __init__(self, ttl: float = HTTP_CACHE_TTL, timeout: float = HTTP_TIMEOUT, pool_size: int = HTTP_POOL_SIZE,
+                 retries: int = HTTP_RETRIES, backoff: float = 0.5):
+        self.ttl = ttl
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.retries = retries
+        self.backoff = backoff
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._cache: Dict[str, _CachedResponse] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.hits = 0
+        self.not_modified = 0
+        self.downloads = 0
+        self.retried = 0
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size, ttl_dns_cache=300),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers=DEFAULT_HEADERS,
+            )
+        return self._session
+
+    async def get_text(self, url: str, ttl: float = None, headers: Dict[str, str] = None) -> str:
+        """Body of url as text; raises on network errors and non-2xx/304 responses."""
+        ttl = self.ttl if ttl is None else ttl
+        entry = self._cache.get(url)
+        if entry and time.monotonic() - entry.fetched_at < ttl:
+            self.hits += 1
+            return entry.body
+        lock = self._locks.setdefault(url, asyncio.Lock())
+        async with lock:
+            entry = self._cache.get(url)
+            if entry and time.monotonic() - entry.fetched_at < ttl:
+                self.hits += 1
+                return entry.body
+            req_headers = dict(headers or {})
+            if entry and entry.etag:
+                req_headers["If-None-Match"] = entry.etag
+            if entry and entry.last_modified:
+                req_headers["If-Modified-Since"] = entry.last_modified
+            for attempt in range(self.retries + 1):
+                try:
+                    return await self._fetch(url, req_headers, entry)
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    if attempt == self.retries or (isinstance(e, aiohttp.ClientResponseError) and e.status not in RETRY_STATUSES):
+                        raise
+                    self.retried += 1
+                    logger.warning("GET %s failed (%r), retry %d/%d", url, e, attempt + 1, self.retries)
+                    await asyncio.sleep(self.backoff * 2 ** attempt)
+
+    async def _fetch(self, url: str, req_headers: Dict[str, str], entry: Optional[_CachedResponse]) -> str:
+        async with self._get_session().get(url, headers=req_headers) as r:
+            if r.status == 304 and entry:
+                self.not_modified += 1
+                entry.fetched_at = time.monotonic()
+                return entry.body
+            r.raise_for_status()
+            body = await r.text()
+            self.downloads += 1
+            self._cache[url] = _CachedResponse(body, r.headers.get("ETag"), r.headers.get("Last-Modified"), time.monotonic())
+            return body
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def stats(self) -> Dict:
+        return {"cache_hits": self.hits, "not_modified": self.not_modified, "downloads": self.downloads, "retried": self.retried, "cached_urls": len(self._cache)}
+
+fetcher = HttpFetcher()
@@ -0,0 +1,94 @@
+import asyncio, time
+from typing import Callable, Dict, List, Optional, Tuple
+from services.logger import get_logger
+from services.economic_calendar import CalendarTimeline, instrument_currencies
+from config import LOCKDOWN_BEFORE_MIN, LOCKDOWN_AFTER_MIN
+
+logger = get_logger("lockdown")
+
+def merge_windows(events: List[Dict], before_s: float, after_s: float) -> Dict[str, List[Tuple[float, float]]]:
+    """Per-currency [event - before, event + after] windows, overlapping ones merged."""
+    windows: Dict[str, List[Tuple[float, float]]] = {}
+    for e in sorted(events, key=lambda e: e["event_utc"]):
+        start, end = e["event_utc"] - before_s, e["event_utc"] + after_s
+        spans = windows.setdefault(e["currency"], [])
+        if spans and start <= spans[-1][1]:
+            spans[-1] = (spans[-1][0], max(spans[-1][1], end))
+        else:
+            spans.append((start, end))
+    return windows
+
+class LockdownScheduler:
+    """
+    Event-driven news lockdown. From the calendar timeline it computes exact windows
+    per affected currency and arms loop timers for each window's start and end, so
+    is_locked(instrument) is a dict lookup and there is nothing to poll.
+    """
+    def __init__(self, timeline: CalendarTimeline, before_min: int = LOCKDOWN_BEFORE_MIN,
+                 after_min: int = LOCKDOWN_AFTER_MIN, clock: Callable[[], float] = time.time):
+        self.timeline = timeline
+        self.before_s = before_min * 60
+        self.after_s = after_min * 60
+        self.clock = clock
+        self._locked: Dict[str, float] = {}  # currency -> end of the active window
+        self._windows: Dict[str, List[Tuple[float, float]]] = {}
+        self._timers: List[asyncio.TimerHandle] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self.transitions = 0
+
+    def _lock(self, currency: str, end: float):
+        self._locked[currency] = end
+        self.transitions += 1
+        logger.info("Lockdown ON for %s until %s", currency, time.strftime("%H:%M UTC", time.gmtime(end)))
+
+    def _unlock(self, currency: str, end: float):
+        # A later merged window may have extended the lock; only the matching end releases it
+        if self._locked.get(currency) == end:
+            del self._locked[currency]
+            self.transitions += 1
+            logger.info("Lockdown OFF for %s", currency)
+
+    def rebuild(self):
+        """Recompute windows from the timeline and re-arm timers (call after each calendar refresh)."""
+        loop = self._loop = asyncio.get_running_loop()
+        for handle in self._timers:
+            handle.cancel()
+        self._timers = []
+        now = self.clock()
+        events = self.timeline.events_between(now - self.after_s, float("inf"))
+        self._windows = merge_windows(events, self.before_s, self.after_s)
+        locked: Dict[str, float] = {}
+        for currency, spans in self._windows.items():
+            for start, end in spans:
+                if end <= now:
+                    continue
+                if start <= now:
+                    locked[currency] = end
+                else:
+                    self._timers.append(loop.call_at(loop.time() + (start - now), self._lock, currency, end))
+                self._timers.append(loop.call_at(loop.time() + (end - now), self._unlock, currency, end))
+        self._locked = locked
+        logger.info("Lockdown windows armed: %d timers, locked now: %s", len(self._timers), sorted(locked) or "none")
+
+    def is_locked(self, instrument: Optional[str] = None) -> bool:
+        """True if any currency of instrument (or any currency at all) is inside a window."""
+        now = self.clock()
+        if instrument is None:
+            return any(end > now for end in self._locked.values())
+        # The end check keeps the answer right even if a close timer is late
+        return any(self._locked.get(c, 0) > now for c in instrument_currencies(instrument))
+
+    def locked_currencies(self) -> List[str]:
+        now = self.clock()
+        return sorted(c for c, end in self._locked.items() if end > now)
+
+    def _pending_timers(self) -> int:
+        # A handle that already fired is not "cancelled", so drop those by their due time
+        if self._loop is not None:
+            now = self._loop.time()
+            self._timers = [h for h in self._timers if not h.cancelled() and h.when() > now]
+        return len(self._timers)
+
+    def stats(self) -> Dict:
+        return {"locked": self.locked_currencies(), "windows": sum(len(s) for s in self._windows.values()),
+                "timers": self._pending_timers(), "transitions": self.transitions}
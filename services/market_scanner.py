@@ -0,0 +1,105 @@
+import asyncio, time
+from typing import Dict, List, Optional, Tuple
+from services.logger import get_logger
+from services.metaapi_client import get_master_connection
+from services.trading_engine import AnalysisError
+from utils.bars import bar_open, next_bar_close
+from utils.constants import CURRENCY_PAIRS, SINGLE_INSTRUMENTS
+
+logger = get_logger("scanner")
+
+ALL_INSTRUMENTS = CURRENCY_PAIRS + [i for group in SINGLE_INSTRUMENTS.values() for i in group]
+BOARD_TIMEFRAME = "15m"
+
+class SignalBoard:
+    """
+    In-memory board of the latest analysis per instrument. An entry is fresh while
+    we are still inside the M15 bar it was computed in; a fresh None means
+    "analyzed, no setup", which is as useful to the caller as a signal.
+    With a shared state backend, entries are mirrored there so worker processes
+    that don't run the scanner can read the leader's board.
+    """
+    def __init__(self, state=None):
+        self.state = state
+        self._entries: Dict[str, Dict] = {}
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+
+    def publish(self, instrument: str, signal: Optional[Dict], now: float = None):
+        now = time.time() if now is None else now
+        self._entries[instrument] = {"signal": signal, "bar": bar_open(now, BOARD_TIMEFRAME), "computed_at": now}
+
+    def lookup(self, instrument: str, now: float = None) -> Tuple[bool, Optional[Dict]]:
+        """(fresh, signal) for instrument; fresh is False when the board is stale or empty."""
+        now = time.time() if now is None else now
+        entry = self._entries.get(instrument)
+        if entry and entry["bar"] == bar_open(now, BOARD_TIMEFRAME):
+            self.hits += 1
+            return True, entry["signal"]
+        self.misses += 1
+        return False, None
+
+    async def publish_shared(self, instrument: str, signal: Optional[Dict], now: float = None):
+        now = time.time() if now is None else now
+        self.publish(instrument, signal, now)
+        if self.state is not None:
+            await self.state.set(f"board:{instrument}", self._entries[instrument],
+                                 ttl=next_bar_close(now, BOARD_TIMEFRAME) - now)
+
+    async def lookup_shared(self, instrument: str, now: float = None) -> Tuple[bool, Optional[Dict]]:
+        """lookup(), falling back to the shared board before reporting a miss."""
+        now = time.time() if now is None else now
+        fresh, sig = self.lookup(instrument, now)
+        if fresh or self.state is None:
+            return fresh, sig
+        entry = await self.state.get(f"board:{instrument}")
+        if entry and entry["bar"] == bar_open(now, BOARD_TIMEFRAME):
+            self._entries[instrument] = entry
+            self.shared_hits += 1
+            return True, entry["signal"]
+        return False, None
+
+    def snapshot(self) -> Dict[str, Dict]:
+        return dict(self._entries)
+
+    def stats(self) -> Dict:
+        return {"hits": self.hits, "misses": self.misses, "shared_hits": self.shared_hits,
+                "instruments": len(self._entries)}
+
+class MarketScanner:
+    """
+    Bar job: on every M15 close (settle_delay seconds later, so the closed bar is
+    available), analyze all instruments concurrently (bounded) through
+    SignalHandler.prepare_signal and publish the results to the board.
+    """
+    def __init__(self, handler, board: SignalBoard, instruments: List[str] = None,
+                 concurrency: int = 4, settle_delay: float = 5.0):
+        self.handler = handler
+        self.board = board
+        self.instruments = instruments or ALL_INSTRUMENTS
+        self.concurrency = concurrency
+        self.settle_delay = settle_delay
+        self.last_scan_s: Optional[float] = None
+
+    async def _scan_one(self, sem: asyncio.Semaphore, instrument: str):
+        async with sem:
+            try:
+                sig = await self.handler.prepare_signal(instrument)
+                await self.board.publish_shared(instrument, sig)
+            except AnalysisError as e:
+                # Nothing published: the board stays stale, so a failure never reads as "no setup"
+                logger.warning("Scan failed for %s: %s", instrument, e)
+            except Exception as e:
+                logger.exception("Scan failed for %s: %s", instrument, e)
+
+    async def scan_once(self):
+        # Without a master connection every analysis would fail; skip the whole scan
+        if not await get_master_connection():
+            logger.warning("Scan skipped: master connection unavailable")
+            return
+        t0 = time.perf_counter()
+        sem = asyncio.Semaphore(self.concurrency)
+        await asyncio.gather(*(self._scan_one(sem, i) for i in self.instruments))
+        self.last_scan_s = round(time.perf_counter() - t0, 3)
+        logger.info("Scanned %d instruments in %ss", len(self.instruments), self.last_scan_s)
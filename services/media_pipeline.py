@@ -0,0 +1,141 @@
+import os, asyncio
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Hashable, Optional
+from PIL import Image, ImageChops
+from services.logger import get_logger
+from config import SCREENSHOT_DIR, MEDIA_FORMAT, MEDIA_QUALITY, SCREENSHOT_DIR_MAX_MB
+
+logger = get_logger("media")
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="media")
+_EXT = {"JPEG": ".jpg", "WEBP": ".webp", "PNG": ".png"}
+
+def crop_to_canvas(img: Image.Image) -> Image.Image:
+    """Trim uniform page margins around the chart (background sampled at the top-left pixel)."""
+    bg = Image.new(img.mode, img.size, img.getpixel((0, 0)))
+    bbox = ImageChops.difference(img, bg).getbbox()
+    return img.crop(bbox) if bbox else img
+
+def compress_image(src: str, dest_stem: str, fmt: str = MEDIA_FORMAT, quality: int = MEDIA_QUALITY) -> str:
+    """
+    Crop src to the chart canvas and re-encode it as a compact JPEG/WebP next to it,
+    falling back to an optimized PNG when that is smaller (flat rendered charts).
+    Returns the new path; src is removed.
+    """
+    fmt = fmt.upper()
+    base = os.path.join(os.path.dirname(src), dest_stem)
+    with Image.open(src) as im:
+        img = crop_to_canvas(im.convert("RGB"))
+    candidates = []
+    for f in dict.fromkeys((fmt, "PNG")):
+        tmp = base + _EXT.get(f, ".jpg") + ".tmp"
+        if f == "PNG":
+            img.convert("P", palette=Image.ADAPTIVE, colors=64).save(tmp, format="PNG", optimize=True)
+        else:
+            img.save(tmp, format=f, quality=quality, optimize=True)
+        candidates.append((os.path.getsize(tmp), tmp))
+    candidates.sort()
+    for _, tmp in candidates[1:]:
+        os.remove(tmp)
+    best = candidates[0][1]
+    dest = best[:-len(".tmp")]
+    os.replace(best, dest)
+    if src != dest:
+        os.remove(src)
+    return dest
+
+def evict_screenshots(max_bytes: int = int(SCREENSHOT_DIR_MAX_MB * 1024 * 1024), directory: str = SCREENSHOT_DIR) -> int:
+    """Delete least-recently-used images until the directory is under max_bytes. Returns files removed."""
+    try:
+        entries = [e for e in os.scandir(directory) if e.is_file() and not e.name.startswith(".")]
+    except FileNotFoundError:
+        return 0
+    stats = [(e.stat().st_mtime, e.stat().st_size, e.path) for e in entries]
+    total = sum(s for _, s, _ in stats)
+    removed = 0
+    for _, size, path in sorted(stats):
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(path)
+            total -= size
+            removed += 1
+        except OSError as e:
+            logger.warning("Could not evict %s: %s", path, e)
+    if removed:
+        logger.info("Evicted %d old chart images from %s", removed, directory)
+    return removed
+
+def _touch(path: str):
+    # mtime doubles as the LRU timestamp (atime is often disabled)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+async def prepare_chart_image(path: str, dest_stem: str) -> str:
+    """Crop + compress a captured chart in the media thread pool, then enforce the disk cap."""
+    if not path or not os.path.exists(path):
+        return ""
+    loop = asyncio.get_running_loop()
+    try:
+        out = await loop.run_in_executor(_executor, compress_image, path, dest_stem)
+    except Exception as e:
+        logger.exception("Image compression failed for %s: %s", path, e)
+        out = path
+    await loop.run_in_executor(_executor, evict_screenshots)
+    return out
+
+class FileIdCache:
+    """
+    Telegram file_id per chart key (symbol, timeframe, bar). The first send uploads the
+    file; later sends of the same snapshot reuse the file_id with no upload.
+    """
+    def __init__(self, max_entries: int = 512):
+        self.max_entries = max_entries
+        self._ids: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.reused = 0
+        self.uploads = 0
+
+    def get(self, key: Hashable) -> Optional[str]:
+        fid = self._ids.get(key)
+        if fid is not None:
+            self._ids.move_to_end(key)
+        return fid
+
+    def put(self, key: Hashable, file_id: str):
+        self._ids[key] = file_id
+        self._ids.move_to_end(key)
+        while len(self._ids) > self.max_entries:
+            self._ids.popitem(last=False)
+
+    def forget(self, key: Hashable):
+        self._ids.pop(key, None)
+
+    async def reply_photo(self, message, key: Hashable, path: str, **kwargs):
+        fid = self.get(key)
+        if fid:
+            try:
+                sent = await message.reply_photo(photo=fid, **kwargs)
+                self.reused += 1
+                if path:
+                    _touch(path)
+                return sent
+            except Exception as e:
+                logger.warning("Cached file_id for %s rejected, re-uploading: %s", key, e)
+                self.forget(key)
+        if not path or not os.path.exists(path):
+            return None
+        with open(path, "rb") as fh:
+            sent = await message.reply_photo(photo=fh, **kwargs)
+        self.uploads += 1
+        _touch(path)
+        if sent and sent.photo:
+            self.put(key, sent.photo[-1].file_id)
+        return sent
+
+    def stats(self) -> Dict:
+        return {"entries": len(self._ids), "reused": self.reused, "uploads": self.uploads}
+
+chart_file_ids = FileIdCache()
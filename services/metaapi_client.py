@@ -1,6 +1,6 @@
 from services.logger import get_logger
-from config import METAAPI_TOKEN, MASTER_MT5_LOGIN
-import asyncio
+from config import METAAPI_TOKEN, MASTER_MT5_LOGIN, METAAPI_HEALTH_INTERVAL, METAAPI_RECONNECT_MAX_BACKOFF
+import asyncio, time
 from typing import Optional, List, Dict
 
 logger = get_logger("metaapi")
@@ -38,11 +38,17 @@ class MetaApiClient:
             logger.exception("Error fetching accounts: %s", e)
             return None
 
-    async def ensure_connected(self, account_obj) -> Optional[object]:
+    async def ensure_connected(self, account_obj, timings: Optional[Dict] = None) -> Optional[object]:
         try:
             connection = await account_obj.get_rpc_connection()
+            t0 = time.perf_counter()
             await connection.connect()
+            t1 = time.perf_counter()
             await connection.wait_synchronized()
+            t2 = time.perf_counter()
+            if timings is not None:
+                timings["connect_s"] = round(t1 - t0, 3)
+                timings["sync_s"] = round(t2 - t1, 3)
             return connection
         except Exception as e:
             logger.exception("Error connecting to account: %s", e)
@@ -90,10 +96,116 @@ class MetaApiClient:
             logger.exception("History fetch error: %s", e)
             return ([], [])
 
+class MasterConnectionManager:
+    """
+    Long-lived master account connection. The account object is resolved once,
+    a single synchronized RPC connection is kept open and shared by every caller,
+    and a background task health-checks it and reconnects with exponential backoff.
+    """
+    def __init__(self, client: MetaApiClient, login: str, health_interval: float = 30.0,
+                 max_backoff: float = 60.0, health_timeout: float = 10.0):
+        self.client = client
+        self.login = login
+        self.health_interval = health_interval
+        self.max_backoff = max_backoff
+        self.health_timeout = health_timeout
+        self._account = None
+        self._connection = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._health_task: Optional[asyncio.Task] = None
+        self._failures = 0
+        self._retry_at = 0.0
+        self.timings: Dict = {
+            "resolve_s": None, "connect_s": None, "sync_s": None,
+            "connected_at": None, "reconnects": 0, "health_failures": 0, "last_health_ok": None,
+        }
+
+    def _backoff(self) -> float:
+        return min(self.max_backoff, 2 ** max(0, self._failures - 1))
+
+    async def _connect(self) -> Optional[object]:
+        if self._account is None:
+            t0 = time.perf_counter()
+            self._account = await self.client.get_account_by_login(self.login)
+            self.timings["resolve_s"] = round(time.perf_counter() - t0, 3)
+        if self._account is None:
+            return None
+        conn = await self.client.ensure_connected(self._account, self.timings)
+        if conn is not None:
+            if self.timings["connected_at"] is not None:
+                self.timings["reconnects"] += 1
+            self.timings["connected_at"] = time.time()
+            logger.info("Master connection ready (resolve %ss, connect %ss, sync %ss)",
+                        self.timings["resolve_s"], self.timings["connect_s"], self.timings["sync_s"])
+        return conn
+
+    async def get_connection(self) -> Optional[object]:
+        """Return the shared synchronized connection, connecting on first use."""
+        if self._connection is not None:
+            return self._connection
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if self._connection is None and time.monotonic() >= self._retry_at:
+                self._connection = await self._connect()
+                if self._connection is None:
+                    self._failures += 1
+                    self._retry_at = time.monotonic() + self._backoff()
+                else:
+                    self._failures = 0
+            self._ensure_health_task()
+            return self._connection
+
+    def _ensure_health_task(self):
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def _drop_connection(self):
+        conn, self._connection = self._connection, None
+        if conn is not None:
+            try:
+                await conn.close()
+            except Exception as e:
+                logger.warning("Error closing stale master connection: %s", e)
+
+    async def _health_loop(self):
+        while True:
+            delay = self.health_interval if self._connection is not None else self._backoff()
+            await asyncio.sleep(delay)
+            try:
+                if self._connection is None:
+                    self._retry_at = 0.0
+                    await self.get_connection()
+                    continue
+                await asyncio.wait_for(self._connection.get_account_information(), self.health_timeout)
+                self.timings["last_health_ok"] = time.time()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.timings["health_failures"] += 1
+                self._failures += 1
+                logger.warning("Master connection health check failed (%s); reconnecting in %ss", e, self._backoff())
+                await self._drop_connection()
+
+    async def start(self) -> Optional[object]:
+        return await self.get_connection()
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+        await self._drop_connection()
+
+    def stats(self) -> Dict:
+        return dict(self.timings, connected=self._connection is not None, failures=self._failures)
+
+# Shared client + master connection (one per process)
+master_client = MetaApiClient(METAAPI_TOKEN)
+master = MasterConnectionManager(
+    master_client, MASTER_MT5_LOGIN,
+    health_interval=METAAPI_HEALTH_INTERVAL, max_backoff=METAAPI_RECONNECT_MAX_BACKOFF,
+)
+
 # Helper to get master connection
 async def get_master_connection() -> Optional[object]:
-    client = MetaApiClient(METAAPI_TOKEN)
-    acc = await client.get_account_by_login(MASTER_MT5_LOGIN)
-    if not acc:
-        return None
-    return await client.ensure_connected(acc)
+    return await master.get_connection()
@@ -0,0 +1,90 @@
+import re
+from typing import Dict, List, Set
+from services.economic_calendar import instrument_currencies
+from utils.constants import NEWS_CATEGORIES, CURRENCY_PAIRS, SINGLE_INSTRUMENTS
+
+GEO, CB, DATA = NEWS_CATEGORIES
+
+# Keyword -> labels. Matching is case-insensitive on whole words ("cut" won't hit "execute").
+CATEGORY_KEYWORDS = {
+    CB: ["fed", "federal reserve", "fomc", "ecb", "boe", "boj", "snb", "rba", "rbnz", "boc", "central bank",
+         "bank of england", "bank of japan", "bank of canada", "swiss national bank",
+         "reserve bank of australia", "reserve bank of new zealand",
+         "interest rate", "interest rates", "rate hike", "rate cut", "hike", "hikes", "cut", "cuts",
+         "powell", "lagarde", "bailey", "ueda", "monetary policy", "policymakers"],
+    DATA: ["inflation", "cpi", "ppi", "pce", "jobs", "payrolls", "nonfarm", "employment", "unemployment",
+           "jobless", "gdp", "retail sales", "pmi", "trade balance", "consumer prices"],
+    GEO: ["ukraine", "russia", "middle east", "israel", "iran", "china", "taiwan", "geopolitics", "geopolitical",
+          "sanction", "sanctions", "election", "elections", "war", "conflict", "tariff", "tariffs"],
+}
+CURRENCY_KEYWORDS = {
+    "USD": ["fed", "federal reserve", "fomc", "powell", "dollar", "greenback", "treasury", "treasuries",
+            "nonfarm", "payrolls", "u.s.", "united states"],
+    "EUR": ["ecb", "lagarde", "euro", "euro zone", "eurozone", "bund", "bunds"],
+    "GBP": ["boe", "bank of england", "bailey", "sterling", "pound", "gilts", "britain", "uk"],
+    "JPY": ["boj", "bank of japan", "ueda", "yen", "japan", "japanese"],
+    "CHF": ["snb", "swiss national bank", "swiss franc", "franc", "swiss"],
+    "AUD": ["rba", "reserve bank of australia", "aussie", "australian dollar", "australia"],
+    "CAD": ["boc", "bank of canada", "loonie", "canadian dollar", "canada"],
+    "NZD": ["rbnz", "reserve bank of new zealand", "kiwi", "new zealand"],
+}
+INSTRUMENT_KEYWORDS = {
+    "XAU/USD": ["gold", "bullion", "xau"],
+    "WTI / USOIL": ["oil", "crude", "wti", "brent", "opec", "opec+"],
+    "BTC/USD": ["bitcoin", "btc", "crypto", "cryptocurrency"],
+    "NAS100 / US_TECH": ["nasdaq", "nas100", "tech stocks", "wall street"],
+}
+
+INSTRUMENTS = CURRENCY_PAIRS + [i for group in SINGLE_INSTRUMENTS.values() for i in group]
+
+def _currency_instruments() -> Dict[str, List[str]]:
+    # Same currency mapping as the news lockdown, so both agree on what "USD news" touches
+    out: Dict[str, List[str]] = {}
+    for inst in INSTRUMENTS:
+        for ccy in instrument_currencies(inst):
+            out.setdefault(ccy, []).append(inst)
+    return out
+
+CURRENCY_INSTRUMENTS = _currency_instruments()
+
+def _build():
+    labels: Dict[str, Set] = {}
+    def add(keyword, label):
+        labels.setdefault(keyword.lower(), set()).add(label)
+    for cat, kws in CATEGORY_KEYWORDS.items():
+        for k in kws:
+            add(k, ("category", cat))
+    for ccy, kws in CURRENCY_KEYWORDS.items():
+        for k in kws:
+            add(k, ("currency", ccy))
+    for inst, kws in INSTRUMENT_KEYWORDS.items():
+        for k in kws:
+            add(k, ("instrument", inst))
+    # Direct pair mentions: "EUR/USD", "EURUSD"
+    for inst in CURRENCY_PAIRS:
+        add(inst, ("instrument", inst))
+        add(inst.replace("/", ""), ("instrument", inst))
+    # Longest first so "bank of japan" wins over "japan" at the same position
+    alternation = "|".join(re.escape(k) for k in sorted(labels, key=len, reverse=True))
+    return re.compile(r"(?<![\w/])(?:%s)(?![\w/])" % alternation, re.IGNORECASE), labels
+
+_PATTERN, _LABELS = _build()
+
+def classify_headline(title: str) -> Dict[str, List[str]]:
+    """
+    Multi-label tags for a headline in one regex pass:
+    {'categories': [...], 'currencies': [...], 'instruments': [...]}.
+    A currency tags every instrument that trades it ("ECB" -> EUR pairs); a headline
+    that matches nothing gets empty lists rather than a default category.
+    """
+    cats, ccys, insts = set(), set(), set()
+    for m in _PATTERN.finditer(title):
+        for kind, label in _LABELS[m.group(0).lower()]:
+            (cats if kind == "category" else ccys if kind == "currency" else insts).add(label)
+    for ccy in ccys:
+        insts.update(CURRENCY_INSTRUMENTS.get(ccy, ()))
+    return {
+        "categories": [c for c in NEWS_CATEGORIES if c in cats],
+        "currencies": sorted(ccys),
+        "instruments": [i for i in INSTRUMENTS if i in insts],
+    }
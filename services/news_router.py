@@ -1,25 +1,81 @@
-from typing import List, Dict
+import hashlib, time
+from typing import List, Dict, Tuple
 from services.logger import get_logger
-from services.reuters_scraper import fetch_reuters_fx_headlines
-from services.db import list_users
+from utils.urls import canonical_url
+from services.db import list_news_subscribers, list_alert_subscribers, record_headlines, purge_seen_headlines, get_news_watermarks
 from utils.constants import NEWS_CATEGORIES
+from config import NEWS_SEEN_TTL_HOURS, NEWS_DIGEST_MAX_ITEMS
 
 logger = get_logger("news")
 
+def headline_key(h: Dict) -> str:
+    """Stable identity of a headline: its source id or canonical URL, else its normalized title."""
+    basis = h.get("id") or h.get("canonical_url") or canonical_url(h.get("url", "")) or " ".join(h["title"].lower().split())
+    return hashlib.sha1(basis.encode("utf-8")).hexdigest()
+
+def stamp_headlines(headlines: List[Dict], now: float = None) -> List[Dict]:
+    """
+    Drop duplicates within the batch, record new headlines in the seen store and tag each
+    with 'key' and 'first_seen' (when we first saw it, possibly in an earlier tick).
+    Seen entries older than NEWS_SEEN_TTL_HOURS are purged.
+    """
+    now = time.time() if now is None else now
+    unique = {}
+    for h in headlines:
+        unique.setdefault(headline_key(h), h)
+    first_seen = record_headlines([(k, h["title"], h.get("url", "")) for k, h in unique.items()], now)
+    purge_seen_headlines(now - NEWS_SEEN_TTL_HOURS * 3600)
+    return [dict(h, key=k, first_seen=first_seen.get(k, now)) for k, h in unique.items()]
+
 def build_user_delivery(headlines: List[Dict]) -> Dict[int, List[Dict]]:
     """
-    Map user_id -> list of headlines matching their subscriptions.
+    Map user_id -> list of headlines matching their subscriptions: news categories
+    and instruments they have alerts on. Headlines are grouped by label and each group
+    goes to that label's subscriber set from the indexed lookups, so the cost is
+    O(headlines + matched users).
     """
-    out = {}
-    users = list_users()
-    for u in users:
-        prefs = []
-        if u["news_geo"]: prefs.append("Geopolitical Events")
-        if u["news_cb"]: prefs.append("Central Bank News (Fed, ECB)")
-        if u["news_cpi"]: prefs.append("Inflation & Economic Data")
-        if not prefs:
-            continue
-        user_items = [h for h in headlines if h["category"] in prefs]
-        if user_items:
-            out[u["user_id"]] = user_items
+    groups: Dict[Tuple[str, str], List[Dict]] = {}
+    for h in headlines:
+        for category in h.get("categories", ()):
+            groups.setdefault(("category", category), []).append(h)
+        for instrument in h.get("instruments", ()):
+            groups.setdefault(("instrument", instrument), []).append(h)
+    out: Dict[int, List[Dict]] = {}
+    multi = set()
+    for (kind, label), items in groups.items():
+        subscribers = list_news_subscribers(label) if kind == "category" else list_alert_subscribers(label)
+        for uid in subscribers:
+            if uid in out:
+                out[uid] = out[uid] + items
+                multi.add(uid)
+            else:
+                out[uid] = items
+    if multi:
+        # Users matched through several labels get each headline once, in page order
+        order = {id(h): i for i, h in enumerate(headlines)}
+        for uid in multi:
+            out[uid] = sorted({id(h): h for h in out[uid]}.values(), key=lambda h: order[id(h)])
     return out
+
+def plan_digests(stamped: List[Dict], max_items: int = NEWS_DIGEST_MAX_ITEMS) -> Dict[int, Tuple[List[Dict], float]]:
+    """
+    user_id -> (items to send, new watermark). Only headlines first seen after the user's
+    delivery watermark qualify, so nothing is sent to the same user twice. A digest takes
+    the oldest max_items of them and the watermark stops at the last one sent, so the
+    overflow goes out with the next digest.
+    """
+    delivery = build_user_delivery(stamped)
+    marks = get_news_watermarks(list(delivery))
+    plan = {}
+    for uid, items in delivery.items():
+        wm = marks.get(uid, 0.0)
+        new_items = sorted((h for h in items if h["first_seen"] > wm), key=lambda h: h["first_seen"])[:max_items]
+        if new_items:
+            plan[uid] = (new_items, new_items[-1]["first_seen"])
+    return plan
+
+def format_digest(items: List[Dict]) -> str:
+    lines = ["📰 Market News Digest"]
+    for h in items:
+        lines.append(f"\n• {h['title']}\n{h['url']}")
+    return "\n".join(lines)
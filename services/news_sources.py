@@ -0,0 +1,254 @@
+import asyncio, hashlib, re, time
+from abc import ABC, abstractmethod
+from email.utils import parsedate_to_datetime
+from typing import Dict, List, Optional
+from bs4 import BeautifulSoup
+from services.logger import get_logger
+from services.http_client import fetcher
+from services.news_classifier import classify_headline, CURRENCY_INSTRUMENTS, INSTRUMENTS
+from services.reuters_scraper import parse_reuters_headlines
+from services.forexfactory_scraper import parse_calendar_events
+from utils.urls import canonical_url
+from utils.constants import NEWS_CATEGORIES
+from config import (REUTERS_FX_URL, FOREXFACTORY_CALENDAR_URL, NEWS_SOURCES, NEWS_RSS_FEEDS,
+                    NEWS_SOURCE_TIMEOUT, NEWS_SIMHASH_DISTANCE, NEWS_TITLE_CONTAINMENT)
+
+logger = get_logger("news_sources")
+
+class NewsSource(ABC):
+    """
+    A news plugin: fetch() downloads through the shared HTTP client and parse() turns
+    the body into items {'title', 'url', 'published'?, 'id'?}. parse() is pure, so a
+    source can be exercised against a saved fixture with no network.
+    """
+    name = "source"
+
+    def __init__(self, url: str, timeout: float = NEWS_SOURCE_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    @abstractmethod
+    def parse(self, text: str) -> List[Dict]:
+        ...
+
+    async def fetch(self) -> List[Dict]:
+        text = await fetcher.get_text(self.url)
+        return await asyncio.to_thread(self.parse, text)
+
+class ReutersSource(NewsSource):
+    name = "reuters"
+
+    def __init__(self, url: str = REUTERS_FX_URL, timeout: float = NEWS_SOURCE_TIMEOUT):
+        super().__init__(url, timeout)
+
+    def parse(self, text: str) -> List[Dict]:
+        return parse_reuters_headlines(text, self.url)
+
+class ForexFactorySource(NewsSource):
+    """Upcoming high-impact calendar events as news items."""
+    name = "forexfactory"
+
+    def __init__(self, url: str = FOREXFACTORY_CALENDAR_URL, timeout: float = NEWS_SOURCE_TIMEOUT,
+                 lookahead_h: float = 24, clock=time.time):
+        super().__init__(url, timeout)
+        self.lookahead_s = lookahead_h * 3600
+        self.clock = clock
+
+    def parse(self, text: str) -> List[Dict]:
+        now = self.clock()
+        items = []
+        for e in parse_calendar_events(text):
+            ts = e["event_utc"]
+            if e["impact"] != "High" or ts is None or not now <= ts <= now + self.lookahead_s:
+                continue
+            title = f"{e['currency']} {e['title']}: high-impact release at {time.strftime('%a %H:%M UTC', time.gmtime(ts))}"
+            items.append({"title": title, "url": self.url, "published": ts, "currency": e["currency"],
+                          # Every event shares the calendar URL, so identify it by its own fields
+                          "id": f"ff:{int(ts)}:{e['currency']}:{e['title']}"})
+        return items
+
+class RSSSource(NewsSource):
+    """RSS 2.0 <item> or Atom <entry> feed."""
+    name = "rss"
+
+    def __init__(self, name: str, url: str, timeout: float = NEWS_SOURCE_TIMEOUT):
+        super().__init__(url, timeout)
+        self.name = name
+
+    def parse(self, text: str) -> List[Dict]:
+        soup = BeautifulSoup(text, "xml")
+        items = []
+        for node in soup.find_all(["item", "entry"]):
+            title = node.find("title")
+            link = node.find("link")
+            href = (link.get("href") or link.get_text(strip=True)) if link is not None else ""
+            if title is None or not href:
+                continue
+            date = node.find(["pubDate", "published", "updated"])
+            items.append({"title": title.get_text(" ", strip=True), "url": href,
+                          "published": _parse_date(date.get_text(strip=True)) if date is not None else None})
+        return items
+
+def _parse_date(value: str) -> Optional[float]:
+    try:
+        return parsedate_to_datetime(value).timestamp()  # RFC 822 (RSS)
+    except (TypeError, ValueError):
+        pass
+    try:
+        from datetime import datetime
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()  # RFC 3339 (Atom)
+    except ValueError:
+        return None
+
+def build_sources(names: List[str] = NEWS_SOURCES, feeds=NEWS_RSS_FEEDS) -> List[NewsSource]:
+    sources: List[NewsSource] = []
+    for name in names:
+        if name == "reuters":
+            sources.append(ReutersSource())
+        elif name == "forexfactory":
+            sources.append(ForexFactorySource())
+        elif name == "rss":
+            sources.extend(RSSSource(feed_name, url) for feed_name, url in feeds)
+        else:
+            logger.warning("Unknown news source %r ignored", name)
+    return sources
+
+# Near-duplicate detection on titles: word tokens (stopwords dropped, "U.S." -> "us"),
+# a 64-bit simhash over tokens + bigrams, and token containment for trimmed re-titles
+_WORD_RE = re.compile(r"[a-z0-9]+")
+_STOPWORDS = {"a", "an", "the", "as", "of", "to", "in", "on", "at", "for", "and", "after", "with", "by", "is", "are", "from"}
+
+MAX_POSTING = 200
+
+def title_tokens(title: str) -> List[str]:
+    return [w for w in _WORD_RE.findall(re.sub(r"[.'’]", "", title.lower())) if w not in _STOPWORDS]
+
+def simhash(title: str) -> int:
+    words = title_tokens(title)
+    weights = [0] * 64
+    for sh in words + [" ".join(words[i:i + 2]) for i in range(len(words) - 1)]:
+        h = int.from_bytes(hashlib.blake2b(sh.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+def normalize_item(item: Dict, source: str) -> Dict:
+    title = " ".join(item.get("title", "").split())
+    out = dict(item, title=title, url=item.get("url", ""), source=source, canonical_url=canonical_url(item.get("url", "")))
+    if "categories" not in out:
+        out.update(classify_headline(title))
+    if out.get("currency"):
+        # Calendar items name their currency outright; tag it even if the title doesn't
+        ccys = set(out["currencies"]) | {out["currency"]}
+        insts = set(out["instruments"]) | set(CURRENCY_INSTRUMENTS.get(out["currency"], ()))
+        out.update(currencies=sorted(ccys), instruments=[i for i in INSTRUMENTS if i in insts],
+                   categories=out["categories"] or [NEWS_CATEGORIES[2]])
+    return out
+
+def cluster_items(items: List[Dict], max_distance: int = NEWS_SIMHASH_DISTANCE,
+                  containment: float = NEWS_TITLE_CONTAINMENT, min_tokens: int = 4) -> List[Dict]:
+    """
+    One item per story. Items are merged when they share an id or canonical URL, when
+    their title simhashes differ in at most max_distance bits (reworded punctuation,
+    casing), or when one title's tokens are mostly contained in the other's (a source
+    trimming the headline). Simhash candidates come from 4 bands of 16 bits and
+    containment candidates from a token index, so no all-pairs scan is needed.
+    The first item of each cluster is kept, with 'sources' and 'cluster_size'.
+    """
+    parent = list(range(len(items)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    def union(i, j):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[max(ri, rj)] = min(ri, rj)
+
+    by_identity: Dict[str, int] = {}
+    bands: Dict[tuple, List[int]] = {}
+    postings: Dict[str, List[int]] = {}
+    hashes = [simhash(it["title"]) for it in items]
+    tokens = [set(title_tokens(it["title"])) for it in items]
+    for i, it in enumerate(items):
+        identity = it.get("id") or it.get("canonical_url")
+        if identity:
+            if identity in by_identity:
+                union(i, by_identity[identity])
+            else:
+                by_identity[identity] = i
+        if it.get("id"):
+            continue  # calendar items are exact records, never fuzzy-matched
+        for b in range(4):
+            key = (b, hashes[i] >> (16 * b) & 0xFFFF)
+            for j in bands.get(key, ()):
+                if find(i) != find(j) and bin(hashes[i] ^ hashes[j]).count("1") <= max_distance:
+                    union(i, j)
+            bands.setdefault(key, []).append(i)
+        shared: Dict[int, int] = {}
+        for tok in tokens[i]:
+            posting = postings.setdefault(tok, [])
+            if len(posting) < MAX_POSTING:  # very common words are skipped, like stopwords
+                for j in posting:
+                    shared[j] = shared.get(j, 0) + 1
+                posting.append(i)
+        for j, n in shared.items():
+            smaller = min(len(tokens[i]), len(tokens[j]))
+            if smaller >= min_tokens and n / smaller >= containment:
+                union(i, j)
+    clusters: Dict[int, List[int]] = {}
+    for i in range(len(items)):
+        clusters.setdefault(find(i), []).append(i)
+    out = []
+    for root in sorted(clusters):
+        members = clusters[root]
+        rep = dict(items[root])
+        rep["sources"] = sorted({items[m]["source"] for m in members})
+        rep["cluster_size"] = len(members)
+        out.append(rep)
+    return out
+
+def aggregate(batches: Dict[str, List[Dict]]) -> List[Dict]:
+    """Normalize per-source item lists (in source order) and cluster them into stories."""
+    items = [normalize_item(it, source) for source, its in batches.items() for it in its if it.get("title")]
+    return cluster_items(items)
+
+class NewsHub:
+    """Fetches all sources concurrently, each under its own timeout, and aggregates the results."""
+    def __init__(self, sources: List[NewsSource] = None):
+        self.sources = build_sources() if sources is None else sources
+        self._stats: Dict[str, Dict] = {s.name: {"ok": 0, "errors": 0, "timeouts": 0, "items": 0, "last_s": None}
+                                        for s in self.sources}
+        self.last_stories = 0
+
+    async def _fetch(self, source: NewsSource) -> List[Dict]:
+        st = self._stats[source.name]
+        t0 = time.perf_counter()
+        try:
+            items = await asyncio.wait_for(source.fetch(), source.timeout)
+            st["ok"] += 1
+            st["items"] = len(items)
+            return items
+        except asyncio.TimeoutError:
+            st["timeouts"] += 1
+            logger.warning("News source %s timed out after %.1fs", source.name, source.timeout)
+        except Exception as e:
+            st["errors"] += 1
+            logger.exception("News source %s failed: %s", source.name, e)
+        finally:
+            st["last_s"] = round(time.perf_counter() - t0, 3)
+        return []
+
+    async def collect(self) -> List[Dict]:
+        results = await asyncio.gather(*(self._fetch(s) for s in self.sources))
+        stories = aggregate({s.name: items for s, items in zip(self.sources, results)})
+        self.last_stories = len(stories)
+        return stories
+
+    def stats(self) -> Dict:
+        return {"sources": self._stats, "last_stories": self.last_stories}
+
+news_hub = NewsHub()
@@ -1,16 +1,16 @@
 from typing import Dict, Optional
 from services.logger import get_logger
-from services.metaapi_client import MetaApiClient
-from services.db import inc_daily_loss, set_cooldown
+from services.metaapi_client import master_client
+from services.db_async import inc_daily_loss, set_cooldown
 from utils.timezone import now_tz
-from config import METAAPI_TOKEN, APP_TZ
+from config import APP_TZ
 from datetime import timedelta
 
 logger = get_logger("orders")
 
 class OrderManager:
     def __init__(self):
-        self.meta = MetaApiClient(METAAPI_TOKEN)
+        self.meta = master_client
 
     async def _lot_sizing(self, balance: float) -> Dict[str, float]:
         # Implements "The Risk Bible"
@@ -47,10 +47,10 @@ class OrderManager:
         if not loss: 
             return
         try:
-            cnt = inc_daily_loss(user_id)
+            cnt = await inc_daily_loss(user_id)
             if cnt >= 3:
                 until = now_tz(APP_TZ) .replace(hour=23, minute=59, second=59, microsecond=0)
-                set_cooldown(user_id, until.isoformat())
+                await set_cooldown(user_id, until.isoformat())
                 logger.info("User %s entered Cool-Down until %s", user_id, until)
         except Exception as e:
             logger.exception("Cool-Down protocol error: %s", e)
@@ -0,0 +1,63 @@
+import asyncio, time
+from typing import Dict, Hashable
+
+class TokenBucket:
+    """
+    Async token bucket for outbound Telegram traffic. `pause()` honours RetryAfter
+    for every caller; `penalize()`/`reward()` adapt the rate (multiplicative decrease
+    on flood control, slow additive recovery on success).
+    """
+    def __init__(self, rate: float, capacity: float = None, min_rate: float = None):
+        self.max_rate = rate
+        self.rate = rate
+        self.min_rate = min_rate or max(0.5, rate / 10)
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + max(0.0, now - self._updated) * self.rate)
+        self._updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._refill(now)
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def pause(self, seconds: float):
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+        self.tokens = 0
+        # Refill restarts when the pause ends; crediting the paused time would release a burst
+        self._updated = self._paused_until
+
+    def penalize(self, factor: float = 0.5):
+        self.rate = max(self.min_rate, self.rate * factor)
+
+    def reward(self, step: float = 0.05):
+        self.rate = min(self.max_rate, self.rate + step)
+
+class PerChatLimiter:
+    """Minimum spacing between messages to the same chat (Telegram: ~1 msg/s per chat)."""
+    def __init__(self, interval: float = 1.0, max_tracked: int = 50000):
+        self.interval = interval
+        self.max_tracked = max_tracked
+        self._next: Dict[Hashable, float] = {}
+
+    async def wait(self, chat_id: Hashable):
+        now = time.monotonic()
+        if len(self._next) > self.max_tracked:
+            self._next = {k: v for k, v in self._next.items() if v > now}
+        at = max(now, self._next.get(chat_id, 0.0))
+        self._next[chat_id] = at + self.interval
+        if at > now:
+            await asyncio.sleep(at - now)
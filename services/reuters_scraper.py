@@ -1,37 +1,42 @@
-import requests, re
+import asyncio
+from urllib.parse import urljoin
 from bs4 import BeautifulSoup
 from typing import List, Dict
 from services.logger import get_logger
+from services.http_client import fetcher
+from services.news_classifier import classify_headline
+from utils.urls import canonical_url
+from config import REUTERS_FX_URL
 
 logger = get_logger("reuters")
 
-def fetch_reuters_fx_headlines() -> List[Dict]:
+def parse_reuters_headlines(html: str, base_url: str = REUTERS_FX_URL, limit: int = 20) -> List[Dict]:
+    """
+    Headline dicts from a Reuters currencies section page. A story is often linked by
+    several anchors (image, kicker, title); only its first titled anchor is kept.
+    """
+    soup = BeautifulSoup(html, "lxml")
+    items, seen = [], set()
+    for a in soup.select("a[href*='/markets/currencies/']"):
+        title = a.get_text(" ", strip=True)
+        href = urljoin(base_url, a.get("href", ""))
+        key = canonical_url(href)
+        if not title or not href or key in seen or key == canonical_url(base_url):
+            continue
+        seen.add(key)
+        items.append({"title": title, "url": href, **classify_headline(title)})
+        if len(items) >= limit:
+            break
+    return items
+
+async def fetch_reuters_fx_headlines() -> List[Dict]:
     """
     Fetch latest FX-related headlines (best-effort parsing, structure may change).
-    Returns list of dicts: {'title': str, 'url': str, 'category': str}
+    Returns list of dicts: {'title', 'url', 'categories', 'currencies', 'instruments'}
     """
     try:
-        url = "https://www.reuters.com/markets/currencies/"
-        r = requests.get(url, timeout=15, headers={"User-Agent":"Mozilla/5.0"})
-        soup = BeautifulSoup(r.text, "lxml")
-        items = []
-        for a in soup.select("a[href*='/markets/currencies/']")[:20]:
-            title = a.get_text(strip=True)
-            href = "https://www.reuters.com" + a.get("href", "")
-            cat = categorize_headline(title)
-            if title and href:
-                items.append({"title": title, "url": href, "category": cat})
-        return items
+        html = await fetcher.get_text(REUTERS_FX_URL)
+        return await asyncio.to_thread(parse_reuters_headlines, html)
     except Exception as e:
         logger.exception("Reuters scraping failed: %s", e)
         return []
-
-def categorize_headline(title: str) -> str:
-    t = title.lower()
-    if any(k in t for k in ["fed", "ecb", "boe", "central bank", "interest rate", "hike", "cut"]):
-        return "Central Bank News (Fed, ECB)"
-    if any(k in t for k in ["inflation", "cpi", "ppi", "jobs", "employment", "unemployment", "gdp"]):
-        return "Inflation & Economic Data"
-    if any(k in t for k in ["ukraine", "middle east", "geopolitics", "sanction", "election", "war", "conflict", "geopolitical"]):
-        return "Geopolitical Events"
-    return "Inflation & Economic Data"  # default bucket
@@ -0,0 +1,233 @@
+import asyncio, random, time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+import pytz
+from services.logger import get_logger
+from utils.bars import next_bar_close
+
+logger = get_logger("scheduler")
+
+# Triggers answer one question: given a fire time, when is the next one (strictly after it)?
+# They are stateless, so a missed run is simply replanned from "now".
+
+class Interval:
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError("Interval must be positive")
+        self.seconds = seconds
+
+    def next_after(self, ts: float) -> float:
+        return ts + self.seconds
+
+    def __repr__(self):
+        return f"Interval({self.seconds}s)"
+
+class BarAligned:
+    """Fires offset seconds after every bar close of timeframe (e.g. once the M15 bar is final)."""
+    def __init__(self, timeframe: str, offset: float = 0.0):
+        self.timeframe = timeframe
+        self.offset = offset
+
+    def next_after(self, ts: float) -> float:
+        return next_bar_close(ts - self.offset, self.timeframe) + self.offset
+
+    def __repr__(self):
+        return f"BarAligned({self.timeframe}+{self.offset}s)"
+
+_CRON_FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+def _cron_field(spec: str, lo: int, hi: int) -> frozenset:
+    values = set()
+    for part in spec.split(","):
+        rng, _, step = part.partition("/")
+        step = int(step) if step else 1
+        if rng == "*":
+            a, b = lo, hi
+        elif "-" in rng:
+            a, b = (int(x) for x in rng.split("-", 1))
+        else:
+            a = int(rng)
+            b = hi if step > 1 else a
+        if not lo <= a <= b <= hi or step < 1:
+            raise ValueError(f"Bad cron field {spec!r}")
+        values.update(range(a, b + 1, step))
+    return frozenset(values)
+
+class Cron:
+    """
+    Five-field cron expression (minute hour day-of-month month day-of-week) evaluated in
+    tz; supports *, lists, ranges and steps. As in cron, when both day fields are
+    restricted a day matches if either does.
+    """
+    def __init__(self, expr: str, tz: str = "UTC"):
+        fields = expr.split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expr!r}")
+        self.expr = expr
+        self.tz = pytz.timezone(tz)
+        self.minutes, self.hours, self.days, self.months, dow = (
+            _cron_field(f, lo, hi) for f, (lo, hi) in zip(fields, _CRON_FIELDS))
+        self.weekdays = frozenset(d % 7 for d in dow)  # 0 and 7 are both Sunday
+        self.any_day = fields[2] == "*"
+        self.any_weekday = fields[4] == "*"
+
+    def _day_ok(self, t: datetime) -> bool:
+        dom = t.day in self.days
+        dow = (t.weekday() + 1) % 7 in self.weekdays
+        if not self.any_day and not self.any_weekday:
+            return dom or dow
+        return dom and dow
+
+    def next_after(self, ts: float) -> float:
+        t = datetime.fromtimestamp(ts, self.tz).replace(tzinfo=None, second=0, microsecond=0) + timedelta(minutes=1)
+        for _ in range(100000):
+            if t.month not in self.months:
+                t = (t.replace(day=1, hour=0, minute=0) + timedelta(days=32)).replace(day=1)
+            elif not self._day_ok(t):
+                t = t.replace(hour=0, minute=0) + timedelta(days=1)
+            elif t.hour not in self.hours:
+                t = t.replace(minute=0) + timedelta(hours=1)
+            elif t.minute not in self.minutes:
+                t += timedelta(minutes=1)
+            else:
+                fire = self.tz.localize(t).timestamp()
+                if fire > ts:  # a wall time skipped by a DST change can map to the past
+                    return fire
+                t += timedelta(minutes=1)
+        raise ValueError(f"Cron expression never fires: {self.expr!r}")
+
+    def __repr__(self):
+        return f"Cron({self.expr!r})"
+
+class Job:
+    def __init__(self, name: str, fn: Callable[[], Awaitable], trigger, timeout: Optional[float] = None,
+                 jitter: float = 0.0, run_at_start: bool = False, guard: Callable[[], bool] = None):
+        self.name = name
+        self.fn = fn
+        self.trigger = trigger
+        self.timeout = timeout
+        self.jitter = jitter
+        self.run_at_start = run_at_start
+        self.guard = guard
+        self.due: Optional[float] = None       # planned fire time, before jitter
+        self.next_run: Optional[float] = None  # due + jitter
+        self.task: Optional[asyncio.Task] = None
+        self.runs = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.skipped = 0  # previous run still going
+        self.held = 0     # guard said no (e.g. not the leader)
+        self.last_started: Optional[float] = None
+        self.last_duration_s: Optional[float] = None
+        self.max_duration_s = 0.0
+        self.total_duration_s = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def running(self) -> bool:
+        return self.task is not None and not self.task.done()
+
+    def stats(self, now: float) -> Dict:
+        return {
+            "trigger": repr(self.trigger), "runs": self.runs, "failures": self.failures,
+            "timeouts": self.timeouts, "skipped": self.skipped, "held": self.held,
+            "running": self.running, "last_s": self.last_duration_s, "max_s": round(self.max_duration_s, 3),
+            "avg_s": round(self.total_duration_s / self.runs, 3) if self.runs else None,
+            "next_in_s": None if self.next_run is None else round(self.next_run - now, 1),
+            "last_error": self.last_error,
+        }
+
+class Scheduler:
+    """
+    Runs independent async jobs, each on its own trigger. A job whose previous run is
+    still going when it comes due is skipped for that slot instead of overlapping; runs
+    past their timeout are cancelled. Missed slots (e.g. after a long stall) collapse
+    into one run. clock/sleep/rng are injectable: with a fake clock, drive it by
+    advancing the clock and calling run_pending().
+    """
+    def __init__(self, clock: Callable[[], float] = time.time, sleep: Callable[[float], Awaitable] = asyncio.sleep,
+                 rng: random.Random = None, idle_s: float = 60.0):
+        self.clock = clock
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.idle_s = idle_s
+        self.jobs: Dict[str, Job] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def add(self, name: str, fn: Callable[[], Awaitable], trigger, **kwargs) -> Job:
+        if name in self.jobs:
+            raise ValueError(f"Job {name!r} already scheduled")
+        job = self.jobs[name] = Job(name, fn, trigger, **kwargs)
+        now = self.clock()
+        if job.run_at_start:
+            job.due = job.next_run = now
+        else:
+            self._plan(job, trigger.next_after(now))
+        return job
+
+    def _plan(self, job: Job, due: float):
+        job.due = due
+        job.next_run = due + (self.rng.uniform(0, job.jitter) if job.jitter else 0.0)
+
+    async def _execute(self, job: Job):
+        started = job.last_started = self.clock()
+        try:
+            await asyncio.wait_for(job.fn(), job.timeout)
+            job.last_error = None
+        except asyncio.TimeoutError:
+            job.timeouts += 1
+            job.last_error = f"timeout after {job.timeout}s"
+            logger.warning("Job %s timed out after %ss", job.name, job.timeout)
+        except Exception as e:
+            job.failures += 1
+            job.last_error = repr(e)
+            logger.exception("Job %s failed: %s", job.name, e)
+        finally:
+            took = self.clock() - started
+            job.runs += 1
+            job.last_duration_s = round(took, 3)
+            job.total_duration_s += took
+            job.max_duration_s = max(job.max_duration_s, took)
+
+    def run_pending(self) -> List[Job]:
+        """Start every job that is due now; returns the jobs started."""
+        now = self.clock()
+        started = []
+        for job in self.jobs.values():
+            if job.next_run is None or job.next_run > now:
+                continue
+            due = job.trigger.next_after(job.due)
+            self._plan(job, due if due > now else job.trigger.next_after(now))
+            if job.guard is not None and not job.guard():
+                job.held += 1
+            elif job.running:
+                job.skipped += 1
+                logger.warning("Job %s still running, skipping this slot", job.name)
+            else:
+                job.task = asyncio.create_task(self._execute(job))
+                started.append(job)
+        return started
+
+    async def _run(self):
+        while True:
+            self.run_pending()
+            now = self.clock()
+            wake = min((j.next_run for j in self.jobs.values()), default=now + self.idle_s)
+            await self.sleep(min(max(0.0, wake - now), self.idle_s))
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        tasks = [j.task for j in self.jobs.values() if j.running]
+        if self._task is not None:
+            tasks.append(self._task)
+            self._task = None
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    def stats(self) -> Dict[str, Dict]:
+        now = self.clock()
+        return {name: job.stats(now) for name, job in self.jobs.items()}
@@ -1,22 +1,24 @@
 from typing import Dict, Optional
 from services.logger import get_logger
-from services.trading_engine import TradingEngine
-from services.metaapi_client import MetaApiClient, get_master_connection
+from services.trading_engine import TradingEngine, AnalysisError
+from services.metaapi_client import master_client, get_master_connection
 from services.order_manager import OrderManager
-from services.db import set_free_signal_date, get_user
+from services.tradingview_client import screenshot_chart
+from services.chart_renderer import render_signal_chart
+from services.db_async import set_free_signal_date, get_user
 from utils.timezone import now_tz
-from config import METAAPI_TOKEN, APP_TZ
+from config import APP_TZ, CHART_SOURCE
 
 logger = get_logger("signal")
 
 class SignalHandler:
     def __init__(self):
         self.engine = TradingEngine()
-        self.meta = MetaApiClient(METAAPI_TOKEN)
+        self.meta = master_client
         self.orders = OrderManager()
 
     async def free_signal_available(self, user_id: int) -> bool:
-        u = get_user(user_id)
+        u = await get_user(user_id)
         if not u:
             return False
         today = now_tz(APP_TZ).strftime("%Y-%m-%d")
@@ -24,16 +26,37 @@ class SignalHandler:
 
     async def mark_free_signal_used(self, user_id: int):
         today = now_tz(APP_TZ).strftime("%Y-%m-%d")
-        set_free_signal_date(user_id, today)
+        await set_free_signal_date(user_id, today)
 
     async def prepare_signal(self, symbol: str) -> Optional[Dict]:
+        """Signal dict, or None when there is no setup; raises AnalysisError when the analysis failed."""
         conn = await get_master_connection()
         if not conn:
             logger.error("Master connection unavailable")
-            return None
+            raise AnalysisError("Master connection unavailable")
         sig = await self.engine.analyze_and_signal(conn, symbol.replace(" ", "").replace("_","/"))
         return sig
 
+    async def chart_snapshot(self, symbol: str, signal: Dict) -> str:
+        """Chart image for a prepared signal from the configured CHART_SOURCE ('' on failure)."""
+        symbol = symbol.replace(" ", "").replace("_","/")
+        if CHART_SOURCE == "render":
+            # The analysis may have run on another worker (shared signal), leaving this cache empty
+            candles = self.engine.candles.peek(symbol, '15m') or await self._m15_candles(symbol)
+            shot = await render_signal_chart(symbol, candles, signal) if candles else ""
+            if shot:
+                return shot
+            logger.warning("Chart render unavailable for %s, using TradingView capture", symbol)
+        return await screenshot_chart(symbol, timeframe="15")
+
+    async def _m15_candles(self, symbol: str):
+        try:
+            conn = await get_master_connection()
+            return await self.engine.candles.get(conn, symbol, '15m', 200) if conn else []
+        except Exception as e:
+            logger.exception("M15 candles for chart %s failed: %s", symbol, e)
+            return []
+
     async def execute_signal(self, signal: Dict) -> Optional[Dict]:
         conn = await get_master_connection()
         if not conn:
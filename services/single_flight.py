@@ -0,0 +1,71 @@
+import asyncio, time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+
+class SingleFlight:
+    """
+    Coalesce concurrent calls per key: the first caller runs the work, everyone
+    arriving while it is in flight awaits the same result. Completed results are
+    kept until their expiry (e.g. the close of the bar they were computed for).
+    Failures are fanned out to the current waiters but never cached, and neither is a
+    result the caller's cacheable predicate rejects (e.g. a degraded, partial answer).
+    """
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self._done: Dict[Hashable, Tuple[float, Any]] = {}
+        self.calls = 0
+        self.executions = 0
+        self.coalesced = 0
+        self.cache_hits = 0
+
+    def _purge(self, now: float):
+        for key in [k for k, (exp, _) in self._done.items() if exp <= now]:
+            del self._done[key]
+
+    def peek(self, key: Hashable) -> Tuple[bool, Any]:
+        """(True, result) if a completed, unexpired result is cached for key."""
+        self._purge(self.clock())
+        if key in self._done:
+            self.cache_hits += 1
+            return True, self._done[key][1]
+        return False, None
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]], expires_at: float,
+                 cacheable: Callable[[Any], bool] = None) -> Any:
+        self.calls += 1
+        now = self.clock()
+        self._purge(now)
+        if key in self._done:
+            self.cache_hits += 1
+            return self._done[key][1]
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self.coalesced += 1
+            return await asyncio.shield(fut)
+
+        fut = asyncio.get_running_loop().create_future()
+        self._inflight[key] = fut
+        self.executions += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+                fut.exception()  # mark retrieved when nobody else was waiting
+            raise
+        else:
+            fut.set_result(result)
+            if expires_at > self.clock() and (cacheable is None or cacheable(result)):
+                self._done[key] = (expires_at, result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    def stats(self) -> Dict:
+        return {
+            "calls": self.calls, "executions": self.executions,
+            "coalesced": self.coalesced, "cache_hits": self.cache_hits,
+            "inflight": len(self._inflight), "cached": len(self._done),
+        }
@@ -0,0 +1,279 @@
+import asyncio, json, os, socket, sqlite3, time, uuid
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from services.logger import get_logger
+from config import STATE_BACKEND, STATE_DB_PATH, LEADER_LEASE_TTL
+
+logger = get_logger("state")
+
+# Shared runtime state: small keyed values with expiry (conversation steps, shared
+# flags), fixed-window rate limits and named leases for leader election. MemoryState
+# is enough for a single process; SQLiteState lets several worker processes on one
+# host see the same state through a WAL database file.
+
+class StateBackend(ABC):
+    """Async interface shared by the backends. Values must be JSON-serializable."""
+    @abstractmethod
+    async def get(self, key: str) -> Any:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str):
+        ...
+
+    @abstractmethod
+    async def allow(self, key: str, limit: int, window_s: float) -> bool:
+        """Count one hit against key; False once limit hits fall in the current window."""
+
+    @abstractmethod
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        """Take or renew lease name for owner; False while another owner holds it."""
+
+    @abstractmethod
+    async def release_lease(self, name: str, owner: str):
+        ...
+
+    async def purge(self) -> int:
+        """Drop expired keys; returns how many went."""
+        return 0
+
+    async def close(self):
+        pass
+
+    def stats(self) -> Dict:
+        return {}
+
+class MemoryState(StateBackend):
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self.clock = clock
+        self._kv: Dict[str, Tuple[Optional[float], Any]] = {}
+        self._leases: Dict[str, Tuple[str, float]] = {}
+        self.limited = 0
+
+    def _live(self, key: str, now: float):
+        item = self._kv.get(key)
+        if item is None:
+            return None
+        if item[0] is not None and item[0] <= now:
+            del self._kv[key]
+            return None
+        return item
+
+    async def get(self, key: str) -> Any:
+        item = self._live(key, self.clock())
+        return item[1] if item else None
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        self._kv[key] = (self.clock() + ttl if ttl else None, value)
+
+    async def delete(self, key: str):
+        self._kv.pop(key, None)
+
+    async def allow(self, key: str, limit: int, window_s: float) -> bool:
+        now = self.clock()
+        item = self._live(key, now)
+        count = (item[1] if item else 0) + 1
+        self._kv[key] = (item[0] if item else now + window_s, count)
+        if count > limit:
+            self.limited += 1
+            return False
+        return True
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        now = self.clock()
+        holder = self._leases.get(name)
+        if holder and holder[0] != owner and holder[1] > now:
+            return False
+        self._leases[name] = (owner, now + ttl)
+        return True
+
+    async def release_lease(self, name: str, owner: str):
+        if self._leases.get(name, ("",))[0] == owner:
+            del self._leases[name]
+
+    async def purge(self) -> int:
+        now = self.clock()
+        expired = [k for k, (exp, _) in self._kv.items() if exp is not None and exp <= now]
+        for key in expired:
+            del self._kv[key]
+        return len(expired)
+
+    def stats(self) -> Dict:
+        return {"backend": "memory", "keys": len(self._kv), "leases": len(self._leases), "limited": self.limited}
+
+class SQLiteState(StateBackend):
+    """
+    State in its own SQLite file (kept apart from bot.db so lease renewals never queue
+    behind business writes). All statements run on one dedicated thread; read-modify-write
+    operations use BEGIN IMMEDIATE so they are atomic across processes too.
+    """
+    def __init__(self, path: str, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.clock = clock
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="state")
+        self.ops = 0
+        self.limited = 0
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=5000")
+            conn.execute("CREATE TABLE IF NOT EXISTS kv (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)")
+            conn.execute("CREATE TABLE IF NOT EXISTS leases (name TEXT PRIMARY KEY, owner TEXT NOT NULL, expires_at REAL NOT NULL)")
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, fn: Callable, *args) -> Any:
+        self.ops += 1
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+
+    def _get(self, key: str, now: float) -> Any:
+        row = self._db().execute("SELECT value FROM kv WHERE key=? AND (expires_at IS NULL OR expires_at > ?)",
+                                 (key, now)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def _set(self, key: str, value: Any, expires_at: Optional[float]):
+        self._db().execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?,?,?)",
+                           (key, json.dumps(value), expires_at))
+
+    def _allow(self, key: str, limit: int, window_s: float, now: float) -> bool:
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT value, expires_at FROM kv WHERE key=? AND expires_at > ?", (key, now)).fetchone()
+            count = (json.loads(row[0]) if row else 0) + 1
+            conn.execute("INSERT OR REPLACE INTO kv (key, value, expires_at) VALUES (?,?,?)",
+                         (key, json.dumps(count), row[1] if row else now + window_s))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return count <= limit
+
+    def _acquire(self, name: str, owner: str, ttl: float, now: float) -> bool:
+        conn = self._db()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO leases (name, owner, expires_at) VALUES (?,?,?) "
+                "ON CONFLICT(name) DO UPDATE SET owner=excluded.owner, expires_at=excluded.expires_at "
+                "WHERE leases.owner=excluded.owner OR leases.expires_at <= ?",
+                (name, owner, now + ttl, now))
+            holder = conn.execute("SELECT owner FROM leases WHERE name=?", (name,)).fetchone()
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return bool(holder) and holder[0] == owner
+
+    def _purge(self, now: float) -> int:
+        return self._db().execute("DELETE FROM kv WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,)).rowcount
+
+    async def get(self, key: str) -> Any:
+        return await self._run(self._get, key, self.clock())
+
+    async def set(self, key: str, value: Any, ttl: Optional[float] = None):
+        await self._run(self._set, key, value, self.clock() + ttl if ttl else None)
+
+    async def delete(self, key: str):
+        await self._run(lambda: self._db().execute("DELETE FROM kv WHERE key=?", (key,)))
+
+    async def allow(self, key: str, limit: int, window_s: float) -> bool:
+        ok = await self._run(self._allow, key, limit, window_s, self.clock())
+        if not ok:
+            self.limited += 1
+        return ok
+
+    async def acquire_lease(self, name: str, owner: str, ttl: float) -> bool:
+        return await self._run(self._acquire, name, owner, ttl, self.clock())
+
+    async def release_lease(self, name: str, owner: str):
+        await self._run(lambda: self._db().execute("DELETE FROM leases WHERE name=? AND owner=?", (name, owner)))
+
+    async def purge(self) -> int:
+        return await self._run(self._purge, self.clock())
+
+    async def close(self):
+        if self._conn is not None:
+            conn, self._conn = self._conn, None
+            await asyncio.get_running_loop().run_in_executor(self._executor, conn.close)
+
+    def stats(self) -> Dict:
+        return {"backend": "sqlite", "path": self.path, "ops": self.ops, "limited": self.limited}
+
+def make_state(backend: str, path: str) -> StateBackend:
+    if backend == "sqlite":
+        return SQLiteState(path)
+    if backend != "memory":
+        logger.warning("Unknown STATE_BACKEND %r, using memory", backend)
+    return MemoryState()
+
+class LeaderElector:
+    """
+    Lease-based leader election: every instance tries to take (or renew) the same named
+    lease every ttl/3 seconds; whoever holds it runs the singleton jobs. A leader that
+    dies stops renewing and another instance takes over once the lease expires. A leader
+    that cannot renew steps down at once rather than risk two leaders.
+    """
+    def __init__(self, state: StateBackend, name: str = "scheduler", ttl: float = 30.0, owner: str = None):
+        self.state = state
+        self.name = name
+        self.ttl = ttl
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.is_leader = False
+        self.elections = 0
+        self.errors = 0
+        self._task: Optional[asyncio.Task] = None
+
+    async def campaign(self) -> bool:
+        try:
+            leader = await self.state.acquire_lease(self.name, self.owner, self.ttl)
+        except Exception as e:
+            self.errors += 1
+            logger.exception("Lease %s renewal failed: %s", self.name, e)
+            leader = False
+        if leader and not self.is_leader:
+            self.elections += 1
+            logger.info("Became leader for %s (%s)", self.name, self.owner)
+        elif self.is_leader and not leader:
+            logger.warning("Lost leadership for %s (%s)", self.name, self.owner)
+        self.is_leader = leader
+        return leader
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.ttl / 3)
+            await self.campaign()
+
+    async def start(self) -> bool:
+        """First campaign runs inline so callers know the role before starting jobs."""
+        leader = await self.campaign()
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+        return leader
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self.is_leader:
+            self.is_leader = False
+            try:
+                await self.state.release_lease(self.name, self.owner)
+            except Exception as e:
+                logger.exception("Lease %s release failed: %s", self.name, e)
+
+    def stats(self) -> Dict:
+        return {"owner": self.owner, "leader": self.is_leader, "elections": self.elections, "errors": self.errors}
+
+state = make_state(STATE_BACKEND, STATE_DB_PATH)
+leader = LeaderElector(state, "scheduler", LEADER_LEASE_TTL)
@@ -1,11 +1,16 @@
 from typing import List, Dict, Optional, Tuple
 from services.logger import get_logger
-from services.metaapi_client import MetaApiClient
-from config import METAAPI_TOKEN
+from services.metaapi_client import master_client
+from services.candle_cache import CandleCache
+from utils.bars import candle_ts
+from services.candle_arrays import CandleArrays, last_pin_bar, breakout_range, trend, swing_levels, nearest_level
 import math
 
 logger = get_logger("engine")
 
+class AnalysisError(Exception):
+    """The analysis could not run (no connection, no candles, engine error) - not the same as "no setup"."""
+
 # --- Strategy Rules per Planner ---
 # - HTF Structural Analysis (4H, 1D, 1W, 1M)
 # - Pattern recognition (breakout only)
@@ -15,23 +20,9 @@ logger = get_logger("engine")
 
 class TradingEngine:
     def __init__(self):
-        self.meta = MetaApiClient(METAAPI_TOKEN)
-
-    @staticmethod
-    def _is_pin_bar(candle) -> Optional[str]:
-        """Detect M15 pin bar: return 'buy' (inverted pin) / 'sell' (standard) or None."""
-        o, h, l, c = candle['open'], candle['high'], candle['low'], candle['close']
-        body = abs(c - o)
-        rng = h - l if (h - l) != 0 else 1e-9
-        upper_wick = h - max(c, o)
-        lower_wick = min(c, o) - l
-        # Pin bar heuristic: small body, long wick (> 2x body)
-        if body / rng < 0.3:
-            if lower_wick > 2 * body and (max(c, o) - l) / rng > 0.6:
-                return "buy"   # inverted pin, long lower wick
-            if upper_wick > 2 * body and (h - min(c, o)) / rng > 0.6:
-                return "sell"  # standard pin, long upper wick
-        return None
+        self.meta = master_client
+        # Bar-aligned candle cache: repeat analyses within a bar hit memory, not MetaApi
+        self.candles = CandleCache(self.meta)
 
     @staticmethod
     def _pips(symbol: str, price_diff: float) -> float:
@@ -47,42 +38,38 @@ class TradingEngine:
     async def analyze_and_signal(self, connection, symbol: str) -> Optional[Dict]:
         """
         Returns a signal dict or None if no setup. High-level approximation
-        (robustly wrapped, no silent failures).
+        (robustly wrapped, no silent failures): anything that stops the analysis
+        from running raises AnalysisError, so callers never mistake it for "no setup".
         """
         try:
             # 1) HTF context: look for structure using 4H and 1D swings (simple pivot-based)
-            h4 = await self.meta.get_candles(connection, symbol, '4h', 300)
-            d1 = await self.meta.get_candles(connection, symbol, '1d', 200)
+            h4 = await self.candles.get(connection, symbol, '4h', 300)
+            d1 = await self.candles.get(connection, symbol, '1d', 200)
             if not h4 or not d1:
-                logger.info("Insufficient HTF candles for %s", symbol); return None
+                raise AnalysisError(f"Insufficient HTF candles for {symbol}")
+
+            h4a = CandleArrays.from_candles(h4)
+            d1a = CandleArrays.from_candles(d1)
 
             # Simple trend context: compare last closes
-            trend_up = d1[-1]['close'] > d1[-50]['close'] if len(d1) > 50 else False
-            trend_down = d1[-1]['close'] < d1[-50]['close'] if len(d1) > 50 else False
+            trend_up, trend_down = trend(d1a.close, 50)
 
             # 2) Pattern / breakout heuristic: recent range and breakout
-            recent = h4[-40:]
-            hh = max(c['high'] for c in recent)
-            ll = min(c['low'] for c in recent)
-            last = recent[-1]
-            breakout_up = last['close'] > hh * 0.999
-            breakout_dn = last['close'] < ll * 1.001
+            hh, ll = breakout_range(h4a, 40)
+            price = float(h4a.close[-1])
+            breakout_up = price > hh * 0.999
+            breakout_dn = price < ll * 1.001
 
             # 3) Looking left: align with past swing zones (using d1 highs/lows)
-            levels = sorted(list({round(c['high'], 3) for c in d1[-150:]} | {round(c['low'], 3) for c in d1[-150:]}))
-            price = last['close']
-            nearby_level = min(levels, key=lambda x: abs(x - price)) if levels else None
-            aligned = abs(price - (nearby_level or price)) / price < 0.004 if nearby_level else False
+            nearby_level = nearest_level(swing_levels(d1a, 150), price)
+            aligned = abs(price - nearby_level) / price < 0.004 if nearby_level else False
 
             # 4) M15 trigger pin bar
-            m15 = await self.meta.get_candles(connection, symbol, '15m', 200)
-            if not m15: return None
-            trigger = None
-            for c in reversed(m15[-10:]):  # check last 10 candles
-                tag = self._is_pin_bar(c)
-                if tag:
-                    trigger = tag
-                    break
+            m15 = await self.candles.get(connection, symbol, '15m', 200)
+            if not m15:
+                raise AnalysisError(f"No M15 candles for {symbol}")
+            recent_m15 = m15[-10:]  # check last 10 candles
+            trigger, trigger_idx = last_pin_bar(CandleArrays.from_candles(recent_m15))
             if not trigger:
                 return None
 
@@ -120,8 +107,11 @@ class TradingEngine:
                 "tp1": round(tp1, 5), "tp2": round(tp2, 5), "tp3": round(tp3, 5),
                 "sl": round(sl, 5),
                 "tp1_pips": tp1_pips, "tp2_pips": tp2_pips, "tp3_pips": tp3_pips,
-                "sl_pips": sl_pips
+                "sl_pips": sl_pips,
+                "trigger_time": candle_ts(recent_m15[trigger_idx]),
             }
+        except AnalysisError:
+            raise
         except Exception as e:
             logger.exception("Engine analyze error for %s: %s", symbol, e)
-            return None
+            raise AnalysisError(f"Engine error for {symbol}: {e}") from e
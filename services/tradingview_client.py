@@ -1,57 +1,200 @@
-import os, asyncio
+import os, asyncio, time
+from typing import Dict, Optional
 from services.logger import get_logger
-from config import TV_EMAIL, TV_PASSWORD, SCREENSHOT_DIR
+from config import (
+    TV_EMAIL, TV_PASSWORD, SCREENSHOT_DIR, TV_CHART_URL, TV_LOGIN_URL, TV_CHART_SELECTOR,
+    TV_STATE_PATH, TV_POOL_SIZE, TV_MAX_QUEUE, TV_CAPTURE_TIMEOUT,
+)
 
 logger = get_logger("tradingview")
 
-# Playwright automation for TradingView chart screenshots
-async def screenshot_chart(symbol: str, timeframe: str = "15", dark: bool = True) -> str:
+# Switch symbol/interval in place on an already-loaded TradingView chart (no page reload).
+# Returns false when the page has no chart API, in which case we navigate instead.
+_SWITCH_JS = """
+([symbol, interval]) => {
+    const api = window.TradingViewApi;
+    if (!api || !api.activeChart) return false;
+    const chart = api.activeChart();
+    chart.setSymbol(symbol);
+    chart.setResolution(interval);
+    return true;
+}
+"""
+
+class ChartBrowser:
     """
-    Returns the local file path to the captured chart screenshot, or '' on failure.
+    Long-lived Playwright Chromium with a logged-in context (storage state persisted to
+    disk) and a small pool of warm chart pages. A capture borrows a page, switches it to
+    the requested symbol/interval and screenshots the chart element. Waiting captures
+    are bounded; beyond that, and on per-capture timeout, capture() returns ''.
     """
-    try:
-        from playwright.async_api import async_playwright
-    except Exception as e:
-        logger.exception("Playwright import error: %s", e)
-        return ""
-
-    os.makedirs(SCREENSHOT_DIR, exist_ok=True)
-    out_path = os.path.join(SCREENSHOT_DIR, f"{symbol.replace('/','_')}_{timeframe}.png")
-
-    try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True, args=["--no-sandbox"])
-            context = await browser.new_context()
-            page = await context.new_page()
-
-            # Login
-            await page.goto("https://www.tradingview.com/#signin")
-            await page.wait_for_timeout(2500)
+    def __init__(self, chart_url: str = TV_CHART_URL, chart_selector: str = TV_CHART_SELECTOR,
+                 state_path: str = TV_STATE_PATH, pool_size: int = TV_POOL_SIZE,
+                 max_queue: int = TV_MAX_QUEUE, capture_timeout: float = TV_CAPTURE_TIMEOUT,
+                 login: bool = bool(TV_EMAIL and TV_PASSWORD), settle_ms: int = 250, start_retry_s: float = 60.0):
+        self.chart_url = chart_url
+        self.chart_selector = chart_selector
+        self.state_path = state_path
+        self.pool_size = pool_size
+        self.max_queue = max_queue
+        self.capture_timeout = capture_timeout
+        self.login = login
+        self.settle_ms = settle_ms
+        self.start_retry_s = start_retry_s
+        self._pw = None
+        self._browser = None
+        self._context = None
+        self._pages: Optional[asyncio.Queue] = None
+        self._start_lock: Optional[asyncio.Lock] = None
+        self._waiting = 0
+        self._start_failed_until = 0.0  # monotonic; no relaunch attempts before this
+        self.start_failures = 0
+        self.captures = 0
+        self.rejected = 0
+        self.timeouts = 0
+        self.last_capture_s: Optional[float] = None
+
+    @property
+    def started(self) -> bool:
+        return self._context is not None
+
+    def _start_failed(self):
+        self.start_failures += 1
+        self._start_failed_until = time.monotonic() + self.start_retry_s
+        logger.warning("Chart browser unavailable, next start attempt in %ss", self.start_retry_s)
+
+    async def start(self) -> bool:
+        # After a failed launch (e.g. no Chromium), captures fail fast instead of queueing behind relaunches
+        if time.monotonic() < self._start_failed_until:
+            return self.started
+        if self._start_lock is None:
+            self._start_lock = asyncio.Lock()
+        async with self._start_lock:
+            if self.started:
+                return True
+            if time.monotonic() < self._start_failed_until:
+                return False
+            try:
+                from playwright.async_api import async_playwright
+            except Exception as e:
+                logger.exception("Playwright import error: %s", e)
+                self._start_failed()
+                return False
+            try:
+                self._pw = await async_playwright().start()
+                self._browser = await self._pw.chromium.launch(headless=True, args=["--no-sandbox"])
+                has_state = bool(self.state_path) and os.path.exists(self.state_path)
+                self._context = await self._browser.new_context(
+                    storage_state=self.state_path if has_state else None,
+                    viewport={"width": 1280, "height": 720},
+                )
+                if self.login and not has_state:
+                    await self._login()
+                self._pages = asyncio.Queue()
+                for _ in range(self.pool_size):
+                    self._pages.put_nowait(await self._context.new_page())
+                logger.info("Chart browser ready (%d pages, saved session: %s)", self.pool_size, has_state)
+                return True
+            except Exception as e:
+                logger.exception("Chart browser start failed: %s", e)
+                await self.close()
+                self._start_failed()
+                return False
+
+    async def _login(self):
+        page = await self._context.new_page()
+        try:
+            await page.goto(TV_LOGIN_URL)
             await page.click("text=Email")
-            await page.wait_for_selector("input[name='email']")
             await page.fill("input[name='email']", TV_EMAIL)
             await page.fill("input[name='password']", TV_PASSWORD)
             await page.click("button[type='submit']")
+            await page.wait_for_load_state("networkidle", timeout=15000)
+            if self.state_path:
+                os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+                await self._context.storage_state(path=self.state_path)
+            logger.info("TradingView session saved to %s", self.state_path)
+        except Exception as e:
+            logger.warning("TradingView login failed, continuing anonymously: %s", e)
+        finally:
+            await page.close()
 
-            await page.wait_for_timeout(4000)
-            # Open chart for symbol (general URL pattern)
-            await page.goto(f"https://www.tradingview.com/chart/?symbol=FX_IDC:{symbol.replace('/','')}")
-            await page.wait_for_timeout(5000)
+    async def _render(self, page, symbol: str, timeframe: str, out_path: str):
+        switched = False
+        if page.url.startswith(("http", "file")):
+            switched = await page.evaluate(_SWITCH_JS, [symbol, timeframe])
+        if switched:
+            await page.wait_for_timeout(self.settle_ms)
+        else:
+            await page.goto(self.chart_url.format(symbol=symbol, interval=timeframe), wait_until="domcontentloaded")
+        chart = await page.wait_for_selector(self.chart_selector, state="visible")
+        await chart.screenshot(path=out_path)
 
-            # Set timeframe
-            await page.keyboard.press("KeyS")  # open symbol/timeframe panel if needed
-            await page.wait_for_timeout(500)
-            # Use URL param fallback for timeframe by navigating again
-            await page.goto(f"https://www.tradingview.com/chart/?symbol=FX_IDC:{symbol.replace('/','')}&interval={timeframe}")
-            await page.wait_for_timeout(4000)
+    async def capture(self, symbol: str, timeframe: str = "15") -> str:
+        """Returns the local file path to the captured chart, or '' on failure/overload."""
+        if not self.started and not await self.start():
+            return ""
+        if self._waiting >= self.max_queue:
+            self.rejected += 1
+            logger.warning("Chart capture queue full, skipping %s", symbol)
+            return ""
+        os.makedirs(SCREENSHOT_DIR, exist_ok=True)
+        out_path = os.path.join(SCREENSHOT_DIR, f"{symbol.replace('/','_')}_{timeframe}.png")
+        t0 = time.perf_counter()
+        self._waiting += 1
+        try:
+            page = await asyncio.wait_for(self._pages.get(), self.capture_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            logger.warning("No free chart page for %s within %ss", symbol, self.capture_timeout)
+            return ""
+        finally:
+            self._waiting -= 1
+        try:
+            remaining = max(0.1, self.capture_timeout - (time.perf_counter() - t0))
+            await asyncio.wait_for(self._render(page, symbol.replace('/', ''), timeframe, out_path), remaining)
+            self.captures += 1
+            self.last_capture_s = round(time.perf_counter() - t0, 3)
+            logger.info("Saved chart screenshot: %s (%ss)", out_path, self.last_capture_s)
+            return out_path
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.timeouts += 1
+            logger.exception("Chart capture error for %s: %s", symbol, e)
+            # The page may be wedged mid-navigation; replace it to keep the pool healthy
+            try:
+                await page.close()
+                page = await self._context.new_page()
+            except Exception as e2:
+                logger.warning("Could not recycle chart page: %s", e2)
+            return ""
+        finally:
+            self._pages.put_nowait(page)
 
-            # Optional dark/light toggles can be skipped; capture viewport
-            await page.screenshot(path=out_path, full_page=True)
+    async def close(self):
+        for obj in (self._context, self._browser):
+            if obj is not None:
+                try:
+                    await obj.close()
+                except Exception as e:
+                    logger.warning("Chart browser close error: %s", e)
+        if self._pw is not None:
+            await self._pw.stop()
+        self._pw = self._browser = self._context = None
+        self._pages = None
 
-            await context.close()
-            await browser.close()
-            logger.info("Saved TradingView screenshot: %s", out_path)
-            return out_path
-    except Exception as e:
-        logger.exception("TradingView screenshot error: %s", e)
-        return ""
+    def stats(self) -> Dict:
+        return {
+            "started": self.started, "start_failures": self.start_failures, "captures": self.captures,
+            "rejected": self.rejected, "timeouts": self.timeouts, "waiting": self._waiting,
+            "last_capture_s": self.last_capture_s,
+        }
+
+chart_browser = ChartBrowser()
+
+# Playwright automation for TradingView chart screenshots
+async def screenshot_chart(symbol: str, timeframe: str = "15", dark: bool = True) -> str:
+    """
+    Returns the local file path to the captured chart screenshot, or '' on failure.
+    """
+    return await chart_browser.capture(symbol, timeframe)
@@ -0,0 +1,100 @@
+import asyncio, time
+from collections import deque
+from typing import Any, Awaitable, Dict, Optional
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+from services.logger import get_logger
+
+logger = get_logger("updates")
+
+class OrderedUpdateProcessor(BaseUpdateProcessor):
+    """
+    Concurrent update processing for PTB: updates from different users run in
+    parallel (up to `concurrency`), updates from the same user run one after another
+    in arrival order.
+
+    PTB's own semaphore (max_concurrent_updates) is set high; the real slot limit is
+    taken *after* the per-user lock, so updates queued behind their own user's
+    previous update don't hold a slot while they wait.
+    """
+    def __init__(self, concurrency: int = 64, backlog: int = 1024):
+        super().__init__(max(backlog, concurrency))
+        self.concurrency = concurrency
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._user_locks: Dict[int, asyncio.Lock] = {}
+        self._user_pending: Dict[int, int] = {}
+        self._waits = deque(maxlen=500)
+        self.waiting = 0
+        self.in_flight = 0
+        self.max_waiting = 0
+        self.processed = 0
+
+    async def initialize(self) -> None:
+        self._slots = asyncio.Semaphore(self.concurrency)
+
+    async def shutdown(self) -> None:
+        pass
+
+    @staticmethod
+    def _user_key(update: object) -> Optional[int]:
+        if isinstance(update, Update):
+            if update.effective_user:
+                return update.effective_user.id
+            if update.effective_chat:
+                return update.effective_chat.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        key = self._user_key(update)
+        lock = None
+        if key is not None:
+            lock = self._user_locks.get(key)
+            if lock is None:
+                lock = self._user_locks[key] = asyncio.Lock()
+            self._user_pending[key] = self._user_pending.get(key, 0) + 1
+        t0 = time.monotonic()
+        self.waiting += 1
+        self.max_waiting = max(self.max_waiting, self.waiting)
+        started = acquired = False
+        try:
+            if lock is not None:
+                await lock.acquire()
+                acquired = True
+            async with self._slots:
+                self.waiting -= 1
+                started = True
+                self._waits.append(time.monotonic() - t0)
+                self.in_flight += 1
+                try:
+                    await coroutine
+                finally:
+                    self.in_flight -= 1
+                    self.processed += 1
+        finally:
+            if acquired:
+                lock.release()
+            if not started:
+                self.waiting -= 1
+                coroutine.close()  # never awaited (cancelled while queued)
+            if key is not None:
+                self._user_pending[key] -= 1
+                if not self._user_pending[key]:
+                    del self._user_pending[key]
+                    del self._user_locks[key]
+
+    @staticmethod
+    def _wait_stats(waits) -> Dict:
+        if not waits:
+            return {"avg_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordered = sorted(waits)
+        return {"avg_ms": round(sum(ordered) / len(ordered) * 1000, 1),
+                "p95_ms": round(ordered[int(0.95 * (len(ordered) - 1))] * 1000, 1),
+                "max_ms": round(ordered[-1] * 1000, 1)}
+
+    def stats(self, update_queue: asyncio.Queue = None) -> Dict:
+        return {
+            "queued": update_queue.qsize() if update_queue is not None else None,
+            "waiting": self.waiting, "max_waiting": self.max_waiting, "in_flight": self.in_flight,
+            "processed": self.processed, "users_pending": len(self._user_pending),
+            "wait": self._wait_stats(self._waits),
+        }
@@ -0,0 +1,133 @@
+import asyncio, hmac, json, signal, time
+from typing import Dict, Optional
+from aiohttp import web
+from telegram import Update
+from services.logger import get_logger
+
+logger = get_logger("webhook")
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+class WebhookServer:
+    """
+    Local aiohttp endpoint for Telegram webhooks. POST <path> checks the secret-token
+    header, drops the raw JSON into a bounded internal queue and answers 200 at once;
+    a dispatcher task decodes updates and feeds them to the PTB update queue. A full
+    queue answers 503 so Telegram redelivers later. GET /healthz reports liveness and
+    counters. Nothing here talks to Telegram, so recorded update JSON can be POSTed
+    to localhost to drive the bot end to end.
+    """
+    def __init__(self, bot, update_queue: asyncio.Queue, host: str = "0.0.0.0", port: int = 8443,
+                 path: str = "/telegram", secret: str = "", max_queue: int = 1000):
+        if not secret:
+            raise ValueError("Webhook mode needs WEBHOOK_SECRET (sent back by Telegram in %s)" % SECRET_HEADER)
+        self.bot = bot
+        self.update_queue = update_queue
+        self.host, self.port, self.path = host, port, path
+        self.secret = secret.encode("utf-8")
+        self._inbox: asyncio.Queue = asyncio.Queue(max_queue)
+        self._runner: Optional[web.AppRunner] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+        self.received = 0
+        self.rejected = 0
+        self.malformed = 0
+        self.overflow = 0
+        self.dispatched = 0
+        self.last_update_at: Optional[float] = None
+
+    def _web_app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_post(self.path, self._handle_update)
+        app.router.add_get("/healthz", self._handle_health)
+        return app
+
+    async def _handle_update(self, request: web.Request) -> web.Response:
+        token = request.headers.get(SECRET_HEADER, "").encode("utf-8")
+        if not hmac.compare_digest(token, self.secret):
+            self.rejected += 1
+            return web.Response(status=403)
+        try:
+            data = await request.json()
+            if not isinstance(data, dict) or "update_id" not in data:
+                raise ValueError("not an update")
+        except (ValueError, json.JSONDecodeError):
+            self.malformed += 1
+            return web.Response(status=400)
+        try:
+            self._inbox.put_nowait(data)
+        except asyncio.QueueFull:
+            self.overflow += 1
+            return web.Response(status=503)
+        self.received += 1
+        self.last_update_at = time.time()
+        return web.Response(status=200)
+
+    async def _handle_health(self, request: web.Request) -> web.Response:
+        healthy = self._dispatcher is not None and not self._dispatcher.done() and not self._inbox.full()
+        body = dict(self.stats(), status="ok" if healthy else "degraded")
+        return web.json_response(body, status=200 if healthy else 503)
+
+    async def _dispatch(self):
+        while True:
+            data = await self._inbox.get()
+            try:
+                update = Update.de_json(data, self.bot)
+                await self.update_queue.put(update)
+                self.dispatched += 1
+            except Exception as e:
+                self.malformed += 1
+                logger.exception("Dropping undecodable update %s: %s", data.get("update_id"), e)
+
+    async def start(self, reuse_port: bool = False):
+        self._dispatcher = asyncio.get_running_loop().create_task(self._dispatch())
+        self._runner = web.AppRunner(self._web_app(), access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port, reuse_port=reuse_port or None).start()
+        logger.info("Webhook server listening on %s:%s%s", self.host, self.port, self.path)
+
+    async def stop(self):
+        if self._runner:
+            await self._runner.cleanup()
+            self._runner = None
+        if self._dispatcher:
+            # Hand over whatever was already accepted before stopping the dispatcher
+            while not self._inbox.empty() and not self._dispatcher.done():
+                await asyncio.sleep(0.05)
+            self._dispatcher.cancel()
+            await asyncio.gather(self._dispatcher, return_exceptions=True)
+            self._dispatcher = None
+
+    def stats(self) -> Dict:
+        return {"received": self.received, "dispatched": self.dispatched, "queued": self._inbox.qsize(),
+                "rejected": self.rejected, "malformed": self.malformed, "overflow": self.overflow,
+                "last_update_at": self.last_update_at}
+
+async def run_webhook(app, server: WebhookServer, public_url: str = "", reuse_port: bool = False):
+    """
+    Run a PTB Application on the webhook server until SIGINT/SIGTERM: initialize,
+    post_init, start, serve, then stop in reverse order. If public_url is set the
+    webhook is (re)registered with Telegram, including the secret token.
+    """
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass
+    async with app:
+        if app.post_init:
+            await app.post_init(app)
+        await app.start()
+        await server.start(reuse_port)
+        if public_url:
+            await app.bot.set_webhook(url=public_url.rstrip("/") + server.path, secret_token=server.secret.decode("utf-8"),
+                                      allowed_updates=Update.ALL_TYPES)
+            logger.info("Webhook registered at %s%s", public_url.rstrip("/"), server.path)
+        try:
+            await stop.wait()
+        finally:
+            await server.stop()
+            await app.stop()
+            if app.post_stop:
+                await app.post_stop(app)
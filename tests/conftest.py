@@ -0,0 +1,6 @@
+import os, sys, tempfile
+
+# Tests import the bot's modules from the repo root and never touch data/bot.db
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("BOT_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="bot-tests-"), "bot.db"))
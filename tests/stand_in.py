@@ -0,0 +1,23 @@
+import os
+from contextlib import asynccontextmanager
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+FIXTURES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks", "fixtures")
+
+def fixture(name: str) -> str:
+    with open(os.path.join(FIXTURES, name), encoding="utf-8") as f:
+        return f.read()
+
+@asynccontextmanager
+async def stand_in(routes):
+    """Local HTTP server for {path: handler}; yields a function mapping path -> URL."""
+    app = web.Application()
+    for path, handler in routes.items():
+        app.router.add_get(path, handler)
+    server = TestServer(app)
+    await server.start_server()
+    try:
+        yield lambda path: str(server.make_url(path))
+    finally:
+        await server.close()
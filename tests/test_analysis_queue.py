@@ -0,0 +1,120 @@
+import asyncio
+import pytest
+from services.analysis_queue import AnalysisQueue, QueueBusy, DeadlineExceeded
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def run(body, **kwargs):
+    async def go():
+        q = AnalysisQueue(clock=FakeClock(), **kwargs)
+        gate, ran = asyncio.Event(), []
+
+        def job(name, wait=False):
+            async def fn():
+                ran.append(name)
+                if wait:
+                    await gate.wait()
+                return name
+            return fn
+        try:
+            return await body(q, job, gate, ran)
+        finally:
+            await q.stop()
+    return asyncio.run(go())
+
+async def settle():
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+def test_premium_first_then_fifo_within_a_tier():
+    async def body(q, job, gate, ran):
+        q.submit("busy", job("busy", wait=True))
+        await settle()  # the only worker is now held by "busy"
+        tickets = [q.submit(k, job(k), tier) for k, tier in
+                   (("f1", "free"), ("f2", "free"), ("p1", "premium"), ("f3", "free"), ("p2", "premium"))]
+        assert [t.position for t in tickets] == [3, 4, 1, 5, 2]
+        gate.set()
+        await asyncio.gather(*(t.result() for t in tickets))
+        return ran
+    assert run(body, workers=1) == ["busy", "p1", "p2", "f1", "f2", "f3"]
+
+def test_duplicate_key_shares_the_job_and_lifts_its_priority():
+    async def body(q, job, gate, ran):
+        q.submit("busy", job("busy", wait=True))
+        await settle()
+        other = q.submit("other", job("other"), "free")
+        first = q.submit("EURUSD", job("EURUSD"), "free")
+        second = q.submit("EURUSD", job("EURUSD-dup"), "premium")
+        assert second.job is first.job and first.position == 1
+        gate.set()
+        assert await first.result() == await second.result() == "EURUSD"
+        await other.result()
+        return ran, q.stats()
+    ran, stats = run(body, workers=1)
+    assert ran == ["busy", "EURUSD", "other"]
+    assert stats["submitted"] == 3 and stats["coalesced"] == 1
+
+def test_free_requests_shed_first_then_everyone_at_max_queue():
+    async def body(q, job, gate, ran):
+        q.submit("busy", job("busy", wait=True))
+        await settle()
+        q.submit("f1", job("f1"))
+        q.submit("f2", job("f2"))
+        with pytest.raises(QueueBusy):
+            q.submit("f3", job("f3"))
+        q.submit("p1", job("p1"), "premium")
+        with pytest.raises(QueueBusy):
+            q.submit("p2", job("p2"), "premium")
+        gate.set()
+        return q.stats()
+    stats = run(body, workers=1, free_shed_at=2, max_queue=3)
+    assert stats["shed"] == 2 and stats["queued"] == 3
+
+def test_job_past_its_deadline_expires_without_a_worker():
+    async def body(q, job, gate, ran):
+        q.submit("busy", job("busy", wait=True), deadline_s=600)
+        await settle()
+        ticket = q.submit("late", job("late"), deadline_s=10)
+        q.clock.now += 11  # every requester has given up by the time a worker frees up
+        gate.set()
+        await settle()
+        with pytest.raises(DeadlineExceeded):
+            await ticket.result()
+        return ran, q.stats()
+    ran, stats = run(body, workers=1)
+    assert ran == ["busy"] and stats["expired"] == 1 and stats["completed"] == 1
+
+def test_ticket_deadline_does_not_cancel_the_shared_job():
+    async def body(q, job, gate, ran):
+        impatient = q.submit("EURUSD", job("EURUSD", wait=True), deadline_s=0.05)
+        patient = q.submit("EURUSD", job("EURUSD"), deadline_s=60)
+        with pytest.raises(DeadlineExceeded):
+            await impatient.result()
+        gate.set()
+        return await patient.result(), q.stats()
+    result, stats = run(body, workers=1)
+    assert result == "EURUSD" and stats["timeouts"] == 1 and stats["completed"] == 1
+
+def test_position_callbacks_are_kept_until_done_and_cancelled_on_stop():
+    async def body(q, job, gate, ran):
+        seen, hang = [], asyncio.Event()
+
+        async def edit(pos):
+            seen.append(pos)
+            await hang.wait()  # like a slow msg.edit_text
+        q.submit("busy", job("busy", wait=True))
+        await settle()
+        q.submit("a", job("a")).on_position(edit)
+        q.submit("b", job("b"), "premium")  # moves "a" to position 2
+        await settle()
+        pending = set(q._callback_tasks)
+        await q.stop()
+        return seen, pending, q._callback_tasks
+    seen, pending, left = run(body, workers=1)
+    assert seen == [2] and len(pending) == 1
+    assert all(t.cancelled() for t in pending) and not left
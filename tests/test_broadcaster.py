@@ -0,0 +1,55 @@
+import asyncio
+from services import broadcaster as bc
+from services.state import MemoryState
+
+def engine_with(monkeypatch, state, owner, jobs):
+    async def running(fn, *args):
+        return [{"id": j} for j in jobs]
+    monkeypatch.setattr(bc, "run_read", running)
+    engine = bc.BroadcastEngine(None, rate=1000, state=state, owner=owner, lease_ttl=30)
+    engine.sent = []
+
+    async def run(job_id):
+        engine.sent.append(job_id)
+    engine._run = run
+    return engine
+
+def test_resume_skips_jobs_leased_by_a_live_worker(monkeypatch):
+    async def go():
+        state = MemoryState()
+        await state.acquire_lease("broadcast:1", "worker-a", 30)
+        engine = engine_with(monkeypatch, state, "worker-b", [1, 2])
+        assert await engine.resume_unfinished() == 1
+        await asyncio.sleep(0)
+        return engine.sent
+    assert asyncio.run(go()) == [2]
+
+def test_resume_takes_over_a_lapsed_lease(monkeypatch):
+    now = [1000.0]
+    async def go():
+        state = MemoryState(clock=lambda: now[0])
+        await state.acquire_lease("broadcast:1", "worker-a", 30)
+        engine = engine_with(monkeypatch, state, "worker-b", [1])
+        assert await engine.resume_unfinished() == 0
+        now[0] += 31  # worker-a died and stopped renewing
+        assert await engine.resume_unfinished() == 1
+        await asyncio.sleep(0)
+        return engine.sent
+    assert asyncio.run(go()) == [1]
+
+def test_resume_does_not_duplicate_own_running_job(monkeypatch):
+    async def go():
+        engine = engine_with(monkeypatch, MemoryState(), "worker-a", [1])
+        gate = asyncio.Event()
+
+        async def run(job_id):
+            engine.sent.append(job_id)
+            await gate.wait()
+        engine._run = run
+        assert await engine.resume_unfinished() == 1
+        await asyncio.sleep(0)
+        assert await engine.resume_unfinished() == 0
+        gate.set()
+        await asyncio.sleep(0)
+        return engine.sent
+    assert asyncio.run(go()) == [1]
@@ -0,0 +1,36 @@
+import asyncio
+from services.candle_cache import CandleCache
+
+H4 = 4 * 3600
+T0 = 1_760_000_400 // H4 * H4  # an H4 bar boundary
+
+class FakeClient:
+    """Serves H4 bars up to the forming one, whose close follows price()."""
+    def __init__(self, clock, price):
+        self.clock, self.price = clock, price
+        self.requests = []
+
+    async def get_candles(self, connection, symbol, timeframe, count):
+        self.requests.append(count)
+        forming = (self.clock() // H4) * H4
+        return [{"time": forming - i * H4, "open": 1.0, "high": 2.0, "low": 0.5, "close": self.price()}
+                for i in reversed(range(count))]
+
+def test_forming_htf_bar_refreshes_every_m15():
+    now, price = [T0 + 60], [1.10]
+    client = FakeClient(lambda: now[0], lambda: price[0])
+    cache = CandleCache(client, clock=lambda: now[0])
+
+    async def last_close():
+        return (await cache.get(None, "EURUSD", "4h", 50))[-1]["close"]
+
+    async def go():
+        assert await last_close() == 1.10
+        price[0] = 1.12
+        now[0] += 300  # same M15 bar: served from memory
+        assert await last_close() == 1.10
+        now[0] += 900  # next M15 close: the forming H4 bar is re-read, not the history
+        assert await last_close() == 1.12
+        return client.requests
+    assert asyncio.run(go()) == [50, 1]
+    assert len(cache.peek("EURUSD", "4h")) == 50
@@ -0,0 +1,69 @@
+import asyncio, os, sys
+import pytest
+from aiohttp import web
+from tests.stand_in import stand_in
+from services import tradingview_client as tvc
+
+# Offline stand-in for the TradingView chart page: a visible chart element plus the
+# chart API that ChartBrowser uses to switch symbol/interval in place
+CHART_PAGE = """<!doctype html><html><body style="margin:0">
+<div class="chart-container" style="width:400px;height:200px;background:#131722;color:#fff">
+  <span id="label">{symbol} {interval}</span>
+</div>
+<script>
+window.TradingViewApi = {{activeChart: () => ({{
+  setSymbol: s => {{ window.switched = (window.switched || 0) + 1; label.textContent = s; }},
+  setResolution: r => {{ label.textContent += " " + r; }},
+}})}};
+</script></body></html>"""
+
+def test_capture_navigates_once_then_switches_in_place(tmp_path, monkeypatch):
+    pytest.importorskip("playwright.async_api")
+    monkeypatch.setattr(tvc, "SCREENSHOT_DIR", str(tmp_path))
+    loads = []
+
+    async def chart(request):
+        loads.append(request.query["symbol"])
+        return web.Response(text=CHART_PAGE.format(**request.query), content_type="text/html")
+
+    async def go():
+        async with stand_in({"/chart": chart}) as url:
+            browser = tvc.ChartBrowser(chart_url=url("/chart") + "?symbol={symbol}&interval={interval}",
+                                       state_path="", pool_size=1, capture_timeout=20, login=False, settle_ms=0)
+            if not await browser.start():
+                pytest.skip("Chromium for Playwright is not installed")
+            try:
+                first = await browser.capture("EUR/USD", "15")
+                second = await browser.capture("GBP/USD", "60")
+                return first, second, browser.stats()
+            finally:
+                await browser.close()
+    first, second, stats = asyncio.run(go())
+    assert first == os.path.join(str(tmp_path), "EUR_USD_15.png") and os.path.getsize(first) > 0
+    assert second == os.path.join(str(tmp_path), "GBP_USD_60.png") and os.path.getsize(second) > 0
+    assert loads == ["EURUSD"]  # the warm page switched symbol without reloading
+    assert stats["captures"] == 2 and stats["timeouts"] == 0
+
+def test_full_queue_rejects_instead_of_waiting(tmp_path, monkeypatch):
+    monkeypatch.setattr(tvc, "SCREENSHOT_DIR", str(tmp_path))
+
+    async def go():
+        browser = tvc.ChartBrowser(state_path="", pool_size=1, max_queue=0, login=False)
+        browser._context = object()  # pretend started: no browser needed for this path
+        return await browser.capture("EUR/USD"), browser.stats()
+    path, stats = asyncio.run(go())
+    assert path == "" and stats["rejected"] == 1
+
+def test_failed_start_backs_off_instead_of_relaunching(tmp_path, monkeypatch):
+    monkeypatch.setattr(tvc, "SCREENSHOT_DIR", str(tmp_path))
+    monkeypatch.setitem(sys.modules, "playwright.async_api", None)  # as if Playwright were missing
+
+    async def go():
+        browser = tvc.ChartBrowser(state_path="", login=False, start_retry_s=60)
+        paths = await asyncio.gather(*(browser.capture("EUR/USD") for _ in range(5)))
+        first = browser.stats()["start_failures"]
+        browser._start_failed_until = 0  # retry window over: the next capture tries again
+        await browser.capture("EUR/USD")
+        return paths, first, browser.stats()["start_failures"]
+    paths, first, after_retry = asyncio.run(go())
+    assert paths == [""] * 5 and first == 1 and after_retry == 2
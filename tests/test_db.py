@@ -0,0 +1,57 @@
+import asyncio, threading
+from services import db, db_async
+
+db.init_db()
+
+def test_cache_sees_write_committed_after_a_concurrent_miss():
+    db.upsert_user(1001, "alice", "Alice")
+    db.invalidate_user_cache()
+    with db._write():
+        db.set_user_tier(1001, "premium", 1)
+        # A miss while the transaction is open reads (and may cache) the committed row
+        assert db.get_user(1001)["tier"] == "free"
+    assert db.get_user(1001)["tier"] == "premium"
+
+def test_batched_write_reaches_cache():
+    db.upsert_user(1002, "bob", "Bob")
+    assert db.get_user(1002)["tier"] == "free"
+
+    async def run():
+        await db_async.set_user_tier(1002, "premium", 1)
+        await db_async.flush()
+    asyncio.run(run())
+    assert db.get_user(1002)["tier"] == "premium"
+
+def test_rolled_back_write_never_reaches_cache():
+    db.upsert_user(1003, "carol", "Carol")
+    assert db.get_user(1003)["tier"] == "free"
+    try:
+        with db._write():
+            db.set_user_tier(1003, "premium", 1)
+            raise RuntimeError("abort")
+    except RuntimeError:
+        pass
+    assert db.get_user(1003)["tier"] == "free"
+
+def test_failed_op_in_batch_keeps_the_others():
+    db.upsert_user(1004, "dan", "Dan")
+    assert db.get_user(1004)["tier"] == "free"
+
+    def fail(user_id):
+        db.set_user_tier(user_id, "premium", 1)
+        raise ValueError("boom")
+    results = db_async._apply_batch([(fail, (1004,)), (db.mark_feedback_ts, (1004, 42))])
+    assert not results[0][0] and results[1][0]
+    row = db.get_user(1004)
+    assert row["tier"] == "free" and row["feedback_last_ts"] == 42
+
+def test_new_reader_thread_does_not_wait_for_the_writer():
+    db.upsert_user(1002, "bob", "Bob")
+    db.invalidate_user_cache()
+    seen = []
+    reader = threading.Thread(target=lambda: seen.append(db.get_user(1002)["username"]))
+    with db._write():
+        reader.start()  # opens its own connection while the write transaction is open
+        reader.join(2)
+        assert not reader.is_alive()
+    assert seen == ["bob"]
@@ -0,0 +1,153 @@
+import asyncio
+import aiohttp
+import pytest
+from aiohttp import web
+from services import forexfactory_scraper, reuters_scraper
+from services.http_client import HttpFetcher
+from stand_in import fixture, stand_in
+
+REUTERS_PAGE = fixture("reuters_currencies.html")
+CALENDAR_PAGE = fixture("forexfactory_calendar.html")
+LAST_MODIFIED = "Sun, 18 Oct 2026 06:00:00 GMT"
+
+def run(coro):
+    return asyncio.run(coro)
+
+def recorded_routes(hits):
+    async def reuters(request):
+        hits.append(("reuters", request.headers.get("If-None-Match")))
+        if request.headers.get("If-None-Match") == '"v1"':
+            return web.Response(status=304, headers={"ETag": '"v1"'})
+        return web.Response(text=REUTERS_PAGE, content_type="text/html", headers={"ETag": '"v1"'})
+
+    async def calendar(request):
+        hits.append(("calendar", request.headers.get("If-Modified-Since")))
+        if request.headers.get("If-Modified-Since") == LAST_MODIFIED:
+            return web.Response(status=304)
+        return web.Response(text=CALENDAR_PAGE, content_type="text/html", headers={"Last-Modified": LAST_MODIFIED})
+    return {"/markets/currencies/": reuters, "/calendar": calendar}
+
+def test_etag_revalidation_reuses_cached_body():
+    async def go():
+        hits = []
+        async with stand_in(recorded_routes(hits)) as url:
+            fetcher = HttpFetcher(ttl=0)
+            first = await fetcher.get_text(url("/markets/currencies/"))
+            second = await fetcher.get_text(url("/markets/currencies/"))
+            await fetcher.close()
+        return hits, first, second, fetcher.stats()
+    hits, first, second, stats = run(go())
+    assert first == second == REUTERS_PAGE
+    assert hits == [("reuters", None), ("reuters", '"v1"')]
+    assert stats["downloads"] == 1 and stats["not_modified"] == 1
+
+def test_last_modified_revalidation():
+    async def go():
+        hits = []
+        async with stand_in(recorded_routes(hits)) as url:
+            fetcher = HttpFetcher(ttl=0)
+            await fetcher.get_text(url("/calendar"))
+            body = await fetcher.get_text(url("/calendar"))
+            await fetcher.close()
+        return hits, body, fetcher.stats()
+    hits, body, stats = run(go())
+    assert body == CALENDAR_PAGE
+    assert hits == [("calendar", None), ("calendar", LAST_MODIFIED)]
+    assert stats["not_modified"] == 1
+
+def test_fresh_entry_is_served_without_a_request():
+    async def go():
+        hits = []
+        async with stand_in(recorded_routes(hits)) as url:
+            fetcher = HttpFetcher(ttl=60)
+            await fetcher.get_text(url("/calendar"))
+            await fetcher.get_text(url("/calendar"))
+            await fetcher.close()
+        return hits, fetcher.stats()
+    hits, stats = run(go())
+    assert len(hits) == 1 and stats["cache_hits"] == 1
+
+def test_server_errors_are_retried():
+    async def go():
+        calls = []
+
+        async def flaky(request):
+            calls.append(1)
+            if len(calls) < 3:
+                return web.Response(status=503)
+            return web.Response(text="ok")
+        async with stand_in({"/flaky": flaky}) as url:
+            fetcher = HttpFetcher(ttl=0, retries=2, backoff=0)
+            body = await fetcher.get_text(url("/flaky"))
+            await fetcher.close()
+        return body, len(calls), fetcher.stats()
+    body, calls, stats = run(go())
+    assert body == "ok" and calls == 3 and stats["retried"] == 2
+
+def test_client_errors_are_not_retried():
+    async def go():
+        calls = []
+
+        async def missing(request):
+            calls.append(1)
+            return web.Response(status=404)
+        async with stand_in({"/missing": missing}) as url:
+            fetcher = HttpFetcher(ttl=0, retries=2, backoff=0)
+            try:
+                with pytest.raises(aiohttp.ClientResponseError):
+                    await fetcher.get_text(url("/missing"))
+            finally:
+                await fetcher.close()
+        return len(calls)
+    assert run(go()) == 1
+
+def test_timeouts_are_retried_then_raised():
+    async def go():
+        calls = []
+
+        async def slow(request):
+            calls.append(1)
+            await asyncio.sleep(1)
+            return web.Response(text="late")
+        async with stand_in({"/slow": slow}) as url:
+            fetcher = HttpFetcher(ttl=0, timeout=0.1, retries=1, backoff=0)
+            try:
+                with pytest.raises(asyncio.TimeoutError):
+                    await fetcher.get_text(url("/slow"))
+            finally:
+                await fetcher.close()
+        return len(calls)
+    assert run(go()) == 2
+
+def test_scrapers_parse_recorded_pages(monkeypatch):
+    async def go():
+        async with stand_in(recorded_routes([])) as url:
+            fetcher = HttpFetcher(ttl=0)
+            for module in (reuters_scraper, forexfactory_scraper):
+                monkeypatch.setattr(module, "fetcher", fetcher)
+            monkeypatch.setattr(reuters_scraper, "REUTERS_FX_URL", url("/markets/currencies/"))
+            monkeypatch.setattr(forexfactory_scraper, "FOREXFACTORY_CALENDAR_URL", url("/calendar"))
+            headlines = await reuters_scraper.fetch_reuters_fx_headlines()
+            events = await forexfactory_scraper.fetch_calendar_events()
+            await fetcher.close()
+        return headlines, events
+    headlines, events = run(go())
+    assert len(headlines) == 10
+    assert headlines[0]["title"] == "Dollar slips as U.S. inflation cools, traders raise Fed cut bets"
+    assert headlines[0]["currencies"] == ["USD"]
+    high = [(e["currency"], e["title"]) for e in events if e["impact"] == "High"]
+    assert ("CAD", "CPI m/m") in high and ("USD", "Core CPI m/m") in high
+    assert len(events) == 11
+
+def test_scrapers_return_empty_when_the_site_is_down(monkeypatch):
+    async def go():
+        async def down(request):
+            return web.Response(status=500)
+        async with stand_in({"/down": down}) as url:
+            fetcher = HttpFetcher(ttl=0, retries=0)
+            monkeypatch.setattr(reuters_scraper, "fetcher", fetcher)
+            monkeypatch.setattr(reuters_scraper, "REUTERS_FX_URL", url("/down"))
+            headlines = await reuters_scraper.fetch_reuters_fx_headlines()
+            await fetcher.close()
+        return headlines
+    assert run(go()) == []
@@ -0,0 +1,66 @@
+import asyncio
+from services.economic_calendar import CalendarTimeline
+from services.lockdown import LockdownScheduler, merge_windows
+
+T0 = 1_792_300_000.0
+W = 0.1  # window before/after each event, in seconds
+
+def event(currency: str, at: float) -> dict:
+    return {"currency": currency, "event_utc": at, "impact": "High", "title": f"{currency} news"}
+
+def test_merge_windows_joins_overlaps_per_currency():
+    windows = merge_windows([event("USD", 1000), event("EUR", 1100), event("USD", 1500), event("USD", 3000)],
+                            before_s=300, after_s=600)
+    assert windows == {"USD": [(700, 2100), (2700, 3600)], "EUR": [(800, 1700)]}
+
+def run(body):
+    async def go():
+        loop = asyncio.get_running_loop()
+        base = loop.time()
+        clock = lambda: T0 + (loop.time() - base)  # wall clock that moves with the loop's timers
+        timeline = CalendarTimeline()
+        sched = LockdownScheduler(timeline, before_min=W / 60, after_min=W / 60, clock=clock)
+
+        def arm(*events):
+            timeline.load([event(c, clock() + dt) for c, dt in events], clock())
+            sched.rebuild()
+        return await body(sched, arm)
+    return asyncio.run(go())
+
+def test_window_already_active_at_rebuild_and_scoped_per_instrument():
+    async def body(sched, arm):
+        arm(("USD", 0.05))  # starts 0.05 s before "now"
+        return sched.is_locked("USD/JPY"), sched.is_locked("GBP/JPY"), sched.is_locked(), sched.locked_currencies()
+    assert run(body) == (True, False, True, ["USD"])
+
+def test_timers_lock_and_unlock_then_are_not_counted():
+    async def body(sched, arm):
+        arm(("JPY", 0.2))
+        states = [sched.is_locked("USD/JPY"), sched.stats()["timers"]]
+        await asyncio.sleep(0.15)
+        states.append(sched.is_locked("USD/JPY"))
+        await asyncio.sleep(0.2)
+        return states + [sched.is_locked("USD/JPY"), sched.stats()]
+    before, timers, during, after, stats = run(body)
+    assert (before, timers, during, after) == (False, 2, True, False)
+    assert stats["timers"] == 0 and stats["transitions"] == 2
+
+def test_merged_window_is_not_ended_by_the_first_events_timer():
+    async def body(sched, arm):
+        arm(("USD", 0.15), ("USD", 0.3))  # (0.05, 0.25) and (0.2, 0.4) merge into (0.05, 0.4)
+        await asyncio.sleep(0.3)  # past where the first window alone would have ended
+        mid = sched.is_locked("EUR/USD")
+        sched._unlock("USD", sched.clock())  # a stray close for another end is ignored as well
+        still = sched.is_locked("EUR/USD")
+        await asyncio.sleep(0.15)
+        return mid, still, sched.is_locked("EUR/USD")
+    assert run(body) == (True, True, False)
+
+def test_rebuild_cancels_previous_timers():
+    async def body(sched, arm):
+        arm(("GBP", 0.15))
+        old = list(sched._timers)
+        arm()  # the event was removed from the calendar
+        await asyncio.sleep(0.1)
+        return all(h.cancelled() for h in old), sched.is_locked("GBP/JPY"), sched.stats()["timers"], sched.transitions
+    assert run(body) == (True, False, 0, 0)
@@ -0,0 +1,33 @@
+import asyncio
+from services.market_scanner import SignalBoard, MarketScanner
+from services.trading_engine import AnalysisError
+
+class FakeHandler:
+    def __init__(self, results):
+        self.results = results
+
+    async def prepare_signal(self, instrument):
+        result = self.results[instrument]
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+def scan(results):
+    board = SignalBoard()
+    scanner = MarketScanner(FakeHandler(results), board, instruments=list(results))
+
+    async def run():
+        sem = asyncio.Semaphore(2)
+        await asyncio.gather(*(scanner._scan_one(sem, i) for i in results))
+    asyncio.run(run())
+    return board
+
+def test_no_setup_is_published_as_fresh_none():
+    board = scan({"EUR/USD": None, "GBP/USD": {"direction": "BUY"}})
+    assert board.lookup("EUR/USD") == (True, None)
+    assert board.lookup("GBP/USD") == (True, {"direction": "BUY"})
+
+def test_failed_analysis_is_not_published():
+    board = scan({"EUR/USD": AnalysisError("Master connection unavailable"), "USD/JPY": RuntimeError("bug")})
+    assert board.lookup("EUR/USD") == (False, None)
+    assert board.lookup("USD/JPY") == (False, None)
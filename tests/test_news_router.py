@@ -0,0 +1,32 @@
+from services import db
+from services.news_router import stamp_headlines, plan_digests
+
+db.init_db()
+
+def headline(i):
+    return {"title": f"Border tensions escalate, report {i}", "url": f"https://news.example.com/geo/{i}",
+            "categories": ["Geopolitical Events"]}
+
+def deliver(now, headlines, max_items=5):
+    plan = plan_digests(stamp_headlines(headlines, now), max_items)
+    db.set_news_watermarks({uid: wm for uid, (_, wm) in plan.items()})
+    return plan
+
+def test_overflow_is_carried_into_the_next_digest():
+    db.upsert_user(2001, "geo", "Geo Reader")
+    db.set_user_news_prefs(2001, geo=1)
+    page = [headline(i) for i in range(8)]
+
+    first = deliver(1_000_000.0, page)
+    assert [h["url"] for h in first[2001][0]] == [h["url"] for h in page[:5]]
+    second = deliver(1_000_900.0, page)
+    assert [h["url"] for h in second[2001][0]] == [h["url"] for h in page[5:]]
+    assert 2001 not in deliver(1_001_800.0, page)
+
+def test_new_headlines_follow_the_backlog():
+    db.upsert_user(2002, "geo2", "Geo Reader 2")
+    db.set_user_news_prefs(2002, geo=1)
+    old = [headline(100 + i) for i in range(3)]
+    deliver(2_000_000.0, old, max_items=2)
+    plan = deliver(2_000_900.0, [headline(200)] + old, max_items=2)
+    assert [h["url"] for h in plan[2002][0]] == [old[2]["url"], headline(200)["url"]]
@@ -0,0 +1,72 @@
+import pytest
+from benchmarks.bench_news_sources import FIXTURE_NOW, synthetic_items
+from services.news_sources import (NewsSource, ReutersSource, ForexFactorySource, RSSSource,
+                                   aggregate, cluster_items, normalize_item)
+from stand_in import fixture
+from utils.urls import canonical_url
+
+def parse_fixtures():
+    sources = [
+        (ReutersSource(), "reuters_currencies.html"),
+        (ForexFactorySource(clock=lambda: FIXTURE_NOW), "forexfactory_calendar.html"),
+        (RSSSource("fxnews", "https://fxnews.example.com/rss"), "fxnews_rss.xml"),
+        (RSSSource("wire", "https://marketswire.example.com/atom"), "markets_atom.xml"),
+    ]
+    return {source.name: source.parse(fixture(name)) for source, name in sources}
+
+BATCHES = parse_fixtures()
+
+def test_news_source_is_abstract():
+    with pytest.raises(TypeError):
+        NewsSource("https://example.com")
+
+def test_reuters_fixture():
+    items = BATCHES["reuters"]
+    assert len(items) == 10
+    assert items[0]["title"] == "Dollar slips as U.S. inflation cools, traders raise Fed cut bets"
+    assert items[0]["url"].startswith("https://www.reuters.com/markets/currencies/dollar-slips")
+    assert items[0]["currencies"] == ["USD"]
+    assert "Central Bank News (Fed, ECB)" in items[1]["categories"]
+
+def test_forexfactory_fixture_keeps_upcoming_high_impact_only():
+    items = BATCHES["forexfactory"]
+    assert [it["id"] for it in items] == [
+        "ff:1792583100:EUR:Main Refinancing Rate",
+        "ff:1792585800:USD:Core CPI m/m",
+        "ff:1792585800:USD:CPI y/y",
+    ]
+    assert all(FIXTURE_NOW <= it["published"] <= FIXTURE_NOW + 24 * 3600 for it in items)
+
+def test_rss_fixture():
+    items = BATCHES["fxnews"]
+    assert len(items) == 4
+    assert items[2] == {"title": "NZD/USD drops as RBNZ signals more easing",
+                        "url": "https://fxnews.example.com/news/nzdusd-rbnz", "published": 1792302900.0}
+
+def test_atom_fixture():
+    items = BATCHES["wire"]
+    assert [it["title"] for it in items] == [
+        "ECB holds rates steady, euro little changed as Lagarde keeps options open",
+        "Oil extends gains after OPEC+ agrees deeper output cut",
+        "Japan's finance minister warns on sharp yen moves",
+    ]
+    assert all(it["published"] for it in items)
+
+def test_fixtures_cluster_into_stories():
+    stories = aggregate(BATCHES)
+    assert len(stories) == 17
+    by_title = {s["title"]: s for s in stories}
+    dollar = by_title["Dollar slips as U.S. inflation cools, traders raise Fed cut bets"]
+    assert dollar["sources"] == ["fxnews", "reuters"] and dollar["cluster_size"] == 2
+    ecb = next(s for s in stories if s["title"].startswith("ECB holds rates steady"))
+    assert sorted(ecb["sources"]) == ["reuters", "wire"]
+
+def test_synthetic_retitles_collapse_onto_their_originals():
+    items = [normalize_item(it, it["source"]) for it in synthetic_items(1_000)]
+    assert len(cluster_items(items)) == sum(1 for it in items if it["source"] == "wire")
+
+def test_canonical_url_keeps_path_and_query_case():
+    assert canonical_url("HTTPS://WWW.Example.com/News/Story-A/?utm_source=x&id=AbC#top") == \
+        "https://example.com/News/Story-A?id=AbC"
+    assert canonical_url("https://example.com/a/Story") != canonical_url("https://example.com/a/story")
+    assert canonical_url("http://example.com/x?b=2&a=1&fbclid=z") == "https://example.com/x?a=1&b=2"
@@ -0,0 +1,56 @@
+import asyncio, time
+from datetime import timedelta
+from telegram.error import RetryAfter, TimedOut
+from services import broadcaster as bc
+from services.rate_limit import TokenBucket
+
+def test_no_burst_after_pause():
+    async def run():
+        bucket = TokenBucket(100, capacity=100)
+        for _ in range(100):
+            await bucket.acquire()
+        bucket.pause(0.3)
+        await asyncio.sleep(0.3)
+        start, sent = time.monotonic(), 0
+        while time.monotonic() - start < 0.05:
+            await bucket.acquire()
+            sent += 1
+        return sent
+    # ~100/s means about 5 sends in 50 ms; crediting the pause would release ~30 at once
+    assert asyncio.run(run()) <= 10
+
+class FloodedBot:
+    def __init__(self, errors):
+        self.errors = list(errors)
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append(chat_id)
+
+def send(bot, monkeypatch):
+    marks = []
+
+    async def mark(job_id, user_id, status, error=None):
+        marks.append(status)
+    monkeypatch.setattr(bc, "mark_broadcast_recipient", mark)
+    monkeypatch.setattr(bc.asyncio, "sleep", _no_sleep(asyncio.sleep))
+    engine = bc.BroadcastEngine(bot, rate=1000, max_attempts=3)
+    engine.per_chat.interval = 0
+    status = asyncio.run(engine._send(1, 42, "hi"))
+    return status, marks
+
+def _no_sleep(real_sleep):
+    async def sleep(seconds):
+        await real_sleep(0)
+    return sleep
+
+def test_retry_after_does_not_use_up_attempts(monkeypatch):
+    bot = FloodedBot([RetryAfter(timedelta(milliseconds=1))] * 5)
+    assert send(bot, monkeypatch) == ("sent", ["sent"])
+    assert bot.sent == [42]
+
+def test_network_errors_exhaust_attempts(monkeypatch):
+    bot = FloodedBot([TimedOut()] * 3)
+    assert send(bot, monkeypatch) == ("failed", ["failed"])
@@ -0,0 +1,111 @@
+import asyncio, random
+from datetime import datetime
+import pytest, pytz
+from services.scheduler import Scheduler, Interval, BarAligned, Cron
+
+def ts(s: str, tz: str = "UTC") -> float:
+    return pytz.timezone(tz).localize(datetime.strptime(s, "%Y-%m-%d %H:%M")).timestamp()
+
+class FakeClock:
+    def __init__(self, now: float):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+def test_cron_steps_lists_and_ranges():
+    c = Cron("*/15 9-17 * * 1-5")
+    assert c.next_after(ts("2026-10-16 09:07")) == ts("2026-10-16 09:15")
+    assert c.next_after(ts("2026-10-16 17:45")) == ts("2026-10-19 09:00")  # Friday evening -> Monday
+    assert Cron("0 8,20 * * *").next_after(ts("2026-10-16 08:00")) == ts("2026-10-16 20:00")
+
+def test_cron_day_fields_match_either_when_both_restricted():
+    c = Cron("0 0 1 * 1")  # the 1st of the month, or any Monday
+    assert c.next_after(ts("2026-10-27 12:00")) == ts("2026-11-01 00:00")
+    assert c.next_after(ts("2026-11-01 12:00")) == ts("2026-11-02 00:00")
+
+def test_cron_in_local_time_across_dst():
+    c = Cron("30 1 * * *", "Europe/London")
+    # 29 Mar 2026: clocks jump 01:00 -> 02:00; as in cron the skipped 01:30 still runs once, just after the jump
+    assert c.next_after(ts("2026-03-28 02:00", "Europe/London")) == ts("2026-03-29 02:30", "Europe/London")
+    assert c.next_after(ts("2026-03-29 02:30", "Europe/London")) == ts("2026-03-30 01:30", "Europe/London")
+    assert c.next_after(ts("2026-10-18 00:00", "Europe/London")) == ts("2026-10-18 01:30", "Europe/London")
+
+def test_bad_cron_rejected():
+    for expr in ("* * * *", "61 * * * *", "0 0 31 2 *"):
+        with pytest.raises(ValueError):
+            Cron(expr).next_after(ts("2026-10-16 00:00"))
+
+def test_bar_aligned_fires_after_each_close():
+    t = BarAligned("15m", 5)
+    assert t.next_after(ts("2026-10-16 10:07")) == ts("2026-10-16 10:15") + 5
+    assert t.next_after(ts("2026-10-16 10:15") + 5) == ts("2026-10-16 10:30") + 5
+
+def drive(body):
+    async def go():
+        clock = FakeClock(ts("2026-10-16 10:00"))
+        sched = Scheduler(clock=clock, rng=random.Random(1))
+        await body(sched, clock)
+        await sched.stop()
+    asyncio.run(go())
+
+def test_run_pending_follows_the_trigger_and_collapses_missed_slots():
+    runs = []
+    async def body(sched, clock):
+        async def job():
+            runs.append(clock())
+        sched.add("tick", job, Interval(60))
+        assert sched.run_pending() == []
+        clock.now += 60
+        assert len(sched.run_pending()) == 1
+        await asyncio.sleep(0)
+        clock.now += 600  # ten slots missed while stalled: one run, then back on the grid
+        sched.run_pending()
+        await asyncio.sleep(0)
+        assert sched.jobs["tick"].next_run == clock.now + 60
+    drive(body)
+    assert len(runs) == 2
+
+def test_overlapping_run_is_skipped_and_guard_holds():
+    async def body(sched, clock):
+        gate, leader = asyncio.Event(), [False]
+        async def slow():
+            await gate.wait()
+        sched.add("slow", slow, Interval(60), run_at_start=True)
+        sched.add("leader_only", slow, Interval(60), run_at_start=True, guard=lambda: leader[0])
+        assert [j.name for j in sched.run_pending()] == ["slow"]
+        clock.now += 60
+        assert sched.run_pending() == []
+        gate.set()
+        await asyncio.sleep(0)
+        stats = sched.stats()
+        assert stats["slow"]["skipped"] == 1 and stats["slow"]["runs"] == 1
+        assert stats["leader_only"]["held"] == 2 and stats["leader_only"]["runs"] == 0
+    drive(body)
+
+def test_timeouts_and_failures_are_counted():
+    async def body(sched, clock):
+        async def hang():
+            await asyncio.sleep(10)
+        async def boom():
+            raise RuntimeError("boom")
+        sched.add("hang", hang, Interval(60), timeout=0.01, run_at_start=True)
+        sched.add("boom", boom, Interval(60), run_at_start=True)
+        tasks = [j.task for j in sched.run_pending()]
+        await asyncio.gather(*tasks)
+        stats = sched.stats()
+        assert stats["hang"]["timeouts"] == 1 and stats["hang"]["last_error"] == "timeout after 0.01s"
+        assert stats["boom"]["failures"] == 1 and "boom" in stats["boom"]["last_error"]
+    drive(body)
+
+def test_jitter_stays_within_bounds():
+    async def body(sched, clock):
+        async def job():
+            pass
+        job_ = sched.add("j", job, Interval(60), jitter=5)
+        for _ in range(20):
+            assert job_.due <= job_.next_run <= job_.due + 5
+            clock.now = job_.next_run
+            sched.run_pending()
+            await asyncio.sleep(0)
+    drive(body)
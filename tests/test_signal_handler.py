@@ -0,0 +1,45 @@
+import asyncio
+from services import signal_handler as sh
+
+BARS = [{"time": "2026-10-16T10:00:00Z", "open": 1.1, "high": 1.2, "low": 1.0, "close": 1.15}]
+
+class FakeClient:
+    def __init__(self, candles):
+        self.candles = candles
+        self.calls = 0
+
+    async def get_candles(self, connection, symbol, timeframe, count):
+        self.calls += 1
+        return self.candles
+
+def handler(monkeypatch, candles, conn=object()):
+    shots = []
+
+    async def render(symbol, bars, signal):
+        shots.append(("render", len(bars)))
+        return "render.png"
+
+    async def capture(symbol, timeframe):
+        shots.append(("tradingview", timeframe))
+        return "tv.png"
+
+    async def connection():
+        return conn
+    monkeypatch.setattr(sh, "CHART_SOURCE", "render")
+    monkeypatch.setattr(sh, "render_signal_chart", render)
+    monkeypatch.setattr(sh, "screenshot_chart", capture)
+    monkeypatch.setattr(sh, "get_master_connection", connection)
+    h = sh.SignalHandler()
+    h.engine.candles.client = FakeClient(candles)
+    return h, shots
+
+def test_render_fetches_candles_on_a_cold_cache(monkeypatch):
+    # The signal came from another worker's analysis, so this worker's cache is empty
+    h, shots = handler(monkeypatch, BARS)
+    assert asyncio.run(h.chart_snapshot("EUR_USD", {})) == "render.png"
+    assert shots == [("render", 1)] and h.engine.candles.client.calls == 1
+
+def test_render_falls_back_to_tradingview_without_candles(monkeypatch):
+    h, shots = handler(monkeypatch, [], conn=None)
+    assert asyncio.run(h.chart_snapshot("EUR_USD", {})) == "tv.png"
+    assert shots == [("tradingview", "15")]
@@ -0,0 +1,43 @@
+import asyncio
+from services.single_flight import SingleFlight
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight(clock=lambda: 0.0)
+    calls = []
+
+    async def work():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "sig"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", work, 100.0) for _ in range(5)))
+    assert asyncio.run(run()) == ["sig"] * 5
+    assert len(calls) == 1 and flight.stats()["coalesced"] == 4
+    assert flight.peek("k") == (True, "sig")
+
+def test_rejected_result_is_returned_but_not_cached():
+    flight = SingleFlight(clock=lambda: 0.0)
+    complete = lambda r: r[0] is None or bool(r[1])
+
+    async def partial():
+        return {"direction": "BUY"}, ""
+    result = asyncio.run(flight.do("k", partial, 100.0, complete))
+    assert result == ({"direction": "BUY"}, "")
+    assert flight.peek("k") == (False, None)
+
+    async def no_setup():
+        return None, ""
+    asyncio.run(flight.do("k", no_setup, 100.0, complete))
+    assert flight.peek("k") == (True, (None, ""))
+
+def test_failures_are_not_cached():
+    flight = SingleFlight(clock=lambda: 0.0)
+
+    async def boom():
+        raise RuntimeError("metaapi down")
+    try:
+        asyncio.run(flight.do("k", boom, 100.0))
+    except RuntimeError:
+        pass
+    assert flight.peek("k") == (False, None)
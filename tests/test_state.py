@@ -0,0 +1,76 @@
+import asyncio, os, tempfile
+import pytest
+from services.state import StateBackend, MemoryState, SQLiteState
+
+def test_backend_is_abstract():
+    with pytest.raises(TypeError):
+        StateBackend()
+
+BACKENDS = pytest.mark.parametrize("make", [MemoryState, lambda clock: SQLiteState(
+    os.path.join(tempfile.mkdtemp(prefix="state-"), "state.db"), clock=clock)], ids=["memory", "sqlite"])
+
+def run(make, body):
+    now = [1000.0]
+
+    async def go():
+        state = make(clock=lambda: now[0])
+        try:
+            return await body(state, now)
+        finally:
+            await state.close()
+    return asyncio.run(go())
+
+@BACKENDS
+def test_get_set_delete_and_ttl(make):
+    async def body(state, now):
+        assert await state.get("missing") is None
+        await state.set("step:42", {"step": "awaiting_account", "n": 1}, ttl=60)
+        await state.set("flag", True)
+        got = [await state.get("step:42"), await state.get("flag")]
+        now[0] += 61
+        got += [await state.get("step:42"), await state.get("flag")]
+        await state.delete("flag")
+        await state.delete("missing")  # no error for an absent key
+        return got + [await state.get("flag")]
+    assert run(make, body) == [{"step": "awaiting_account", "n": 1}, True, None, True, None]
+
+@BACKENDS
+def test_allow_is_a_fixed_window(make):
+    async def body(state, now):
+        hits = [await state.allow("feedback:7", 2, 60) for _ in range(3)]
+        other = await state.allow("feedback:8", 2, 60)  # keys are counted apart
+        now[0] += 59
+        hits.append(await state.allow("feedback:7", 2, 60))  # same window: extra hits don't extend it
+        now[0] += 2
+        hits.append(await state.allow("feedback:7", 2, 60))  # fresh window
+        return hits, other
+    assert run(make, body) == ([True, True, False, False, True], True)
+
+@BACKENDS
+def test_purge_drops_only_expired_keys(make):
+    async def body(state, now):
+        await state.set("short", 1, ttl=10)
+        await state.set("long", 2, ttl=100)
+        await state.set("forever", 3)
+        now[0] += 11
+        purged = await state.purge()
+        return purged, [await state.get(k) for k in ("short", "long", "forever")], await state.purge()
+    assert run(make, body) == (1, [None, 2, 3], 0)
+
+@BACKENDS
+def test_leases_expire_and_change_hands(make):
+    now = [1000.0]
+    async def go():
+        state = make(clock=lambda: now[0])
+        assert await state.acquire_lease("job", "a", 30)
+        assert not await state.acquire_lease("job", "b", 30)
+        now[0] += 20
+        assert await state.acquire_lease("job", "a", 30)  # renewal pushes expiry out
+        now[0] += 20
+        assert not await state.acquire_lease("job", "b", 30)
+        now[0] += 11
+        assert await state.acquire_lease("job", "b", 30)
+        await state.release_lease("job", "a")  # not the holder: no effect
+        assert not await state.acquire_lease("job", "a", 30)
+        await state.close()
+    asyncio.run(go())
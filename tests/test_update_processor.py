@@ -0,0 +1,71 @@
+import asyncio
+from telegram import Update
+from services.update_processor import OrderedUpdateProcessor
+
+_ids = iter(range(1, 10_000))
+
+def update_from(user_id: int) -> Update:
+    uid = next(_ids)
+    return Update.de_json({"update_id": uid, "message": {
+        "message_id": uid, "date": 1792300000, "text": "hi",
+        "from": {"id": user_id, "is_bot": False, "first_name": "T"},
+        "chat": {"id": user_id, "type": "private"}}}, None)
+
+def run(body, concurrency: int = 64):
+    async def go():
+        proc = OrderedUpdateProcessor(concurrency=concurrency)
+        await proc.initialize()
+        return await body(proc)
+    return asyncio.run(go())
+
+def test_same_user_in_order_other_users_in_parallel():
+    async def body(proc):
+        log = []
+
+        async def handler(user, n, delay):
+            log.append(("start", user, n))
+            await asyncio.sleep(delay)
+            log.append(("end", user, n))
+        # user 1's first update is the slowest; its second must still wait for it
+        await asyncio.gather(
+            proc.process_update(update_from(1), handler(1, 1, 0.05)),
+            proc.process_update(update_from(1), handler(1, 2, 0.0)),
+            proc.process_update(update_from(2), handler(2, 1, 0.0)))
+        return log, proc
+    log, proc = run(body)
+    assert [e for e in log if e[1] == 1] == [("start", 1, 1), ("end", 1, 1), ("start", 1, 2), ("end", 1, 2)]
+    assert log.index(("end", 2, 1)) < log.index(("end", 1, 1))  # user 2 did not wait behind user 1
+    assert not proc._user_locks and not proc._user_pending and proc.processed == 3
+
+def test_in_flight_capped_at_concurrency():
+    async def body(proc):
+        peak = [0]
+
+        async def handler():
+            peak[0] = max(peak[0], proc.in_flight)
+            await asyncio.sleep(0.01)
+        await asyncio.gather(*(proc.process_update(update_from(u), handler()) for u in range(10)))
+        return peak[0], proc.stats()
+    peak, stats = run(body, concurrency=3)
+    assert peak == 3 and stats["processed"] == 10 and stats["in_flight"] == stats["waiting"] == 0
+
+def test_cancel_while_queued_closes_coroutine_and_releases_the_lock():
+    async def body(proc):
+        gate, ran = asyncio.Event(), []
+
+        async def handler(n):
+            ran.append(n)
+            await gate.wait()
+        first = asyncio.create_task(proc.process_update(update_from(7), handler(1)))
+        queued_coro = handler(2)
+        queued = asyncio.create_task(proc.process_update(update_from(7), queued_coro))
+        await asyncio.sleep(0.01)
+        queued.cancel()  # still waiting for user 7's lock
+        await asyncio.gather(queued, return_exceptions=True)
+        gate.set()
+        await first
+        await proc.process_update(update_from(7), handler(3))  # the lock is free again
+        return ran, queued_coro, proc
+    ran, queued_coro, proc = run(body)
+    assert ran == [1, 3] and queued_coro.cr_frame is None  # closed, never started
+    assert not proc._user_locks and not proc._user_pending and proc.waiting == 0
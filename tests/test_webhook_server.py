@@ -0,0 +1,78 @@
+import asyncio, json, socket
+import aiohttp
+from telegram import User
+from tests.stand_in import fixture
+from services.webhook_server import WebhookServer, SECRET_HEADER
+import main
+
+SECRET = "test-secret"
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def handler_for(app, update):
+    """Name of the callback the bot's own routing table picks for update (group 0 only)."""
+    for handler in app.handlers[0]:
+        if handler.check_update(update) not in (None, False):
+            return handler.callback.__name__
+
+def test_recorded_updates_reach_the_bots_handlers(monkeypatch):
+    monkeypatch.setattr(main, "BOT_TOKEN", "123456:TEST")
+    app = main.build_app()
+    app.bot._bot_user = User(123456, "Test Bot", is_bot=True, username="test_bot")  # what get_me() would set
+    updates = json.loads(fixture("telegram_updates.json"))
+    port = free_port()
+
+    async def go():
+        server = WebhookServer(app.bot, app.update_queue, host="127.0.0.1", port=port, secret=SECRET)
+        await server.start()
+        base = f"http://127.0.0.1:{port}"
+        try:
+            async with aiohttp.ClientSession() as http:
+                statuses = []
+                for upd in updates:
+                    async with http.post(base + "/telegram", json=upd, headers={SECRET_HEADER: SECRET}) as r:
+                        statuses.append(r.status)
+                async with http.post(base + "/telegram", json=updates[0], headers={SECRET_HEADER: "wrong"}) as r:
+                    statuses.append(r.status)
+                async with http.post(base + "/telegram", data=b"not json", headers={SECRET_HEADER: SECRET}) as r:
+                    statuses.append(r.status)
+                async with http.get(base + "/healthz") as r:
+                    health = (r.status, await r.json())
+        finally:
+            await server.stop()
+        queued = []
+        while not app.update_queue.empty():
+            queued.append(app.update_queue.get_nowait())
+        return statuses, health, server.stats(), queued
+    statuses, health, stats, queued = asyncio.run(go())
+
+    assert statuses == [200] * len(updates) + [403, 400]
+    assert health[0] == 200 and health[1]["status"] == "ok"
+    assert stats["received"] == stats["dispatched"] == len(updates)
+    assert stats["rejected"] == 1 and stats["malformed"] == 1
+    assert [u.update_id for u in queued] == [u["update_id"] for u in updates]
+    assert [handler_for(app, u) for u in queued] == ["start", "main_menu_router", "main_menu_router", "on_message"]
+
+def test_full_inbox_answers_503_for_redelivery():
+    async def go():
+        port = free_port()
+        server = WebhookServer(None, asyncio.Queue(), host="127.0.0.1", port=port, secret=SECRET, max_queue=1)
+        await server.start()
+        server._dispatcher.cancel()  # stalled dispatcher: nothing drains the inbox
+        try:
+            async with aiohttp.ClientSession() as http:
+                codes = []
+                for i in range(2):
+                    async with http.post(f"http://127.0.0.1:{port}/telegram", json={"update_id": i},
+                                         headers={SECRET_HEADER: SECRET}) as r:
+                        codes.append(r.status)
+                async with http.get(f"http://127.0.0.1:{port}/healthz") as r:
+                    codes.append(r.status)
+        finally:
+            await server.stop()
+        return codes, server.stats()
+    codes, stats = asyncio.run(go())
+    assert codes == [200, 503, 503] and stats["overflow"] == 1
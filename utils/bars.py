@@ -0,0 +1,34 @@
+import math
+from datetime import datetime, timezone
+
+# Bar length in seconds per MetaApi timeframe string
+TIMEFRAME_SECONDS = {
+    "1m": 60, "5m": 300, "15m": 900, "30m": 1800,
+    "1h": 3600, "4h": 14400, "1d": 86400, "1w": 604800,
+}
+# Weekly bars open on Monday 00:00 UTC (the epoch was a Thursday)
+_TIMEFRAME_OFFSET = {"1w": 4 * 86400}
+
+def timeframe_seconds(timeframe: str) -> int:
+    return TIMEFRAME_SECONDS[timeframe]
+
+def bar_open(ts: float, timeframe: str) -> float:
+    """Open time (epoch seconds, UTC) of the bar containing ts."""
+    size = TIMEFRAME_SECONDS[timeframe]
+    off = _TIMEFRAME_OFFSET.get(timeframe, 0)
+    return math.floor((ts - off) / size) * size + off
+
+def next_bar_close(ts: float, timeframe: str) -> float:
+    """Close time of the bar containing ts, i.e. the next bar boundary."""
+    return bar_open(ts, timeframe) + TIMEFRAME_SECONDS[timeframe]
+
+def candle_ts(candle) -> float:
+    """Epoch seconds of a candle's 'time' field (datetime, ISO string or number)."""
+    t = candle["time"]
+    if isinstance(t, datetime):
+        if t.tzinfo is None:
+            t = t.replace(tzinfo=timezone.utc)
+        return t.timestamp()
+    if isinstance(t, str):
+        return candle_ts({"time": datetime.fromisoformat(t.replace("Z", "+00:00"))})
+    return float(t)
@@ -14,6 +14,12 @@ SINGLE_INSTRUMENTS = {
     "CRYPTO": ["BTC/USD"]
 }
 
+# Calendar currencies that move instruments which aren't plain "AAA/BBB" pairs
+INSTRUMENT_CURRENCIES = {
+    "NAS100 / US_TECH": ["USD"],
+    "WTI / USOIL": ["USD"],
+}
+
 # News categories
 NEWS_CATEGORIES = ["Geopolitical Events", "Central Bank News (Fed, ECB)", "Inflation & Economic Data"]
 
@@ -0,0 +1,22 @@
+from urllib.parse import urlsplit, urlunsplit, parse_qsl, urlencode
+
+# Query parameters that only track the click and never change the article
+TRACKING_PARAMS = {"utm_source", "utm_medium", "utm_campaign", "utm_term", "utm_content", "utm_id",
+                   "fbclid", "gclid", "mc_cid", "mc_eid", "ocid", "cmpid", "taid", "rpc", "ref", "src", "oc"}
+
+def canonical_url(url: str) -> str:
+    """
+    Canonical form of an article URL for deduplication: lowercase scheme and host (paths
+    and query values are case-sensitive and kept), no fragment, no tracking parameters,
+    remaining parameters sorted, no "www." and no trailing slash.
+    """
+    if not url:
+        return ""
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query = urlencode(sorted((k, v) for k, v in parse_qsl(parts.query) if k.lower() not in TRACKING_PARAMS))
+    path = parts.path.rstrip("/") or "/"
+    return urlunsplit(("https" if scheme in ("http", "https") else scheme, host, path, query, ""))